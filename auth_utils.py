@@ -5,7 +5,9 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import settings
 import hashlib
-from database import get_db
+from database import get_request_db
+from token_cache import revoked_tokens, verified_claims
+from request_timing import phase
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -60,58 +62,84 @@ def create_refresh_token(user_id: int):
 
 def verify_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    conn=Depends(get_db)
+    conn=Depends(get_request_db)
 ):
     token = credentials.credentials
+
+    # Only touches the database when the local revocation set is stale
+    with phase("auth_revocation"):
+        revoked_tokens.refresh_if_due(conn)
+
+    return _token_data(token)
+
+
+async def verify_token_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db=Depends(get_request_db)
+):
+    """
+    verify_token for `async def` routes. A due revocation refresh runs on
+    the request's aiomysql connection, the one the route uses as well, so
+    the request never checks out a second, mysql.connector connection.
+    """
+    token = credentials.credentials
+
+    with phase("auth_revocation"):
+        if revoked_tokens.is_due():
+            await revoked_tokens.refresh_if_due_async(await db.async_connection())
+
+    return _token_data(token)
+
+
+def _token_data(token: str) -> dict:
     token_hash = hash_token(token)
 
-    cursor = conn.cursor(dictionary=True)
+    if revoked_tokens.is_revoked(token_hash):
+        raise HTTPException(status_code=401, detail="Token revoked")
 
+    # Verify JWT token, unless this exact token was already verified
     try:
-        cursor.execute(
-            """
-            SELECT 1 FROM revoked_tokens
-            WHERE token_hash = %s AND expires_at > NOW()
-            """,
-            (token_hash,),
-        )
-
-        if cursor.fetchone():
-            raise HTTPException(status_code=401, detail="Token revoked")
-
-        # Verify JWT token
-        try:
-            payload = jwt.decode(
-                token,
-                settings.get_jwt_secret_value(),
-                algorithms=[settings.JWT_ALGORITHM],
-                audience="mobile-app",
-                issuer="trial-balance-api"
-            )
+        payload = verified_claims.get(token_hash)
+
+        if payload is None:
+            with phase("auth_jwt_decode"):
+                payload = jwt.decode(
+                    token,
+                    settings.get_jwt_secret_value(),
+                    algorithms=[settings.JWT_ALGORITHM],
+                    audience="mobile-app",
+                    issuer="trial-balance-api"
+                )
 
             # Verify it's an access token
             if payload.get("type") != "access":
                 raise HTTPException(status_code=401, detail="Invalid token type")
 
-            # Return token data with raw token
-            user_id = payload.get("sub")
-            if not user_id:
+            if not payload.get("sub"):
                 raise HTTPException(status_code=401, detail="Invalid token - missing user ID")
 
-            return {
-                "user_id": int(user_id),
-                "role": payload.get("role", "user"),
-                "email": payload.get("email"),
-                "raw_token": token,
-                "payload": payload
-            }
-        except ExpiredSignatureError:
-            raise HTTPException(status_code=401, detail="Token expired")
-        except JWTError:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    finally:
-        cursor.close()
-        conn.close()
+            verified_claims.put(token_hash, payload)
+
+        # Return token data with raw token
+        user_id = payload["sub"]
+
+        return {
+            "user_id": int(user_id),
+            "role": payload.get("role", "user"),
+            "email": payload.get("email"),
+            "raw_token": token,
+            "payload": payload
+        }
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+def require_admin(current_user: dict = Depends(verify_token)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
 
 
 def hash_password(password: str) -> str:
@@ -0,0 +1,56 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import Request, Response
+from fast_json import FastJSONResponse
+
+# Accept header that selects the columnar format, same as ?format=columnar
+COLUMNAR_MEDIA_TYPE = "application/vnd.udayam.columnar+json"
+
+
+def wants_columnar(request: Request, format: Optional[str]) -> bool:
+    return format == "columnar" or COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _dictionary_encode(values: list):
+    """{"dictionary", "indices"} when the column repeats enough, else None"""
+    if not values or not all(value is None or isinstance(value, (str, date)) for value in values):
+        return None
+
+    positions = {}
+    indices = []
+    for value in values:
+        if value is None:
+            indices.append(None)
+            continue
+        index = positions.get(value)
+        if index is None:
+            index = positions[value] = len(positions)
+        indices.append(index)
+
+    if not positions or len(positions) * 2 > len(values):
+        return None
+    return {"dictionary": list(positions), "indices": indices}
+
+
+def to_columnar(rows: List[dict]) -> dict:
+    """
+    Rows as one array per column, field names sent once.
+
+    String and date columns where at least every other value is a repeat
+    (customer, address, salesman, the bill date) are dictionary encoded:
+    the distinct values once plus an index per row, null staying null.
+    Row n is rebuilt as {name: column[n]} or dictionary[indices[n]].
+    """
+    names = list(rows[0]) if rows else []
+    columns = {}
+
+    for name in names:
+        values = [row.get(name) for row in rows]
+        columns[name] = _dictionary_encode(values) or values
+
+    return {"format": "columnar", "length": len(rows), "columns": columns}
+
+
+def columnar_response(rows: List[dict], response: Response) -> FastJSONResponse:
+    """Columnar body with the headers already set on the injected response"""
+    return FastJSONResponse(to_columnar(rows), headers=dict(response.headers))
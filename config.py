@@ -13,6 +13,29 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    REVOCATION_REFRESH_SECONDS: int = 30
+    CLAIMS_CACHE_SIZE: int = 1024
+    TRIAL_BALANCE_CONCURRENCY: int = 3
+    TRIAL_BALANCE_BATCH: bool = True
+    REPORT_CACHE_SIZE: int = 256
+    REFERENCE_REFRESH_SECONDS: int = 60
+    SALES_PAGE_SIZE: int = 100
+    SALES_STREAM_CHUNK_SIZE: int = 200
+    EXPORT_CHUNK_SIZE: int = 1000
+    EXPORT_MAX_DAYS: int = 366
+    EXPORT_MAX_ROWS: int = 200000
+    FAST_JSON: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+    PROFIT_LOSS_CACHE_PATH: Optional[str] = None
+    PROFIT_LOSS_MAX_DAYS: int = 366
+    DB_POOL_SIZE: int = 5
+    HEALTH_PING_SECONDS: int = 10
+    METRICS_TOKEN: Optional[str] = None
+    PROC_PROFILING: bool = False
+    PROC_PROFILE_SLOWEST: int = 20
+    PROC_PROFILE_RECENT: int = 100
 
     def get_jwt_secret_value(self) -> str:
         if self.JWT_SECRET:
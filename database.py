@@ -1,8 +1,21 @@
 import os
+import contextvars
 import json
+import queue
+import time
+import asyncio
+import threading
 import boto3
+import aiomysql
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 from mysql.connector import pooling
+from mysql.connector.errors import Error as ConnectorError, PoolError
 from typing import Optional
+from config import settings
+from metrics import pool_acquire_seconds, pool_timeouts, pool_waits, procedure_errors, procedure_seconds
+from procedure_profile import ProcedureCall, STATUS_QUERY, procedure_profile, status_delta, status_values
+from request_timing import phase
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
@@ -10,8 +23,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 _db_pool: Optional[pooling.MySQLConnectionPool] = None
+_async_db_pool: Optional[aiomysql.Pool] = None
+_async_db_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_db_pool_lock: Optional[asyncio.Lock] = None
 _db_credentials_cache: Optional[dict] = None
 
+# Checkouts currently waiting for a free connection, per pool
+_pool_waiting = {"sync": 0, "async": 0}
+_pool_waiting_lock = threading.Lock()
+
+_ping_result: Optional[dict] = None
+_ping_lock = threading.Lock()
+
+# MySQL 8 caches information_schema table stats (UPDATE_TIME) for a day
+# by default. Older servers and MariaDB have no such cache and reject the
+# variable, after which it is not sent again.
+STATS_EXPIRY_QUERY = "SET SESSION information_schema_stats_expiry = 0"
+UNKNOWN_SYSTEM_VARIABLE = 1193
+_stats_expiry_supported = True
+
 
 def get_db_credentials():
     """Load credentials from AWS Secrets Manager with caching"""
@@ -66,6 +96,43 @@ def get_db_credentials():
         return _db_credentials_cache
 
 
+class _WaitingPool(pooling.MySQLConnectionPool):
+    """
+    mysql.connector pool whose checkout can wait for a connection.
+
+    The stock pool fails at once when it is exhausted. Returning a
+    connection goes through add_connection, which here also wakes one
+    waiting checkout.
+    """
+
+    def __init__(self, **kwargs):
+        # The base class returns its initial connections through
+        # add_connection, the condition has to exist first
+        self._returned = threading.Condition()
+        super().__init__(**kwargs)
+
+    def add_connection(self, cnx=None):
+        super().add_connection(cnx)
+        with self._returned:
+            self._returned.notify()
+
+    def get_connection_waiting(self, timeout: float, on_wait=None):
+        deadline = time.monotonic() + timeout
+
+        with self._returned:
+            while True:
+                try:
+                    return self.get_connection()
+                except PoolError:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise
+                    if on_wait is not None:
+                        on_wait()
+                        on_wait = None
+                    self._returned.wait(remaining)
+
+
 def get_db_pool():
     global _db_pool
 
@@ -75,9 +142,9 @@ def get_db_pool():
         if not all(creds.values()):
             raise RuntimeError("Database credentials are incomplete")
 
-        _db_pool = pooling.MySQLConnectionPool(
+        _db_pool = _WaitingPool(
             pool_name="trial_balance_pool",
-            pool_size=5,
+            pool_size=settings.DB_POOL_SIZE,
             **creds # type: ignore
         )
 
@@ -86,5 +153,430 @@ def get_db_pool():
     return _db_pool
 
 
-def get_db():
-    return get_db_pool().get_connection()
+def _count_waiting(pool: str, delta: int):
+    with _pool_waiting_lock:
+        _pool_waiting[pool] += delta
+
+
+def get_db(timeout: float = 10.0):
+    # Blocks until another request returns a connection, up to timeout
+    started = time.perf_counter()
+    waiting = []
+
+    def on_wait():
+        waiting.append(True)
+        pool_waits.inc(pool="sync")
+        _count_waiting("sync", 1)
+
+    with phase("db_acquire"):
+        try:
+            conn = get_db_pool().get_connection_waiting(timeout, on_wait)
+        except PoolError:
+            pool_timeouts.inc(pool="sync")
+            raise
+        finally:
+            if waiting:
+                _count_waiting("sync", -1)
+
+    pool_acquire_seconds.observe(time.perf_counter() - started, pool="sync")
+    return conn
+
+
+def _try_get_db():
+    """A pooled connection if one is free right now, else None"""
+    try:
+        return get_db_pool().get_connection()
+    except PoolError:
+        return None
+
+
+def map_on_connections(fn, items, max_workers: int, conn=None, return_exceptions=False):
+    """
+    Call fn(connection, item) for every item and return the results in order.
+
+    The calling thread works through the items on conn (or a connection of
+    its own). With max_workers > 1, up to max_workers - 1 helper threads
+    join in on extra pooled connections, but only on connections free at
+    that moment, and one report never holds more than DB_POOL_SIZE - 1.
+    With the pool busy the items simply run one after another on conn, no
+    request waits on another for a helper connection. With
+    return_exceptions, a failing item yields its exception instead of
+    aborting the others.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    pending: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+    for index in range(len(items)):
+        pending.put(index)
+
+    def drain(connection):
+        while True:
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = fn(connection, items[index])
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results[index] = e
+
+    def drain_and_close(connection):
+        try:
+            drain(connection)
+        finally:
+            connection.close()
+
+    own_conn = None
+    if conn is None:
+        conn = own_conn = get_db()
+
+    helpers = []
+    try:
+        for _ in range(min(max_workers, settings.DB_POOL_SIZE - 1, len(items)) - 1):
+            helper_conn = _try_get_db()
+            if helper_conn is None:
+                break
+            helpers.append(helper_conn)
+
+        if not helpers:
+            drain(conn)
+            return results
+
+        # Helpers run in a copy of the caller's context so their timings
+        # count towards the request
+        with ThreadPoolExecutor(max_workers=len(helpers)) as executor:
+            futures = []
+            while helpers:
+                futures.append(executor.submit(contextvars.copy_context().run, drain_and_close, helpers.pop()))
+            drain(conn)
+            for future in futures:
+                future.result()
+        return results
+    finally:
+        # Only helpers never handed to a thread are still here
+        for helper_conn in helpers:
+            helper_conn.close()
+        if own_conn is not None:
+            own_conn.close()
+
+
+@contextmanager
+def _procedure_call(procname: str, args):
+    """Request timing phase, latency metrics and profiling around one stored procedure call"""
+    call = ProcedureCall(procname, args)
+    started = time.perf_counter()
+
+    with phase(f"proc.{procname}") as span:
+        try:
+            yield call
+        except Exception as e:
+            call.error = str(e)
+            procedure_errors.inc(procedure=procname)
+            raise
+        finally:
+            call.seconds = time.perf_counter() - started
+            span.rows = call.rows
+            procedure_seconds.observe(call.seconds, procedure=procname)
+            procedure_profile.record(call)
+
+
+def _session_status(cursor) -> dict:
+    cursor.execute(STATUS_QUERY)
+    return status_values(cursor.fetchall())
+
+
+def callproc(cursor, procname: str, args=()):
+    """Call a stored procedure on a mysql.connector cursor and return the rows of all its result sets"""
+    before = _session_status(cursor) if procedure_profile.wants_status(procname) else None
+
+    with _procedure_call(procname, args) as call:
+        cursor.callproc(procname, args)
+
+        rows = []
+        for result in cursor.stored_results():
+            rows.extend(result.fetchall())
+
+        call.rows = len(rows)
+
+    if before is not None:
+        call.session_status = status_delta(before, _session_status(cursor))
+
+    return rows
+
+
+class RequestConnection:
+    """
+    Per-request handle on the pools.
+
+    Connections are only checked out on first use and are shared by every
+    dependency of the request (verify_token and the route handler), then
+    returned in get_request_db's teardown.
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._async_conn = None
+        self._async_pool = None
+
+    @property
+    def connection(self):
+        if self._conn is None:
+            self._conn = get_db()
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        return self.connection.cursor(*args, **kwargs)
+
+    def commit(self):
+        self.connection.commit()
+
+    async def async_connection(self):
+        if self._async_conn is None:
+            with phase("db_acquire"):
+                self._async_pool = await get_async_db_pool()
+                self._async_conn = await _acquire_async(self._async_pool)
+        return self._async_conn
+
+    async def release(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            # Returning a pooled connection resets the session (a round trip)
+            await asyncio.to_thread(conn.close)
+
+        if self._async_conn is not None:
+            conn, self._async_conn = self._async_conn, None
+            self._async_pool.release(conn)  # type: ignore
+
+
+async def get_request_db():
+    conn = RequestConnection()
+    try:
+        yield conn
+    finally:
+        await conn.release()
+
+
+async def get_async_db_pool():
+    """asyncio-native pool for `async def` routes, one per event loop"""
+    global _async_db_pool, _async_db_pool_loop, _async_db_pool_lock
+
+    loop = asyncio.get_running_loop()
+
+    # Pools are bound to the loop that created them, so start over if the
+    # runtime (e.g. a new Mangum invocation loop) gave us a different one
+    if _async_db_pool_loop is not loop:
+        _async_db_pool = None
+        _async_db_pool_loop = loop
+        _async_db_pool_lock = asyncio.Lock()
+
+    async with _async_db_pool_lock:  # type: ignore
+        if _async_db_pool is None:
+            creds = get_db_credentials()
+
+            if not all(creds.values()):
+                raise RuntimeError("Database credentials are incomplete")
+
+            _async_db_pool = await aiomysql.create_pool(
+                minsize=1,
+                maxsize=settings.DB_POOL_SIZE,
+                host=creds["host"],
+                db=creds["database"],
+                user=creds["user"],
+                password=creds["password"],
+                autocommit=True,
+            )
+
+            print(f"Created async database connection pool to {creds['host']}")
+
+    return _async_db_pool
+
+
+async def _acquire_async(pool):
+    started = time.perf_counter()
+    waiting = pool.freesize == 0 and pool.size >= pool.maxsize
+
+    if waiting:
+        pool_waits.inc(pool="async")
+        _count_waiting("async", 1)
+
+    try:
+        return await pool.acquire()
+    finally:
+        if waiting:
+            _count_waiting("async", -1)
+        pool_acquire_seconds.observe(time.perf_counter() - started, pool="async")
+
+
+@asynccontextmanager
+async def get_async_db():
+    pool = await get_async_db_pool()
+    conn = await _acquire_async(pool)
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def pool_stats() -> dict:
+    """Size, checked out and waiting counts of the pools created so far"""
+    stats = {}
+
+    if _db_pool is not None:
+        # mysql.connector opens every connection up front and has no public
+        # count of the idle ones
+        idle = _db_pool._cnx_queue.qsize()
+        stats["sync"] = {
+            "size": _db_pool.pool_size,
+            "open": _db_pool.pool_size,
+            "in_use": _db_pool.pool_size - idle,
+            "waiting": _pool_waiting["sync"],
+        }
+
+    if _async_db_pool is not None:
+        stats["async"] = {
+            "size": _async_db_pool.maxsize,
+            "open": _async_db_pool.size,
+            "in_use": _async_db_pool.size - _async_db_pool.freesize,
+            "waiting": _pool_waiting["async"],
+        }
+
+    return stats
+
+
+def ping_database(max_age: float) -> dict:
+    """
+    Result of a SELECT 1 on a pooled connection, reused for max_age seconds
+    so frequent readiness probes do not add load of their own.
+    """
+    global _ping_result
+
+    cached = _ping_result
+    if cached is not None and time.monotonic() - cached["checked_at"] < max_age:
+        return cached
+
+    # One probe pings at a time, the others get the previous result
+    if not _ping_lock.acquire(blocking=cached is None):
+        return cached  # type: ignore
+
+    try:
+        started = time.perf_counter()
+        try:
+            conn = get_db(timeout=1.0)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+            finally:
+                conn.close()
+            result = {"ok": True, "error": None}
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["checked_at"] = time.monotonic()
+        _ping_result = result
+        return result
+    finally:
+        _ping_lock.release()
+
+
+def current_date(conn):
+    """The server's CURDATE(), the day the procedures see, not this host's"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT CURDATE()")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def expire_table_stats(cursor):
+    """Best effort: make UPDATE_TIME live for this session where it is cached"""
+    global _stats_expiry_supported
+    if not _stats_expiry_supported:
+        return
+
+    try:
+        cursor.execute(STATS_EXPIRY_QUERY)
+    except ConnectorError as e:
+        if e.errno == UNKNOWN_SYSTEM_VARIABLE:
+            _stats_expiry_supported = False
+
+
+async def async_expire_table_stats(conn):
+    """Same as expire_table_stats over an aiomysql connection"""
+    global _stats_expiry_supported
+    if not _stats_expiry_supported:
+        return
+
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(STATS_EXPIRY_QUERY)
+    except aiomysql.Error as e:
+        if e.args and e.args[0] == UNKNOWN_SYSTEM_VARIABLE:
+            _stats_expiry_supported = False
+
+
+async def async_fetchall(conn, query: str, params=None):
+    async with conn.cursor(aiomysql.DictCursor) as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchall()
+
+
+async def async_fetchone(conn, query: str, params=None):
+    async with conn.cursor(aiomysql.DictCursor) as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchone()
+
+
+async def async_callproc(conn, procname: str, args):
+    """Call a stored procedure and return the rows of its last result set"""
+    results = []
+    before = None
+    if procedure_profile.wants_status(procname):
+        before = status_values(await async_fetchall(conn, STATUS_QUERY))
+
+    with _procedure_call(procname, args) as call:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.callproc(procname, args)
+
+            while True:
+                # The trailing status packet of a CALL has no description
+                if cursor.description:
+                    results = list(await cursor.fetchall())
+                if not await cursor.nextset():
+                    break
+
+        call.rows = len(results)
+
+    if before is not None:
+        call.session_status = status_delta(before, status_values(await async_fetchall(conn, STATUS_QUERY)))
+
+    return results
+
+
+async def async_callproc_stream(conn, procname: str, args, chunk_size: int = 200):
+    """Call a stored procedure and yield its first result set in chunks as it is read"""
+    async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+        await cursor.callproc(procname, args)
+
+        while True:
+            rows = await cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+async def async_query_stream(conn, query: str, params=None, chunk_size: int = 200):
+    """Run a query unbuffered and yield its rows in chunks as they are read"""
+    async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+        await cursor.execute(query, params)
+
+        while True:
+            rows = await cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
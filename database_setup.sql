@@ -49,6 +49,7 @@ CREATE INDEX idx_prpackstru_itec ON PRPACKSTRU (ITEC, PITEC);
 
 -- SALTOT
 CREATE INDEX idx_saltot_bill ON SALTOT (DATE, BILLNO, CUSCOD);
+CREATE INDEX idx_saltot_date_sno ON SALTOT (DATE, SNO_ID);
 
 -- SALDET
 CREATE INDEX idx_saldet_bill ON SALDET (DATE, BILLNO, CUSCOD);
@@ -67,6 +68,7 @@ CREATE TABLE IF NOT EXISTS USERS_APP (
 );
 
 -- Create PAYDATMAS table for salary calculations
+-- (no longer written by get_trial_balance_shop, see payroll.py)
 CREATE TABLE IF NOT EXISTS PAYDATMAS (
     `date` DATE NOT NULL,
     cday VARCHAR(10) NOT NULL,
@@ -84,6 +86,8 @@ CREATE TABLE revoked_tokens (
 );
 
 CREATE INDEX idx_token_hash ON revoked_tokens(token_hash);
+-- expires_at is UTC. The API's revocation cache re-reads recent rows by created_at.
+CREATE INDEX idx_revoked_created ON revoked_tokens(created_at);
 
 
 -- Insert test user (password: 'password')
@@ -97,6 +101,402 @@ INSERT INTO USERS_APP (email, password_hash, role) VALUES
  '$2b$12$6Yvm.5Q8XHRxIa4ORpjSMO6nSRocW5Rf7zjZCA0O2xfziYt61uw4q',
  'user');
 
+-- Step 2b: Daily DAYBUK rollup used by the trial balance procedures
+-- One row per day and per combination of the columns the reports filter
+-- on, with TRNAMT summed. DBCR is part of the key, so signed balances are
+-- range sums over this table instead of scans of the full ledger.
+--
+-- Triggers on DAYBUK keep the rollup current: an insert adds its row, a
+-- delete subtracts it and an update does both, in the writer's own
+-- transaction. The dimension columns keep DAYBUK's NULLs, so every
+-- procedure predicate matches exactly the rows it matched on DAYBUK.
+-- DAYBUK_DAILY is derived data and is rebuilt from scratch below.
+
+DROP TABLE IF EXISTS DAYBUK_DAILY;
+
+CREATE TABLE DAYBUK_DAILY (
+    TRNDAT DATE NOT NULL,
+    comp VARCHAR(10) NULL,
+    GRPCOD VARCHAR(10) NULL,
+    CUSCOD VARCHAR(10) NULL,
+    ABC3 VARCHAR(10) NULL,
+    JRT3 VARCHAR(10) NULL,
+    JRT VARCHAR(10) NULL,
+    TRNTYP VARCHAR(10) NULL,
+    DBCR VARCHAR(1) NULL,
+    -- TRNDET LIKE '%MAIN ADVANCE DUE CREDIT', the only TRNDET test in use.
+    -- NULL when TRNDET is NULL, as the LIKE itself would be.
+    MAIN_ADV_CR TINYINT(1) NULL,
+    TRNAMT DECIMAL(18,2) NOT NULL DEFAULT 0,
+    ROW_COUNT INT NOT NULL DEFAULT 0,
+    -- A primary key cannot hold NULLs, so uniqueness goes through this
+    -- length-prefixed encoding of the dimensions, '-' standing for NULL.
+    -- InnoDB clusters on the unique key since all its columns are NOT NULL.
+    ROLLUP_KEY VARCHAR(160) AS (CONCAT_WS('|',
+        IFNULL(CONCAT(CHAR_LENGTH(comp), ':', comp), '-'),
+        IFNULL(CONCAT(CHAR_LENGTH(GRPCOD), ':', GRPCOD), '-'),
+        IFNULL(CONCAT(CHAR_LENGTH(CUSCOD), ':', CUSCOD), '-'),
+        IFNULL(CONCAT(CHAR_LENGTH(ABC3), ':', ABC3), '-'),
+        IFNULL(CONCAT(CHAR_LENGTH(JRT3), ':', JRT3), '-'),
+        IFNULL(CONCAT(CHAR_LENGTH(JRT), ':', JRT), '-'),
+        IFNULL(CONCAT(CHAR_LENGTH(TRNTYP), ':', TRNTYP), '-'),
+        IFNULL(CONCAT(CHAR_LENGTH(DBCR), ':', DBCR), '-'),
+        IFNULL(MAIN_ADV_CR, '-')
+    )) STORED NOT NULL,
+    UNIQUE KEY uq_daybuk_daily (TRNDAT, ROLLUP_KEY)
+);
+
+CREATE INDEX idx_daybuk_daily_grp ON DAYBUK_DAILY (GRPCOD, TRNDAT);
+CREATE INDEX idx_daybuk_daily_comp_grp ON DAYBUK_DAILY (comp, GRPCOD, TRNDAT);
+CREATE INDEX idx_daybuk_daily_cash ON DAYBUK_DAILY (CUSCOD, ABC3, TRNDAT);
+CREATE INDEX idx_daybuk_daily_abc3 ON DAYBUK_DAILY (ABC3, comp, TRNDAT);
+CREATE INDEX idx_daybuk_daily_jrt ON DAYBUK_DAILY (JRT3, DBCR, TRNDAT);
+
+-- Change counter per source table, bumped by its triggers and rebuilds.
+-- report_cache.get_data_watermark reads it. Every writer updates the same
+-- row and holds its lock until commit, so DAYBUK writes are serialized
+-- and the counter moves in commit order.
+CREATE TABLE IF NOT EXISTS ROLLUP_VERSION (
+    name VARCHAR(32) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS refresh_daybuk_daily $$
+DROP PROCEDURE IF EXISTS bump_rollup_version $$
+DROP PROCEDURE IF EXISTS daybuk_daily_apply $$
+DROP PROCEDURE IF EXISTS rebuild_daybuk_daily $$
+
+CREATE PROCEDURE bump_rollup_version (IN p_name VARCHAR(32))
+BEGIN
+    INSERT INTO ROLLUP_VERSION (name, version)
+    VALUES (p_name, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END $$
+
+-- Adds one DAYBUK row to its rollup row, or takes it out with p_sign -1
+CREATE PROCEDURE daybuk_daily_apply (
+    IN p_trndat DATE,
+    IN p_comp VARCHAR(10),
+    IN p_grpcod VARCHAR(10),
+    IN p_cuscod VARCHAR(10),
+    IN p_abc3 VARCHAR(10),
+    IN p_jrt3 VARCHAR(10),
+    IN p_jrt VARCHAR(10),
+    IN p_trntyp VARCHAR(10),
+    IN p_dbcr VARCHAR(1),
+    IN p_trndet TEXT,
+    IN p_trnamt DECIMAL(18,2),
+    IN p_sign INT
+)
+BEGIN
+    -- Every report filters on TRNDAT, undated rows never count
+    IF p_trndat IS NOT NULL THEN
+        INSERT INTO DAYBUK_DAILY (
+            TRNDAT, comp, GRPCOD, CUSCOD, ABC3, JRT3, JRT, TRNTYP, DBCR,
+            MAIN_ADV_CR, TRNAMT, ROW_COUNT
+        )
+        VALUES (
+            p_trndat, p_comp, p_grpcod, p_cuscod, p_abc3, p_jrt3, p_jrt, p_trntyp, p_dbcr,
+            p_trndet LIKE '%MAIN ADVANCE DUE CREDIT',
+            p_sign * COALESCE(p_trnamt, 0),
+            p_sign
+        )
+        ON DUPLICATE KEY UPDATE
+            TRNAMT = TRNAMT + VALUES(TRNAMT),
+            ROW_COUNT = ROW_COUNT + VALUES(ROW_COUNT);
+    END IF;
+END $$
+
+-- Recomputes DAYBUK_DAILY from the whole ledger in one transaction. The
+-- triggers keep it current, this is for the initial load and repairs.
+-- It reads DAYBUK with shared locks, so run it when the ledger is quiet.
+CREATE PROCEDURE rebuild_daybuk_daily ()
+BEGIN
+    START TRANSACTION;
+
+    DELETE FROM DAYBUK_DAILY;
+
+    INSERT INTO DAYBUK_DAILY (
+        TRNDAT, comp, GRPCOD, CUSCOD, ABC3, JRT3, JRT, TRNTYP, DBCR,
+        MAIN_ADV_CR, TRNAMT, ROW_COUNT
+    )
+    SELECT
+        TRNDAT, comp, GRPCOD, CUSCOD, ABC3, JRT3, JRT, TRNTYP, DBCR,
+        TRNDET LIKE '%MAIN ADVANCE DUE CREDIT',
+        COALESCE(SUM(TRNAMT), 0),
+        COUNT(*)
+    FROM DAYBUK
+    WHERE TRNDAT IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10;
+
+    CALL bump_rollup_version('DAYBUK');
+
+    COMMIT;
+END $$
+
+DROP TRIGGER IF EXISTS daybuk_daily_insert $$
+DROP TRIGGER IF EXISTS daybuk_daily_update $$
+DROP TRIGGER IF EXISTS daybuk_daily_delete $$
+
+CREATE TRIGGER daybuk_daily_insert AFTER INSERT ON DAYBUK
+FOR EACH ROW
+BEGIN
+    CALL daybuk_daily_apply(
+        NEW.TRNDAT, NEW.comp, NEW.GRPCOD, NEW.CUSCOD, NEW.ABC3, NEW.JRT3,
+        NEW.JRT, NEW.TRNTYP, NEW.DBCR, NEW.TRNDET, NEW.TRNAMT, 1
+    );
+    CALL bump_rollup_version('DAYBUK');
+END $$
+
+CREATE TRIGGER daybuk_daily_update AFTER UPDATE ON DAYBUK
+FOR EACH ROW
+BEGIN
+    CALL daybuk_daily_apply(
+        OLD.TRNDAT, OLD.comp, OLD.GRPCOD, OLD.CUSCOD, OLD.ABC3, OLD.JRT3,
+        OLD.JRT, OLD.TRNTYP, OLD.DBCR, OLD.TRNDET, OLD.TRNAMT, -1
+    );
+    CALL daybuk_daily_apply(
+        NEW.TRNDAT, NEW.comp, NEW.GRPCOD, NEW.CUSCOD, NEW.ABC3, NEW.JRT3,
+        NEW.JRT, NEW.TRNTYP, NEW.DBCR, NEW.TRNDET, NEW.TRNAMT, 1
+    );
+    CALL bump_rollup_version('DAYBUK');
+END $$
+
+CREATE TRIGGER daybuk_daily_delete AFTER DELETE ON DAYBUK
+FOR EACH ROW
+BEGIN
+    CALL daybuk_daily_apply(
+        OLD.TRNDAT, OLD.comp, OLD.GRPCOD, OLD.CUSCOD, OLD.ABC3, OLD.JRT3,
+        OLD.JRT, OLD.TRNTYP, OLD.DBCR, OLD.TRNDET, OLD.TRNAMT, -1
+    );
+    CALL bump_rollup_version('DAYBUK');
+END $$
+
+DELIMITER ;
+
+-- Initial load of the whole ledger
+CALL rebuild_daybuk_daily();
+
+-- Step 2c: Running production stock per item
+-- PRSTOCK_TOTALS holds the purchased quantity per ITEC and the sold
+-- quantity per sold ITEC, as they appear in PRPURDET and PRSALDET.
+-- Triggers on both tables keep it current through inserts, updates and
+-- deletes. Sales are expanded through PRPACKSTRU when PRSTOCK_CLOSING is
+-- read, so the current pack structure always applies, as it did when the
+-- history was summed directly. Opening quantities stay in PRSTKMAS.
+
+DROP PROCEDURE IF EXISTS refresh_prstock_snapshot;
+DROP TABLE IF EXISTS PRSTOCK_SNAPSHOT;
+DROP TABLE IF EXISTS ROLLUP_WATERMARK;
+DROP TABLE IF EXISTS PRSTOCK_TOTALS;
+
+CREATE TABLE PRSTOCK_TOTALS (
+    ITEC VARCHAR(20) NOT NULL PRIMARY KEY,
+    PUR_QTY DECIMAL(18,3) NOT NULL DEFAULT 0,
+    SOLD_QTY DECIMAL(18,3) NOT NULL DEFAULT 0
+);
+
+-- Closing stock per production item. Read by get_trial_balance_shop and
+-- GET /api/stock-valuation.
+CREATE OR REPLACE VIEW PRSTOCK_CLOSING AS
+SELECT
+    ia.ITEC,
+    COALESCE(st.OQTY, 0) AS OQTY,
+    COALESCE(pt.PUR_QTY, 0) AS PUR_QTY,
+    COALESCE(sa.SALE_QTY, 0) AS SALE_QTY,
+    COALESCE(st.OQTY, 0) + COALESCE(pt.PUR_QTY, 0) - COALESCE(sa.SALE_QTY, 0) AS CLOSING_QTY,
+    ia.RATE,
+    (COALESCE(st.OQTY, 0) + COALESCE(pt.PUR_QTY, 0) - COALESCE(sa.SALE_QTY, 0)) * ia.RATE AS STOCK_VALUE
+FROM PRITEMAS ia
+LEFT JOIN PRSTKMAS st ON st.ITEC = ia.ITEC
+LEFT JOIN PRSTOCK_TOTALS pt ON pt.ITEC = ia.ITEC
+LEFT JOIN (
+    SELECT ps.ITEC, SUM(t.SOLD_QTY * ps.QTY) AS SALE_QTY
+    FROM PRPACKSTRU ps
+    JOIN PRSTOCK_TOTALS t ON t.ITEC = ps.PITEC
+    GROUP BY ps.ITEC
+) sa ON sa.ITEC = ia.ITEC;
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS prstock_totals_apply $$
+DROP PROCEDURE IF EXISTS rebuild_prstock_totals $$
+
+-- Adds a purchased and a sold quantity to one item, negative to take
+-- them out. Rows without an item code never counted.
+CREATE PROCEDURE prstock_totals_apply (
+    IN p_itec VARCHAR(20),
+    IN p_pur_qty DECIMAL(18,3),
+    IN p_sold_qty DECIMAL(18,3)
+)
+BEGIN
+    IF p_itec IS NOT NULL THEN
+        INSERT INTO PRSTOCK_TOTALS (ITEC, PUR_QTY, SOLD_QTY)
+        VALUES (p_itec, COALESCE(p_pur_qty, 0), COALESCE(p_sold_qty, 0))
+        ON DUPLICATE KEY UPDATE
+            PUR_QTY = PUR_QTY + VALUES(PUR_QTY),
+            SOLD_QTY = SOLD_QTY + VALUES(SOLD_QTY);
+    END IF;
+END $$
+
+-- Recomputes PRSTOCK_TOTALS from the whole history in one transaction,
+-- for the initial load and repairs
+CREATE PROCEDURE rebuild_prstock_totals ()
+BEGIN
+    START TRANSACTION;
+
+    DELETE FROM PRSTOCK_TOTALS;
+
+    INSERT INTO PRSTOCK_TOTALS (ITEC, PUR_QTY)
+    SELECT ITEC, COALESCE(SUM(QTY), 0)
+    FROM PRPURDET
+    WHERE ITEC IS NOT NULL
+    GROUP BY ITEC;
+
+    INSERT INTO PRSTOCK_TOTALS (ITEC, SOLD_QTY)
+    SELECT ITEC, COALESCE(SUM(QTY), 0)
+    FROM PRSALDET
+    WHERE ITEC IS NOT NULL
+    GROUP BY ITEC
+    ON DUPLICATE KEY UPDATE
+        SOLD_QTY = SOLD_QTY + VALUES(SOLD_QTY);
+
+    COMMIT;
+END $$
+
+DROP TRIGGER IF EXISTS prstock_purchase_insert $$
+DROP TRIGGER IF EXISTS prstock_purchase_update $$
+DROP TRIGGER IF EXISTS prstock_purchase_delete $$
+DROP TRIGGER IF EXISTS prstock_sale_insert $$
+DROP TRIGGER IF EXISTS prstock_sale_update $$
+DROP TRIGGER IF EXISTS prstock_sale_delete $$
+
+CREATE TRIGGER prstock_purchase_insert AFTER INSERT ON PRPURDET
+FOR EACH ROW
+BEGIN
+    CALL prstock_totals_apply(NEW.ITEC, NEW.QTY, 0);
+END $$
+
+CREATE TRIGGER prstock_purchase_update AFTER UPDATE ON PRPURDET
+FOR EACH ROW
+BEGIN
+    CALL prstock_totals_apply(OLD.ITEC, -OLD.QTY, 0);
+    CALL prstock_totals_apply(NEW.ITEC, NEW.QTY, 0);
+END $$
+
+CREATE TRIGGER prstock_purchase_delete AFTER DELETE ON PRPURDET
+FOR EACH ROW
+BEGIN
+    CALL prstock_totals_apply(OLD.ITEC, -OLD.QTY, 0);
+END $$
+
+CREATE TRIGGER prstock_sale_insert AFTER INSERT ON PRSALDET
+FOR EACH ROW
+BEGIN
+    CALL prstock_totals_apply(NEW.ITEC, 0, NEW.QTY);
+END $$
+
+CREATE TRIGGER prstock_sale_update AFTER UPDATE ON PRSALDET
+FOR EACH ROW
+BEGIN
+    CALL prstock_totals_apply(OLD.ITEC, 0, -OLD.QTY);
+    CALL prstock_totals_apply(NEW.ITEC, 0, NEW.QTY);
+END $$
+
+CREATE TRIGGER prstock_sale_delete AFTER DELETE ON PRSALDET
+FOR EACH ROW
+BEGIN
+    CALL prstock_totals_apply(OLD.ITEC, 0, -OLD.QTY);
+END $$
+
+DELIMITER ;
+
+-- Initial load of the purchase and sale history
+CALL rebuild_prstock_totals();
+
+-- Step 2d: Per-day change counter of the sales tables
+-- Every SALTOT/SALDET insert, update or delete bumps the row of the day it
+-- touches (both days when a row moves). The sales endpoints build their
+-- ETags from it with one primary key lookup instead of reading the day's
+-- bills. changed_at tells a counter that restarted after the table was
+-- recreated from the one clients saw before. Writers of the same day
+-- serialize on its row until they commit, as DAYBUK writers do on
+-- ROLLUP_VERSION.
+CREATE TABLE IF NOT EXISTS SALES_DAY_VERSION (
+    DATE DATE NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+);
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS bump_sales_day_version $$
+
+CREATE PROCEDURE bump_sales_day_version (IN p_date DATE)
+BEGIN
+    IF p_date IS NOT NULL THEN
+        INSERT INTO SALES_DAY_VERSION (DATE, version, changed_at)
+        VALUES (p_date, 1, CURRENT_TIMESTAMP(6))
+        ON DUPLICATE KEY UPDATE
+            version = version + 1,
+            changed_at = CURRENT_TIMESTAMP(6);
+    END IF;
+END $$
+
+DROP TRIGGER IF EXISTS sales_day_saltot_insert $$
+DROP TRIGGER IF EXISTS sales_day_saltot_update $$
+DROP TRIGGER IF EXISTS sales_day_saltot_delete $$
+DROP TRIGGER IF EXISTS sales_day_saldet_insert $$
+DROP TRIGGER IF EXISTS sales_day_saldet_update $$
+DROP TRIGGER IF EXISTS sales_day_saldet_delete $$
+
+CREATE TRIGGER sales_day_saltot_insert AFTER INSERT ON SALTOT
+FOR EACH ROW
+BEGIN
+    CALL bump_sales_day_version(NEW.DATE);
+END $$
+
+CREATE TRIGGER sales_day_saltot_update AFTER UPDATE ON SALTOT
+FOR EACH ROW
+BEGIN
+    CALL bump_sales_day_version(OLD.DATE);
+    IF NOT (NEW.DATE <=> OLD.DATE) THEN
+        CALL bump_sales_day_version(NEW.DATE);
+    END IF;
+END $$
+
+CREATE TRIGGER sales_day_saltot_delete AFTER DELETE ON SALTOT
+FOR EACH ROW
+BEGIN
+    CALL bump_sales_day_version(OLD.DATE);
+END $$
+
+CREATE TRIGGER sales_day_saldet_insert AFTER INSERT ON SALDET
+FOR EACH ROW
+BEGIN
+    CALL bump_sales_day_version(NEW.DATE);
+END $$
+
+CREATE TRIGGER sales_day_saldet_update AFTER UPDATE ON SALDET
+FOR EACH ROW
+BEGIN
+    CALL bump_sales_day_version(OLD.DATE);
+    IF NOT (NEW.DATE <=> OLD.DATE) THEN
+        CALL bump_sales_day_version(NEW.DATE);
+    END IF;
+END $$
+
+CREATE TRIGGER sales_day_saldet_delete AFTER DELETE ON SALDET
+FOR EACH ROW
+BEGIN
+    CALL bump_sales_day_version(OLD.DATE);
+END $$
+
+DELIMITER ;
+
 -- Step 3: Create stored procedure for trial balance calculation
 
 DELIMITER $$
@@ -108,7 +508,8 @@ CREATE PROCEDURE get_trial_balance_shop (
     IN p_scgrpcod VARCHAR(5),
     IN p_sdgrpcod VARCHAR(5),
     IN p_start_date DATE,
-    IN p_end_date DATE
+    IN p_end_date DATE,
+    IN p_salary_balance DECIMAL(15,2)
 )
 BEGIN
     DECLARE v_salary_balance DECIMAL(15,2) DEFAULT 0;
@@ -130,13 +531,13 @@ BEGIN
     DECLARE v_mfdate DATE;
     DECLARE v_msdate1 DATE;
     DECLARE v_msdate2 DATE;
-    DECLARE v_workdays INT DEFAULT 0;
-    DECLARE v_loop_date DATE;
-    DECLARE v_cday VARCHAR(10);
 
     /* ===============================
        SALARY BALANCE (SUN01)
+       Computed by the API (payroll.py) so this procedure stays read-only
+       and safe to run concurrently
        =============================== */
+    SET v_salary_balance = COALESCE(p_salary_balance, 0);
     SET v_today = CURDATE();
 
     IF MONTH(v_today) = 1 THEN
@@ -156,25 +557,6 @@ BEGIN
         );
     END IF;
 
-    SET v_loop_date = v_mfdate;
-
-    TRUNCATE TABLE PAYDATMAS;
-
-    WHILE v_loop_date <= v_today DO
-        SET v_cday = UPPER(LEFT(DAYNAME(v_loop_date), 3));
-
-        INSERT INTO PAYDATMAS (`date`, `cday`, `sel`, `deleted`)
-        VALUES (
-            v_loop_date,
-            v_cday,
-            IF(v_cday = 'SUN', 'S', ''),
-            ''
-        );
-
-        SET v_loop_date = DATE_ADD(v_loop_date, INTERVAL 1 DAY);
-    END WHILE;
-
-
     SET v_msdate1 = v_mfdate;
 
     IF MONTH(v_mfdate) = 1 THEN
@@ -199,43 +581,6 @@ BEGIN
         );
     END IF;
 
-    SET v_workdays = DATEDIFF(v_today, v_mfdate);
-
-    SELECT
-    COALESCE(
-        SUM(
-            CEILING((ps.salary / 26) * v_workdays)
-          - CEILING((ps.salary / 26) * COALESCE(att.total_days, 0))
-        ),
-        0
-    ) INTO v_salary_balance
-    FROM PAYSTAFFMAS ps
-    LEFT JOIN (
-        SELECT
-            cuscod,
-            SUM(day_value) AS total_days
-        FROM (
-            SELECT
-                pa.cuscod,
-                pa.date,
-                MAX(
-                    CASE
-                        WHEN pa.ldays = 'F' THEN 1
-                        WHEN pa.ldays IN ('P','A') THEN 0.5
-                        ELSE 0
-                    END
-                ) AS day_value
-            FROM PAYATTEND pa
-            JOIN PAYDATMAS pd
-                ON pa.date = pd.date
-            WHERE pd.sel <> 'S'
-            GROUP BY pa.cuscod, pa.date
-        ) x
-        GROUP BY cuscod
-    ) att ON att.cuscod = ps.cuscod
-    WHERE ps.custyp = 'S'
-    AND (ps.dor = '0000-00-00' OR ps.dor IS NULL);
-
     /* ===============================
        SUPPLIERS
        =============================== */
@@ -243,7 +588,7 @@ BEGIN
         CASE WHEN DBCR='C' THEN TRNAMT ELSE -TRNAMT END
     ),0)
     INTO v_supplier_balance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE GRPCOD=p_scgrpcod
       AND TRNDAT>=p_start_date;
 
@@ -254,7 +599,7 @@ BEGIN
         CASE WHEN DBCR='D' THEN TRNAMT ELSE -TRNAMT END
     ),0)
     INTO v_customer_balance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE GRPCOD=p_sdgrpcod
       AND TRNDAT>=p_start_date;
 
@@ -263,20 +608,20 @@ BEGIN
        =============================== */
     SELECT COALESCE(SUM(CASE WHEN DBCR='D' THEN TRNAMT ELSE -TRNAMT END),0)
     INTO v_arul_cash_balance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE CUSCOD='CAS01' AND ABC3='GHE01'
       AND TRNTYP NOT IN ('4','5')
       AND TRNDAT BETWEEN p_start_date AND p_end_date;
 
     SELECT COALESCE(SUM(CASE WHEN DBCR='D' THEN TRNAMT ELSE -TRNAMT END),0)
     INTO v_gheeta_cash_balance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE CUSCOD='CAS01' AND ABC3='PRO01'
       AND TRNDAT BETWEEN p_start_date AND p_end_date;
 
     SELECT COALESCE(SUM(CASE WHEN DBCR='D' THEN TRNAMT ELSE -TRNAMT END),0)
     INTO v_vijay_cash_balance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE CUSCOD='CAS01' AND ABC3='ACC01'
       AND TRNDAT BETWEEN p_start_date AND p_end_date;
 
@@ -286,13 +631,13 @@ BEGIN
     SELECT COALESCE(SUM(
         CASE
             WHEN JRT3='2' AND DBCR='D' THEN TRNAMT
-            WHEN (JRT3='4' OR (TRNTYP='3' AND JRT='3' AND TRNDET LIKE '%MAIN ADVANCE DUE CREDIT'))
+            WHEN (JRT3='4' OR (TRNTYP='3' AND JRT='3' AND MAIN_ADV_CR = 1))
                  AND DBCR='C' THEN -TRNAMT
             ELSE 0
         END
     ),0)
     INTO v_main_advance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE TRNDAT >= p_start_date;
 
 
@@ -311,7 +656,7 @@ BEGIN
             0
         )
     INTO v_salary_advance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE TRNDAT BETWEEN v_msdate1 AND v_msdate2;
 
     -- ====================================
@@ -325,35 +670,11 @@ BEGIN
 
     /* ===============================
        PRODUCTION STOCK
+       Trigger-maintained totals, see PRSTOCK_CLOSING
        =============================== */
-    SELECT
-        COALESCE(
-            SUM(
-                (
-                COALESCE(st.OQTY,0)
-                + COALESCE(pu.PUR_QTY,0)
-                - COALESCE(sa.SALE_QTY,0)
-                ) * ia.RATE
-            ),
-            0
-        )
+    SELECT COALESCE(SUM(STOCK_VALUE), 0)
     INTO v_prod_closing_stock
-    FROM PRITEMAS ia
-    LEFT JOIN PRSTKMAS st ON st.ITEC = ia.ITEC
-    LEFT JOIN (
-        SELECT ITEC, SUM(QTY) AS PUR_QTY
-        FROM PRPURDET
-        GROUP BY ITEC
-    ) pu ON pu.ITEC = ia.ITEC
-    LEFT JOIN (
-        SELECT
-            ps.ITEC,
-            SUM(sd.QTY * ps.QTY) AS SALE_QTY
-        FROM PRPACKSTRU ps
-        JOIN PRSALDET sd
-            ON sd.ITEC = ps.PITEC
-        GROUP BY ps.ITEC
-    ) sa ON sa.ITEC = ia.ITEC;
+    FROM PRSTOCK_CLOSING;
 
     /* ===============================
        BANK TOTALS
@@ -366,7 +687,7 @@ BEGIN
     ),0)
     INTO v_bank_liability_total
     FROM PRCUSMAS p
-    JOIN DAYBUK d ON d.CUSCOD = p.CUSCOD
+    JOIN DAYBUK_DAILY d ON d.CUSCOD = p.CUSCOD
     WHERE p.GRPCOD='CAS02'
     AND p.TPLCOD='L'
     AND d.TRNDAT BETWEEN p_start_date AND p_end_date;
@@ -379,7 +700,7 @@ BEGIN
     ),0)
     INTO v_bank_asset_total
     FROM PRCUSMAS p
-    JOIN DAYBUK d ON d.CUSCOD = p.CUSCOD
+    JOIN DAYBUK_DAILY d ON d.CUSCOD = p.CUSCOD
     WHERE p.GRPCOD='CAS02'
     AND p.TPLCOD='A'
     AND d.TRNDAT BETWEEN p_start_date AND p_end_date;
@@ -428,7 +749,7 @@ BEGIN
         ) AS amount,
         'LIABILITY' AS type
     FROM PRCUSMAS p
-    LEFT JOIN DAYBUK d
+    LEFT JOIN DAYBUK_DAILY d
         ON d.CUSCOD = p.CUSCOD
     AND d.TRNDAT BETWEEN p_start_date AND p_end_date
     WHERE p.GRPCOD = 'CAS02' AND p.TPLCOD = 'L'
@@ -469,7 +790,7 @@ BEGIN
         ) AS amount,
         'ASSET' AS type
     FROM PRCUSMAS p
-    LEFT JOIN DAYBUK d
+    LEFT JOIN DAYBUK_DAILY d
         ON d.CUSCOD = p.CUSCOD
     AND d.TRNDAT BETWEEN p_start_date AND p_end_date
     WHERE p.GRPCOD = 'CAS02' AND p.TPLCOD = 'A'
@@ -522,7 +843,7 @@ BEGIN
     SELECT
         COALESCE(SUM(CASE WHEN DBCR = 'D' THEN TRNAMT ELSE -TRNAMT END), 0)
     INTO v_customer_balance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE comp = p_company_code
       AND GRPCOD = p_sdgrpcod
       AND TRNDAT BETWEEN p_start_date AND p_end_date;
@@ -538,7 +859,7 @@ BEGIN
             END
         ), 0)
     INTO v_petty_cash
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE CUSCOD = 'CAS01'
       AND ABC3 = p_company_code
       AND TRNDAT BETWEEN p_start_date AND p_end_date;
@@ -554,7 +875,7 @@ BEGIN
             END
         ), 0)
     INTO v_vijay_cash
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE ABC3 = 'ACC01'
       AND comp = p_company_code
       AND TRNDAT BETWEEN p_start_date AND p_end_date;
@@ -565,7 +886,7 @@ BEGIN
     SELECT
         COALESCE(SUM(CASE WHEN DBCR='D' THEN TRNAMT ELSE -TRNAMT END), 0)
     INTO v_vijay_shop_cash
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE GRPCOD = 'SUN09'
       AND comp = p_company_code
       AND TRNDAT BETWEEN p_start_date AND p_end_date;
@@ -585,7 +906,7 @@ BEGIN
     SELECT
         COALESCE(SUM(CASE WHEN DBCR='D' THEN TRNAMT ELSE -TRNAMT END), 0)
     INTO v_supplier_balance
-    FROM DAYBUK
+    FROM DAYBUK_DAILY
     WHERE comp = p_company_code
       AND GRPCOD = p_scgrpcod
       AND TRNDAT >=p_start_date;
@@ -652,35 +973,38 @@ CREATE PROCEDURE get_customer_sales_details (
     IN p_date DATE
 )
 BEGIN
+    DECLARE v_date DATE DEFAULT COALESCE(p_date, CURDATE());
+
+    -- Profit/loss of every bill of the day in one grouped pass over SALDET
+    -- instead of two correlated subqueries per SALTOT row
+    -- Customer name/address/phone are filled in by the API from its CUSMAS
+    -- cache, only the code is returned
     SELECT
+        s.SNO_ID,
         s.DATE,
         s.BILLNO,
         s.SNO,
         s.CUSCOD,
         s.TQTY,
-        c.CUSNAM,
-        c.ADRONE,
-        c.ADRTWO,
-        c.PHONE,
         s.NET,
-        COALESCE(
-            (SELECT SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) > 0
-                         THEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE)
-                         ELSE 0 END)
-             FROM SALDET d
-             WHERE d.BILLNO = s.BILLNO AND d.DATE = s.DATE), 0
-        ) AS TOTAL_PROFIT,
-        COALESCE(
-            (SELECT SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) < 0
-                         THEN ABS((d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE))
-                         ELSE 0 END)
-             FROM SALDET d
-             WHERE d.BILLNO = s.BILLNO AND d.DATE = s.DATE), 0
-        ) AS TOTAL_LOSS
+        COALESCE(pl.TOTAL_PROFIT, 0) AS TOTAL_PROFIT,
+        COALESCE(pl.TOTAL_LOSS, 0) AS TOTAL_LOSS
     FROM SALTOT s
-    LEFT JOIN CUSMAS c
-        ON c.CUSCOD = s.CUSCOD
-    WHERE s.DATE = COALESCE(p_date, CURDATE())
+    LEFT JOIN (
+        SELECT
+            d.BILLNO,
+            SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) > 0
+                     THEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE)
+                     ELSE 0 END) AS TOTAL_PROFIT,
+            SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) < 0
+                     THEN ABS((d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE))
+                     ELSE 0 END) AS TOTAL_LOSS
+        FROM SALDET d
+        WHERE d.DATE = v_date
+        GROUP BY d.BILLNO
+    ) pl
+        ON pl.BILLNO = s.BILLNO
+    WHERE s.DATE = v_date
     ORDER BY s.SNO_ID DESC;
 END $$
 
@@ -688,6 +1012,94 @@ DELIMITER ;
 
 CALL get_customer_sales_details();
 
+-- Step 5b: Keyset-paginated variant of get_customer_sales_details
+-- Without p_since: at most p_limit bills with SNO_ID below p_after (NULL
+-- for the first page), newest first.
+-- With p_since (delta polling): at most p_limit bills with SNO_ID above
+-- p_since, oldest first, so the last SNO_ID returned is the next p_since
+-- and no new bill is skipped however many arrived. p_after is ignored.
+-- Only the page's SALDET lines are aggregated.
+-- Customer details come from the API's CUSMAS cache.
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS get_customer_sales_page $$
+
+CREATE PROCEDURE get_customer_sales_page (
+    IN p_date DATE,
+    IN p_after BIGINT,
+    IN p_limit INT,
+    IN p_since BIGINT
+)
+BEGIN
+    DECLARE v_date DATE DEFAULT COALESCE(p_date, CURDATE());
+
+    IF p_since IS NULL THEN
+        SELECT
+            s.SNO_ID,
+            s.DATE,
+            s.BILLNO,
+            s.SNO,
+            s.CUSCOD,
+            s.TQTY,
+            s.NET,
+            COALESCE(SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) > 0
+                              THEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE)
+                              ELSE 0 END), 0) AS TOTAL_PROFIT,
+            COALESCE(SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) < 0
+                              THEN ABS((d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE))
+                              ELSE 0 END), 0) AS TOTAL_LOSS
+        FROM (
+            SELECT SNO_ID, DATE, BILLNO, SNO, CUSCOD, TQTY, NET
+            FROM SALTOT
+            WHERE DATE = v_date
+              AND (p_after IS NULL OR SNO_ID < p_after)
+            ORDER BY SNO_ID DESC
+            LIMIT p_limit
+        ) s
+        LEFT JOIN SALDET d
+            ON d.BILLNO = s.BILLNO
+           AND d.DATE = s.DATE
+        GROUP BY
+            s.SNO_ID, s.DATE, s.BILLNO, s.SNO, s.CUSCOD, s.TQTY, s.NET
+        ORDER BY s.SNO_ID DESC;
+    ELSE
+        SELECT
+            s.SNO_ID,
+            s.DATE,
+            s.BILLNO,
+            s.SNO,
+            s.CUSCOD,
+            s.TQTY,
+            s.NET,
+            COALESCE(SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) > 0
+                              THEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE)
+                              ELSE 0 END), 0) AS TOTAL_PROFIT,
+            COALESCE(SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) < 0
+                              THEN ABS((d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE))
+                              ELSE 0 END), 0) AS TOTAL_LOSS
+        FROM (
+            SELECT SNO_ID, DATE, BILLNO, SNO, CUSCOD, TQTY, NET
+            FROM SALTOT
+            WHERE DATE = v_date
+              AND SNO_ID > p_since
+            ORDER BY SNO_ID ASC
+            LIMIT p_limit
+        ) s
+        LEFT JOIN SALDET d
+            ON d.BILLNO = s.BILLNO
+           AND d.DATE = s.DATE
+        GROUP BY
+            s.SNO_ID, s.DATE, s.BILLNO, s.SNO, s.CUSCOD, s.TQTY, s.NET
+        ORDER BY s.SNO_ID ASC;
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- CALL get_customer_sales_page('2026-01-01', NULL, 100, NULL);
+-- CALL get_customer_sales_page('2026-01-01', NULL, 100, 12345);
+
 -- Step 6: Create stored procedure for customer detials & item details of current day sales details
 
 DELIMITER $$
@@ -700,26 +1112,15 @@ CREATE PROCEDURE get_customer_sales_full_details (
     IN p_cuscod VARCHAR(5)
 )
 BEGIN
+    -- Customer, salesman and manager (BHA01) details are filled in by the
+    -- API from its CUSMAS/SALMANMAS cache, only the codes are returned
     SELECT
         -- Bill header
         t.DATE,
         t.BILLNO,
         t.SNO,
         t.CUSCOD,
-
-        -- Customer
-        c.CUSNAM,
-        c.ADRONE,
-        c.ADRTWO,
-        c.PHONE,
-
-        -- Salesman (actual bill salesman)
-        sm.SALMANNAM,
-        sm.SALMANPHON,
-
-        -- Manager (fixed – always ARUL via code)
-        mgr.SALMANNAM     AS MANAGERNAME,
-        mgr.SALMANPHON    AS MANAGERPHON,
+        t.SMANCOD,
 
         -- Item details
         d.NAME,
@@ -734,22 +1135,6 @@ BEGIN
         t.NET
     FROM SALTOT t
 
-    -- Customer
-    LEFT JOIN CUSMAS c
-        ON c.CUSCOD = t.CUSCOD
-
-    -- Salesman
-    LEFT JOIN SALMANMAS sm
-        ON sm.SALMANCOD = t.SMANCOD
-
-    -- Manager (fixed code) - Use CROSS JOIN with LIMIT 1 to avoid cartesian product
-    LEFT JOIN (
-        SELECT SALMANNAM, SALMANPHON
-        FROM SALMANMAS
-        WHERE SALMANCOD = 'BHA01'
-        LIMIT 1
-    ) mgr ON 1=1
-
     -- Items
     JOIN SALDET d
         ON d.DATE   = t.DATE
@@ -800,6 +1185,43 @@ DELIMITER ;
 
 -- CALL get_profit_loss();
 
+-- Step 7b: Per-day profit and loss over a date range
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS get_profit_loss_range $$
+
+CREATE PROCEDURE get_profit_loss_range (
+    IN p_start DATE,
+    IN p_end DATE
+)
+BEGIN
+    SELECT
+        `DATE` AS day,
+        SUM(
+            CASE
+                WHEN RATE > PRCOSTRATE
+                THEN (COALESCE(RATE,0) - COALESCE(PRCOSTRATE,0)) * COALESCE(QTY,0)
+                ELSE 0
+            END
+        ) AS total_profit,
+
+        SUM(
+            CASE
+                WHEN RATE < PRCOSTRATE
+                THEN (COALESCE(PRCOSTRATE,0) - COALESCE(RATE,0)) * COALESCE(QTY,0)
+                ELSE 0
+            END
+        ) AS total_loss
+    FROM SALDET
+    WHERE `DATE` BETWEEN p_start AND p_end
+    GROUP BY `DATE`
+    ORDER BY `DATE`;
+END $$
+
+DELIMITER ;
+
+-- CALL get_profit_loss_range('2026-01-01', '2026-01-31');
+
 -- SHOW CURRENT DATE OF IST;
 SELECT DATE(
     CONVERT_TZ(NOW(), @@session.time_zone, '+05:30')
@@ -0,0 +1,45 @@
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from config import settings
+from request_timing import phase
+
+
+def _default(value):
+    # DECIMAL columns straight from the driver
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """orjson encoding, dates and datetimes as ISO strings like FastAPI's"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        with phase("encode") as span:
+            body = dumps(content)
+            if isinstance(content, list):
+                span.rows = len(content)
+        return body
+
+
+def fast_response(content: Any, response: Response):
+    """
+    Return content without FastAPI's response_model pass.
+
+    Rows built by the server itself do not need to be validated again and
+    re-encoded by jsonable_encoder, the route's response_model still
+    documents the shape in OpenAPI. Headers already set on the injected
+    response are carried over. With FAST_JSON off the content is returned
+    as is and goes through the usual validation.
+    """
+    if not settings.FAST_JSON:
+        return content
+    return FastJSONResponse(content, headers=dict(response.headers))
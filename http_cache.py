@@ -0,0 +1,28 @@
+import hashlib
+from fastapi import Request, Response
+
+# Responses may be stored by the client but must be revalidated every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(watermark: str) -> str:
+    """
+    Weak ETag for a string that changes whenever the response would. Weak
+    because the same entity may be sent gzip, brotli or identity encoded,
+    so 200s and 304s carry the same validator however they are encoded.
+    """
+    return 'W/"' + hashlib.sha256(watermark.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match names etag, weak validators included"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
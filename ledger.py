@@ -0,0 +1,200 @@
+import time
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List
+from request_timing import record
+
+
+def _money(value) -> Decimal:
+    # The procedures hold every bucket in a DECIMAL(15,2) variable
+    return Decimal(value or 0).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _case(column: str, values: Dict[str, object]):
+    """
+    SQL CASE mapping column, compared as MySQL would, to a value per
+    company code, with its parameters. The values are literals, so they
+    take the column's collation when compared with other columns as well.
+    """
+    sql = f"CASE {column}" + " WHEN %s THEN %s" * len(values) + " END"
+    return sql, [param for item in values.items() for param in item]
+
+
+# The category predicates of get_trial_balance_shop_store, evaluated by
+# MySQL so codes compare under the columns' collation as in the procedure.
+# {comp}, {sdgrpcod} and {scgrpcod} map comp to the requested code and its
+# FIRMASN group codes. Petty cash (CAS01) is keyed by ABC3 rather than
+# comp, hence its own branch.
+LEDGER_QUERY = """
+    SELECT
+        {comp} AS FIRCOD,
+        SUM(CASE WHEN d.GRPCOD = {sdgrpcod} AND d.TRNDAT <= %s
+                 THEN CASE WHEN d.DBCR = 'D' THEN d.TRNAMT ELSE -d.TRNAMT END END) AS customer,
+        0 AS petty_cash,
+        SUM(CASE WHEN d.ABC3 = 'ACC01' AND d.TRNDAT <= %s
+                 THEN CASE
+                     WHEN d.DBCR = 'D' AND (d.TRNTYP = '1' OR (d.TRNTYP = '3' AND d.JRT = '1')) THEN d.TRNAMT
+                     WHEN d.DBCR = 'C' AND (d.TRNTYP = '2' OR (d.TRNTYP = '3' AND d.JRT = '2')) THEN -d.TRNAMT
+                 END END) AS vijay_cash,
+        SUM(CASE WHEN d.GRPCOD = 'SUN09' AND d.TRNDAT <= %s
+                 THEN CASE WHEN d.DBCR = 'D' THEN d.TRNAMT ELSE -d.TRNAMT END END) AS vijay_shop_cash,
+        -- SUPPLIER BALANCE (SUN10) has no end date
+        SUM(CASE WHEN d.GRPCOD = {scgrpcod}
+                 THEN CASE WHEN d.DBCR = 'D' THEN d.TRNAMT ELSE -d.TRNAMT END END) AS supplier,
+        COUNT(*) AS row_count
+    FROM DAYBUK_DAILY d
+    WHERE d.comp IN ({placeholders})
+      AND d.TRNDAT >= %s
+    GROUP BY 1
+
+    UNION ALL
+
+    SELECT
+        {abc3},
+        0,
+        SUM(CASE
+            WHEN d.DBCR = 'D' AND d.TRNTYP IN ('1', '5') THEN d.TRNAMT
+            WHEN d.DBCR = 'C' AND d.TRNTYP IN ('2', '5') THEN -d.TRNAMT
+        END),
+        0, 0, 0,
+        COUNT(*)
+    FROM DAYBUK_DAILY d
+    WHERE d.CUSCOD = 'CAS01'
+      AND d.ABC3 IN ({placeholders})
+      AND d.TRNDAT BETWEEN %s AND %s
+    GROUP BY 1
+"""
+
+BUCKETS = ("customer", "petty_cash", "vijay_cash", "vijay_shop_cash", "supplier")
+
+
+def _fetch_by_company(cursor, query: str, column: str, codes: List[str], params=()) -> Dict[str, Decimal]:
+    # FIRCOD as requested, matched the way the procedure's FIRCOD = p_company_code does
+    firm, firm_params = _case(column, {code: code for code in codes})
+    placeholders = ", ".join(["%s"] * len(codes))
+    cursor.execute(
+        query.format(firm=firm, placeholders=placeholders),
+        (*firm_params, *codes, *params),
+    )
+    return {row["FIRCOD"]: row["amount"] for row in cursor.fetchall()}
+
+
+def store_trial_balance_results(
+    conn,
+    companies: Dict[str, dict],
+    start_date: date,
+    end_date: date
+) -> Dict[str, List[dict]]:
+    """
+    Batch equivalent of get_trial_balance_shop_store for many companies.
+
+    companies maps FIRCOD to its FIRMASN row (SCGRPCOD/SDGRPCOD). DAYBUK_DAILY
+    is read once for all of them with the procedure's category predicates
+    as SUM(CASE ...) grouped by company. Returns the procedure's (category,
+    amount, type) result set for every company.
+    """
+    codes = list(companies)
+    if not codes:
+        return {}
+
+    placeholders = ", ".join(["%s"] * len(codes))
+    comp, comp_params = _case("d.comp", {code: code for code in codes})
+    abc3, abc3_params = _case("d.ABC3", {code: code for code in codes})
+    # Missing group codes are passed as '' like the per-company procedure call
+    sdgrpcod, sdgrpcod_params = _case(
+        "d.comp", {code: companies[code]["SDGRPCOD"] or "" for code in codes}
+    )
+    scgrpcod, scgrpcod_params = _case(
+        "d.comp", {code: companies[code]["SCGRPCOD"] or "" for code in codes}
+    )
+    buckets = {code: {name: Decimal("0") for name in BUCKETS} for code in codes}
+
+    started = time.perf_counter()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(
+            LEDGER_QUERY.format(
+                comp=comp, sdgrpcod=sdgrpcod, scgrpcod=scgrpcod, abc3=abc3, placeholders=placeholders
+            ),
+            (
+                *comp_params,
+                *sdgrpcod_params, end_date,
+                end_date,
+                end_date,
+                *scgrpcod_params,
+                *codes, start_date,
+                *abc3_params,
+                *codes, start_date, end_date,
+            ),
+        )
+        ledger_rows = cursor.fetchall()
+
+        stock_values = _fetch_by_company(
+            cursor,
+            """
+            SELECT {firm} AS FIRCOD, SUM((QTY * PURRATE) + ((QTY * PURRATE) * (TAX / 100))) AS amount
+            FROM SHOPSTKGODOWN
+            WHERE FIRCOD IN ({placeholders})
+            GROUP BY 1
+            """,
+            "FIRCOD",
+            codes,
+        )
+
+        investments = _fetch_by_company(
+            cursor,
+            """
+            SELECT {firm} AS FIRCOD, SUM(AMT) AS amount
+            FROM SHOPINVESTMENT
+            WHERE FIRCOD IN ({placeholders})
+              AND DATE BETWEEN %s AND %s
+            GROUP BY 1
+            """,
+            "FIRCOD",
+            codes,
+            (start_date, end_date),
+        )
+    finally:
+        cursor.close()
+
+    record(
+        "ledger_batch",
+        time.perf_counter() - started,
+        rows=sum(int(row["row_count"]) for row in ledger_rows),
+    )
+
+    for row in ledger_rows:
+        company = buckets[row["FIRCOD"]]
+        for name in BUCKETS:
+            company[name] += Decimal(row[name] or 0)
+
+    results = {}
+    for code in codes:
+        bucket = {name: _money(value) for name, value in buckets[code].items()}
+        stock_value = _money(stock_values.get(code))
+        investment = _money(investments.get(code))
+
+        gross_total = (
+            bucket["customer"]
+            + bucket["petty_cash"]
+            + bucket["vijay_cash"]
+            + bucket["vijay_shop_cash"]
+            + stock_value
+            + bucket["supplier"]
+        )
+        net_profit = gross_total - investment
+
+        results[code] = [
+            {"category": "CUSTOMER BALANCE", "amount": bucket["customer"], "type": "ASSET"},
+            {"category": "PETTY CASH AT SHOP", "amount": bucket["petty_cash"], "type": "ASSET"},
+            {"category": "VIJAY CASH BALANCE", "amount": bucket["vijay_cash"], "type": "ASSET"},
+            {"category": "VIJAY SHOP CASH IN HAND", "amount": bucket["vijay_shop_cash"], "type": "ASSET"},
+            {"category": "CURRENT STOCK VALUE", "amount": stock_value, "type": "ASSET"},
+            {"category": "SUPPLIER BALANCE", "amount": bucket["supplier"], "type": "LIABILITY"},
+            {"category": "GROSS TOTAL", "amount": gross_total, "type": "ASSET"},
+            {"category": "INVESTMENT", "amount": investment, "type": "LIABILITY"},
+            {"category": "NET TOTAL", "amount": net_profit, "type": "LIABILITY"},
+        ]
+
+    return results
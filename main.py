@@ -1,5 +1,11 @@
+import base64
 from fastapi import FastAPI, Request, Response
-from routers import auth, companies, trial_balance_store, trial_balance, logout, sales_details
+from fastapi.responses import StreamingResponse
+from config import settings
+from metrics import http_request_seconds
+from request_timing import phase, start_request
+from compression import Compressor, choose_encoding, compress, is_compressible
+from routers import auth, companies, trial_balance_store, trial_balance, logout, sales_details, stock, export, monitoring, admin
 from mangum import Mangum
 
 app = FastAPI(
@@ -8,7 +14,84 @@ app = FastAPI(
     version="1.0.0"
 )
 
-handler = Mangum(app, lifespan="off")
+mangum_handler = Mangum(app, lifespan="off")
+
+
+def handler(event, context):
+    response = mangum_handler(event, context)
+
+    # Mangum only base64-encodes bodies that fail to decode as UTF-8, a
+    # compressed body that happens to decode must still go out as binary
+    headers = {**(response.get("multiValueHeaders") or {}), **(response.get("headers") or {})}
+    if headers.get("content-encoding") and response.get("body") and not response.get("isBase64Encoded"):
+        response["body"] = base64.b64encode(response["body"].encode()).decode()
+        response["isBase64Encoded"] = True
+
+    return response
+
+# Registered before security_headers_middleware so it runs inside it, and
+# the time spent compressing shows up in Server-Timing
+@app.middleware("http")
+async def compression_middleware(
+    request: Request,
+    call_next
+):
+    response: Response = await call_next(request)
+
+    if response.status_code == 304 or is_compressible(response.headers.get("content-type", "")):
+        # The body depends on Accept-Encoding whether or not this one is compressed
+        response.headers["Vary"] = "Accept-Encoding"
+
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    content_length = response.headers.get("content-length")
+    if (
+        encoding is None
+        or response.status_code in (204, 304)
+        or "content-encoding" in response.headers
+        or not is_compressible(response.headers.get("content-type", ""))
+        or (content_length is not None and int(content_length) < settings.COMPRESSION_MIN_SIZE)
+    ):
+        return response
+
+    # ETags are already weak (make_etag), so they stay valid for the
+    # compressed bytes and match the 304s sent for the same entity
+    raw_headers = [
+        (name, value) for name, value in response.headers.raw
+        if name != b"content-length"
+    ] + [(b"content-encoding", encoding.encode())]
+
+    # Streams (NDJSON) are compressed chunk by chunk as they are produced,
+    # after the headers are sent, so this time is not in Server-Timing
+    if content_length is None:
+        compressor = Compressor(encoding)
+
+        async def compressed_stream():
+            async for chunk in response.body_iterator:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.finish()
+
+        streamed = StreamingResponse(compressed_stream(), status_code=response.status_code)
+        streamed.raw_headers = raw_headers
+        return streamed
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    with phase("compress"):
+        compressed = compress(body, encoding)
+
+    if len(compressed) >= len(body):
+        # Nothing gained, send the body as it was
+        uncompressed = Response(body, status_code=response.status_code)
+        uncompressed.raw_headers = response.headers.raw
+        return uncompressed
+
+    compressed_response = Response(compressed, status_code=response.status_code)
+    compressed_response.raw_headers = raw_headers + [
+        (b"content-length", str(len(compressed)).encode())
+    ]
+    return compressed_response
+
 
 # CORS middleware
 @app.middleware("http")
@@ -16,21 +99,40 @@ async def security_headers_middleware(
     request: Request,
     call_next
 ):
+    timings = start_request()
     response: Response = await call_next(request)
 
     response.headers["X-Content-Type-Options"] = "nosniff"
     response.headers["X-Frame-Options"] = "DENY"
     response.headers["Referrer-Policy"] = "no-referrer"
 
+    # Where the time went: pool waits, auth, procedures, mapping, encoding
+    response.headers["Server-Timing"] = timings.server_timing()
+    timings.log(request.method, request.url.path, response.status_code)
+
+    # Labelled by route template, not the raw path with its parameters
+    route = request.scope.get("route")
+    http_request_seconds.observe(
+        timings.elapsed(),
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=response.status_code,
+    )
+
     return response
 
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(companies.router)
 app.include_router(trial_balance.router)
 app.include_router(trial_balance_store.router)
 app.include_router(sales_details.router)
+app.include_router(stock.router)
+app.include_router(export.router)
 app.include_router(logout.router)
+app.include_router(monitoring.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def root():
@@ -39,20 +141,21 @@ def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "readiness": "/health?ready=true",
+            "metrics": "/metrics",
             "login": "/auth/login",
             "companies": "/api/companies",
             "trial_balance": "/api/trial-balance",
             "trial_balance_store": "/api/trial-balance-store",
-            "sales_details": "/api/sales-details"
+            "sales_details": "/api/sales-details",
+            "stock_valuation": "/api/stock-valuation",
+            "export_sales": "/api/export/sales",
+            "export_trial_balance": "/api/export/trial-balance",
+            "procedure_profile": "/api/admin/procedure-profile"
         }
     }
 
 
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
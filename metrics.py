@@ -0,0 +1,167 @@
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds, from a cached lookup up to a slow multi-company report
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels, process-local"""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_labels(dict(zip(self.labelnames, key)))} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, process-local"""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts, then sum and count
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[n] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(key, list(state)) for key, state in self._values.items()]
+
+        for key, state in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for n, bound in enumerate(self.buckets):
+                cumulative += state[n]
+                lines.append(
+                    f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(labels)} {state[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(labels)} {state[-1]}")
+        return lines
+
+
+def gauge(name: str, help: str, samples: Iterable[Sample]) -> List[str]:
+    """A gauge family read at scrape time"""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    return lines
+
+
+def counter(name: str, help: str, samples: Iterable[Sample]) -> List[str]:
+    """A counter family kept by another object (a cache's hit count), read at scrape time"""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    return lines
+
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers are ready, by route template",
+    ("method", "route", "status"),
+)
+
+procedure_seconds = Histogram(
+    "db_procedure_duration_seconds",
+    "Stored procedure call time including fetching its result sets",
+    ("procedure",),
+)
+
+procedure_errors = Counter(
+    "db_procedure_errors_total",
+    "Stored procedure calls that raised",
+    ("procedure",),
+)
+
+pool_acquire_seconds = Histogram(
+    "db_pool_acquire_duration_seconds",
+    "Time to check a connection out of the pool",
+    ("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+pool_waits = Counter(
+    "db_pool_waits_total",
+    "Checkouts that found no free connection and had to wait",
+    ("pool",),
+)
+
+pool_timeouts = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up waiting for a connection",
+    ("pool",),
+)
+
+INSTRUMENTS = [
+    http_request_seconds,
+    procedure_seconds,
+    procedure_errors,
+    pool_acquire_seconds,
+    pool_waits,
+    pool_timeouts,
+]
+
+
+def render(families: Optional[List[List[str]]] = None) -> str:
+    """Prometheus text exposition of the instruments plus scrape-time families"""
+    lines: List[str] = []
+    for instrument in INSTRUMENTS:
+        lines.extend(instrument.render())
+    for family in families or []:
+        lines.extend(family)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_CEILING, ROUND_HALF_UP
+from typing import Dict, List, Optional, Tuple
+from database import current_date
+from request_timing import phase
+
+# Worked-day value of each PAYATTEND.LDAYS code, anything else counts 0
+DAY_VALUES = {"F": Decimal("1"), "P": Decimal("0.5"), "A": Decimal("0.5")}
+
+
+def _code(value) -> Optional[str]:
+    # MySQL compares these codes case-insensitively, ignoring trailing spaces
+    return None if value is None else str(value).upper().rstrip()
+
+
+def pay_cycle_start(today: date) -> date:
+    """Pay cycles run from the 26th of the previous month"""
+    if today.month == 1:
+        return date(today.year - 1, 12, 26)
+    return date(today.year, today.month - 1, 26)
+
+
+def pay_cycle_end(cycle_start: date) -> date:
+    """The 25th of the month after the cycle start"""
+    if cycle_start.month == 12:
+        return date(cycle_start.year + 1, 1, 25)
+    return date(cycle_start.year, cycle_start.month + 1, 25)
+
+
+def pay_cycle_days(today: date) -> List[date]:
+    """Calendar of the current pay cycle up to today, Sundays excluded"""
+    start = pay_cycle_start(today)
+    days = (start + timedelta(days=n) for n in range((today - start).days + 1))
+    return [day for day in days if day.weekday() != 6]
+
+
+def _ceil(value: Decimal) -> Decimal:
+    return value.to_integral_value(rounding=ROUND_CEILING)
+
+
+def _daily_rate(salary) -> Decimal:
+    # MySQL keeps div_precision_increment (4) extra digits on salary / 26
+    salary = Decimal(str(salary))
+    exponent = min(salary.as_tuple().exponent, 0) - 4  # type: ignore
+    return (salary / 26).quantize(Decimal(1).scaleb(exponent), rounding=ROUND_HALF_UP)
+
+
+def compute_salary_balance(
+    staff: List[dict],
+    attendance: List[dict],
+    today: date
+) -> Decimal:
+    """
+    Salary owed to active staff for the current pay cycle.
+
+    Each employee accrues salary / 26 per calendar day since the cycle
+    start, less the same rate for every attended working day. Multiple
+    attendance rows for a day count once, at their highest value. CUSCOD
+    and LDAYS match as they would in MySQL, whatever their case.
+    """
+    working_days = set(pay_cycle_days(today))
+    elapsed_days = (today - pay_cycle_start(today)).days
+
+    day_values: Dict[Tuple[str, date], Decimal] = {}
+    for row in attendance:
+        if row["date"] not in working_days:
+            continue
+
+        key = (_code(row["cuscod"]), row["date"])
+        value = DAY_VALUES.get(_code(row["ldays"]), Decimal("0"))
+        day_values[key] = max(day_values.get(key, value), value)
+
+    attended: Dict[str, Decimal] = {}
+    for (cuscod, _), value in day_values.items():
+        attended[cuscod] = attended.get(cuscod, Decimal("0")) + value
+
+    balance = Decimal("0")
+    for member in staff:
+        if member["salary"] is None:
+            continue
+
+        rate = _daily_rate(member["salary"])
+        days = attended.get(_code(member["cuscod"]), 0) if member["cuscod"] is not None else 0
+        balance += _ceil(rate * elapsed_days) - _ceil(rate * days)
+
+    return balance
+
+
+@phase("salary_balance")
+def get_salary_balance(conn, today: Optional[date] = None) -> Decimal:
+    """
+    Read-only replacement for the PAYDATMAS based SALARY BALANCE (SUN01).
+    today defaults to the server's CURDATE(), as in the procedure.
+    """
+    today = today or current_date(conn)
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(
+            """
+            SELECT CUSCOD AS cuscod, SALARY AS salary
+            FROM PAYSTAFFMAS
+            WHERE CUSTYP = 'S'
+            AND (DOR = '0000-00-00' OR DOR IS NULL)
+            """
+        )
+        staff = cursor.fetchall()
+
+        cursor.execute(
+            """
+            SELECT CUSCOD AS cuscod, DATE AS date, LDAYS AS ldays
+            FROM PAYATTEND
+            WHERE DATE BETWEEN %s AND %s
+            """,
+            (pay_cycle_start(today), today),
+        )
+        attendance = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    return compute_salary_balance(staff, attendance, today)
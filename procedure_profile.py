@@ -0,0 +1,180 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from config import settings
+
+# Session counters compared around a call when status capture is on.
+# Handler_read_* together are the rows the server read, MySQL has no
+# per-session "rows examined" counter of its own.
+STATUS_COUNTERS = (
+    "Handler_read_first",
+    "Handler_read_key",
+    "Handler_read_last",
+    "Handler_read_next",
+    "Handler_read_prev",
+    "Handler_read_rnd",
+    "Handler_read_rnd_next",
+    "Created_tmp_tables",
+    "Created_tmp_disk_tables",
+    "Sort_merge_passes",
+    "Sort_rows",
+    "Sort_scan",
+    "Select_full_join",
+    "Select_scan",
+)
+
+STATUS_QUERY = "SHOW SESSION STATUS WHERE Variable_name IN ({})".format(
+    ", ".join(f"'{name}'" for name in STATUS_COUNTERS)
+)
+
+
+def status_values(rows) -> Dict[str, int]:
+    """SHOW STATUS rows, from a tuple or a dictionary cursor, as name -> value"""
+    values = {}
+    for row in rows:
+        name, value = (row["Variable_name"], row["Value"]) if isinstance(row, dict) else row[:2]
+        values[name] = int(value)
+    return values
+
+
+def status_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    delta = {name: after.get(name, 0) - before.get(name, 0) for name in STATUS_COUNTERS}
+    delta["rows_examined"] = sum(
+        value for name, value in delta.items() if name.startswith("Handler_read_")
+    )
+    return delta
+
+
+class ProcedureCall:
+    """One stored procedure call as the profiler sees it"""
+
+    __slots__ = ("procedure", "args", "started_at", "seconds", "rows", "error", "session_status")
+
+    def __init__(self, procedure: str, args):
+        self.procedure = procedure
+        self.args = list(args)
+        self.started_at = datetime.now()
+        self.seconds = 0.0
+        self.rows: Optional[int] = None
+        self.error: Optional[str] = None
+        self.session_status: Optional[Dict[str, int]] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "procedure": self.procedure,
+            "args": self.args,
+            "startedAt": self.started_at.isoformat(timespec="milliseconds"),
+            "ms": round(self.seconds * 1000, 2),
+            "rows": self.rows,
+            "error": self.error,
+            "sessionStatus": self.session_status,
+        }
+
+
+class ProcedureProfile:
+    """
+    Slowest and most recent stored procedure calls with their arguments.
+
+    Off by default, nothing is kept until it is enabled. Session status
+    capture costs two extra SHOW SESSION STATUS round trips per call, so it
+    is a separate switch and can be limited to some procedures.
+    """
+
+    def __init__(self, slowest: int, recent: int, enabled: bool = False):
+        self.slowest_size = slowest
+        self.enabled = enabled
+        self.capture_status = False
+        self.capture_procedures: Optional[set] = None
+        self.enabled_at = time.time() if enabled else None
+        self._slowest: List[tuple] = []
+        self._recent: deque = deque(maxlen=recent)
+        self._totals: Dict[str, dict] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        capture_status: Optional[bool] = None,
+        procedures: Optional[Iterable[str]] = None
+    ):
+        with self._lock:
+            if enabled is not None:
+                if enabled and not self.enabled:
+                    self.enabled_at = time.time()
+                self.enabled = enabled
+            if capture_status is not None:
+                self.capture_status = capture_status
+            if procedures is not None:
+                # An empty list captures every procedure again
+                self.capture_procedures = set(procedures) or None
+
+    def reset(self):
+        with self._lock:
+            self._slowest = []
+            self._recent.clear()
+            self._totals = {}
+
+    def wants_status(self, procedure: str) -> bool:
+        return (
+            self.enabled
+            and self.capture_status
+            and (self.capture_procedures is None or procedure in self.capture_procedures)
+        )
+
+    def record(self, call: ProcedureCall):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._recent.append(call)
+
+            totals = self._totals.get(call.procedure)
+            if totals is None:
+                totals = self._totals[call.procedure] = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+            totals["calls"] += 1
+            totals["errors"] += call.error is not None
+            totals["seconds"] += call.seconds
+            totals["max_seconds"] = max(totals["max_seconds"], call.seconds)
+
+            # Min-heap on duration, the fastest of the kept calls is dropped first
+            entry = (call.seconds, next(self._sequence), call)
+            if len(self._slowest) < self.slowest_size:
+                heapq.heappush(self._slowest, entry)
+            elif self._slowest and call.seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            slowest = sorted(self._slowest, key=lambda entry: entry[0], reverse=True)
+            recent = list(self._recent)
+            totals = {name: dict(values) for name, values in self._totals.items()}
+
+        return {
+            "enabled": self.enabled,
+            "captureStatus": self.capture_status,
+            "captureProcedures": sorted(self.capture_procedures) if self.capture_procedures else None,
+            "enabledAt": datetime.fromtimestamp(self.enabled_at).isoformat(timespec="seconds") if self.enabled_at else None,
+            "procedures": {
+                name: {
+                    "calls": values["calls"],
+                    "errors": values["errors"],
+                    "avgMs": round(values["seconds"] / values["calls"] * 1000, 2),
+                    "maxMs": round(values["max_seconds"] * 1000, 2),
+                }
+                for name, values in sorted(totals.items())
+            },
+            "slowest": [call.as_dict() for _, _, call in slowest],
+            "recent": [call.as_dict() for call in reversed(recent)],
+        }
+
+
+procedure_profile = ProcedureProfile(
+    settings.PROC_PROFILE_SLOWEST,
+    settings.PROC_PROFILE_RECENT,
+    enabled=settings.PROC_PROFILING,
+)
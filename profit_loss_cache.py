@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Tuple
+from config import settings
+
+Totals = Tuple[Decimal, Decimal]
+
+
+class ClosedDayCache:
+    """
+    Daily (total_profit, total_loss) for days before today.
+
+    A closed day's sales do not change, so entries are written once and
+    never invalidated. They live in a small SQLite file so they survive
+    process restarts (warm Lambda containers keep /tmp), with an in-memory
+    copy in front of it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._days: Dict[date, Totals] = {}
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profit_loss_daily (
+                    day TEXT PRIMARY KEY,
+                    total_profit TEXT NOT NULL,
+                    total_loss TEXT NOT NULL
+                )
+                """
+            )
+            for day, profit, loss in self._db.execute(
+                "SELECT day, total_profit, total_loss FROM profit_loss_daily"
+            ):
+                self._days[date.fromisoformat(day)] = (Decimal(profit), Decimal(loss))
+        return self._db
+
+    def get_range(self, start: date, end: date) -> Dict[date, Totals]:
+        with self._lock:
+            self._connect()
+            days = {day: totals for day, totals in self._days.items() if start <= day <= end}
+            self.hits += len(days)
+            self.misses += (end - start).days + 1 - len(days)
+            return days
+
+    def put_many(self, days: Dict[date, Totals]):
+        if not days:
+            return
+
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO profit_loss_daily VALUES (?, ?, ?)",
+                    [(day.isoformat(), str(profit), str(loss)) for day, (profit, loss) in days.items()],
+                )
+            self._days.update(days)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._days)}
+
+
+def date_range(start: date, end: date):
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+profit_loss_days = ClosedDayCache(
+    settings.PROFIT_LOSS_CACHE_PATH
+    or os.path.join(tempfile.gettempdir(), "udayam_profit_loss.sqlite3")
+)
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from config import settings
+from database import async_expire_table_stats, async_fetchall, expire_table_stats, get_async_db
+
+# Master tables served from memory, with the query that loads each one and
+# its lookup key. Rows are kept in query order, the first row per key wins.
+REFERENCE_TABLES = {
+    "CUSMAS": (
+        "SELECT CUSCOD, CUSNAM, ADRONE, ADRTWO, PHONE FROM CUSMAS",
+        "CUSCOD",
+    ),
+    "SALMANMAS": (
+        "SELECT SALMANCOD, SALMANNAM, SALMANPHON FROM SALMANMAS",
+        "SALMANCOD",
+    ),
+    "FIRMASN": (
+        "SELECT SNO_ID, FIRCOD_ID, FIRCOD, FIRNAME, SCGRPCOD, SDGRPCOD FROM FIRMASN ORDER BY SNO_ID",
+        "FIRCOD",
+    ),
+}
+
+VERSION_QUERY = """
+    SELECT TABLE_NAME, UPDATE_TIME
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME IN ({placeholders})
+"""
+
+
+def _key(code) -> str:
+    # The tables' keys compare case-insensitively, ignoring trailing spaces
+    return str(code).rstrip().upper()
+
+
+class ReferenceCache:
+    """
+    Process-local copy of the rarely changing master tables.
+
+    Every table is loaded in bulk on first use. After that, at most once
+    every REFERENCE_REFRESH_SECONDS, one information_schema query reads the
+    tables' UPDATE_TIME and only the tables whose value moved are reloaded.
+    Reloads swap in a new dict, readers never see a half-loaded table.
+
+    Codes added since the last reload are not in the copy yet. Routes pass
+    the codes they are about to look up to load_missing_async, which reads
+    just those rows and remembers the codes that do not exist.
+
+    Codes are matched the way MySQL matched them when the routes joined
+    the tables, ignoring case and trailing spaces.
+    """
+
+    def __init__(self, tables: Dict[str, tuple], refresh_seconds: int):
+        self.tables = tables
+        self.refresh_seconds = refresh_seconds
+        self._rows: Dict[str, Dict[str, dict]] = {}
+        self._all_rows: Dict[str, List[dict]] = {}
+        self._generations: Dict[str, int] = {}
+        self._versions: Dict[str, Optional[str]] = {}
+        self._absent: Dict[str, set] = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._async_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def is_due(self) -> bool:
+        return (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= self.refresh_seconds
+        )
+
+    def _version_query(self):
+        placeholders = ", ".join(["%s"] * len(self.tables))
+        return VERSION_QUERY.format(placeholders=placeholders), tuple(self.tables)
+
+    def _stale_tables(self, version_rows) -> Dict[str, Optional[str]]:
+        versions = {name: None for name in self.tables}
+        for row in version_rows:
+            versions[row["TABLE_NAME"]] = str(row["UPDATE_TIME"])
+
+        return {
+            name: version
+            for name, version in versions.items()
+            if name not in self._rows or self._versions.get(name) != version
+        }
+
+    def _store(self, name: str, version: Optional[str], rows):
+        key = self.tables[name][1]
+        by_key: Dict[str, dict] = {}
+        for row in rows:
+            by_key.setdefault(_key(row[key]), row)
+
+        self._rows[name] = by_key
+        self._all_rows[name] = list(rows)
+        self._absent.pop(name, None)
+        self._versions[name] = version
+        self._generations[name] = self._generations.get(name, 0) + 1
+
+    def _missing(self, name: str, codes: Iterable) -> list:
+        rows = self._rows.get(name, {})
+        absent = self._absent.get(name, ())
+        keys = (_key(code) for code in codes if code is not None)
+        return list(dict.fromkeys(
+            key for key in keys if key not in rows and key not in absent
+        ))
+
+    def _lookup_query(self, name: str, count: int) -> str:
+        query, key = self.tables[name]
+        placeholders = ", ".join(["%s"] * count)
+        return f"SELECT * FROM ({query}) AS reference WHERE reference.{key} IN ({placeholders})"
+
+    def _add(self, name: str, codes: list, rows):
+        """Swap in a copy of the table with the looked up rows added"""
+        key = self.tables[name][1]
+        by_key = dict(self._rows.get(name, {}))
+        for row in rows:
+            by_key.setdefault(_key(row[key]), row)
+
+        self._rows[name] = by_key
+        self._all_rows[name] = self._all_rows.get(name, []) + list(rows)
+        self._absent[name] = self._absent.get(name, set()) | {code for code in codes if code not in by_key}
+        if rows:
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+    def _refresh_lock_async(self) -> asyncio.Lock:
+        # An asyncio.Lock belongs to the loop it was first used on
+        loop = asyncio.get_running_loop()
+        if self._async_lock is None or self._async_lock_loop is not loop:
+            self._async_lock = asyncio.Lock()
+            self._async_lock_loop = loop
+        return self._async_lock
+
+    def refresh_if_due(self, conn):
+        """Bring the tables up to date over a mysql.connector connection"""
+        if not self.is_due():
+            return
+
+        # Only one thread refreshes, the others keep serving the current
+        # rows unless nothing has been loaded yet
+        if not self._lock.acquire(blocking=self._checked_at is None):
+            return
+
+        try:
+            if not self.is_due():
+                return
+
+            cursor = conn.cursor(dictionary=True)
+            try:
+                expire_table_stats(cursor)
+                cursor.execute(*self._version_query())
+
+                for name, version in self._stale_tables(cursor.fetchall()).items():
+                    cursor.execute(self.tables[name][0])
+                    self._store(name, version, cursor.fetchall())
+            finally:
+                cursor.close()
+
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    async def refresh_if_due_async(self, conn):
+        """Same as refresh_if_due over an aiomysql connection"""
+        if not self.is_due():
+            return
+
+        # Concurrent requests wait for the running refresh on the loop
+        # instead of skipping it, without blocking the loop
+        async with self._refresh_lock_async():
+            if not self.is_due():
+                return
+
+            await async_expire_table_stats(conn)
+            version_rows = await async_fetchall(conn, *self._version_query())
+
+            for name, version in self._stale_tables(version_rows).items():
+                self._store(name, version, await async_fetchall(conn, self.tables[name][0]))
+
+            self._checked_at = time.monotonic()
+
+    async def load_missing_async(self, name: str, codes: Iterable, conn=None):
+        """
+        Read the rows of codes not in the copy. Without conn, for callers
+        whose connection is busy streaming, a pooled connection is taken
+        only when something is missing.
+        """
+        missing = self._missing(name, codes)
+        if not missing:
+            return
+
+        if conn is None:
+            async with get_async_db() as lookup:
+                rows = await async_fetchall(lookup, self._lookup_query(name, len(missing)), missing)
+        else:
+            rows = await async_fetchall(conn, self._lookup_query(name, len(missing)), missing)
+        self._add(name, missing, rows)
+
+    def get(self, name: str, code) -> Optional[dict]:
+        if code is None:
+            return None
+        return self._rows.get(name, {}).get(_key(code))
+
+    def get_many(self, name: str, codes: Iterable) -> Dict[str, dict]:
+        """Rows keyed by the codes as they were passed"""
+        rows = self._rows.get(name, {})
+        return {
+            code: rows[_key(code)]
+            for code in codes
+            if code is not None and _key(code) in rows
+        }
+
+    def all(self, name: str) -> List[dict]:
+        """Every row of a table in query order, duplicates of a key included"""
+        return self._all_rows.get(name, [])
+
+    def generation(self, name: str) -> int:
+        """Bumped on every reload of the table, for caches derived from it"""
+        return self._generations.get(name, 0)
+
+    def stats(self) -> dict:
+        return {name: len(rows) for name, rows in self._rows.items()}
+
+
+reference_data = ReferenceCache(REFERENCE_TABLES, settings.REFERENCE_REFRESH_SECONDS)
+
+
+def customer_fields(cuscod) -> dict:
+    """CUSMAS name, address and phone for a customer code, None when unknown"""
+    customer = reference_data.get("CUSMAS", cuscod) or {}
+    return {
+        "CUSNAM": customer.get("CUSNAM"),
+        "ADRONE": customer.get("ADRONE"),
+        "ADRTWO": customer.get("ADRTWO"),
+        "PHONE": customer.get("PHONE"),
+    }
+
+
+def salesman_fields(salmancod) -> dict:
+    """SALMANMAS name and phone for a salesman code, None when unknown"""
+    salesman = reference_data.get("SALMANMAS", salmancod) or {}
+    return {
+        "SALMANNAM": salesman.get("SALMANNAM"),
+        "SALMANPHON": salesman.get("SALMANPHON"),
+    }
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from config import settings
+from database import expire_table_stats
+from request_timing import phase
+
+# Tables whose changes can move each trial balance report
+SHOP_TABLES = (
+    "DAYBUK", "FIRMASN", "PRCUSMAS", "STKMAS", "PRITEMAS", "PRSTKMAS",
+    "PRPURDET", "PRSALDET", "PRPACKSTRU", "PAYSTAFFMAS", "PAYATTEND",
+)
+STORE_TABLES = ("DAYBUK", "FIRMASN", "SHOPSTKGODOWN", "SHOPINVESTMENT")
+
+
+# A table changed this recently may have a commit the report's read did
+# not see yet, UPDATE_TIME only has one second resolution
+SETTLE_SECONDS = 2
+
+
+@phase("watermark")
+def get_data_watermark(conn, tables) -> Optional[tuple]:
+    """
+    Cheap fingerprint of the data behind a report, None while it is moving.
+
+    Combines the DAYBUK change counter in ROLLUP_VERSION, bumped by the
+    DAYBUK_DAILY triggers in the writer's transaction, with the InnoDB
+    UPDATE_TIME of every table. UPDATE_TIME has one second resolution,
+    so when any table changed in the last SETTLE_SECONDS the report is
+    computed but not cached. It is also kept in memory only: it is NULL
+    after a server restart until the table's next write.
+    """
+    placeholders = ", ".join(["%s"] * len(tables))
+    cursor = conn.cursor()
+
+    try:
+        expire_table_stats(cursor)
+        cursor.execute(
+            f"""
+            SELECT TABLE_NAME, UPDATE_TIME,
+                   UPDATE_TIME > NOW() - INTERVAL %s SECOND AS recent
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME IN ({placeholders})
+            UNION ALL
+            SELECT 'ROLLUP_VERSION', version, 0
+            FROM ROLLUP_VERSION
+            WHERE name = 'DAYBUK'
+            """,
+            (SETTLE_SECONDS, *tables),
+        )
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    if any(recent for _, _, recent in rows):
+        return None
+    return tuple(sorted((name, str(marker)) for name, marker, _ in rows))
+
+
+class ReportCache:
+    """
+    Per-company trial balance entries keyed by (report, company, start, end).
+
+    An entry is only served while the data watermark it was computed under
+    is unchanged, there is no TTL. A None watermark bypasses the cache.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[tuple, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, watermark: tuple) -> Optional[dict]:
+        with self._lock:
+            cached = self._entries.get(key)
+
+            if cached is None or cached[0] != watermark:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+    def put(self, key: tuple, watermark: tuple, entry: dict):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (watermark, entry)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def fetch(
+        self,
+        report: str,
+        company_codes: List[str],
+        start_date,
+        end_date,
+        watermark: Optional[tuple],
+        compute: Callable[[List[str]], Dict[str, Optional[dict]]]
+    ) -> Tuple[List[dict], str]:
+        """
+        Company entries in request order, computing only the ones not cached.
+
+        compute gets the missing codes and returns an entry per code (None
+        for unknown companies). Entries carrying an error are not cached,
+        and nothing is read or cached under a None watermark. Also returns
+        "hit", "partial" or "miss" for the response.
+        """
+        codes = list(dict.fromkeys(company_codes))
+        entries: Dict[str, Optional[dict]] = {}
+        missing = []
+
+        if watermark is None:
+            with self._lock:
+                self.misses += len(codes)
+
+        for code in codes:
+            entry = None if watermark is None else self.get((report, code, start_date, end_date), watermark)
+            if entry is None:
+                missing.append(code)
+            else:
+                entries[code] = entry
+
+        if missing:
+            for code, entry in compute(missing).items():
+                if watermark is not None and entry is not None and "error" not in entry:
+                    self.put((report, code, start_date, end_date), watermark, entry)
+                entries[code] = entry
+
+        if not missing:
+            status = "hit"
+        elif len(missing) == len(codes):
+            status = "miss"
+        else:
+            status = "partial"
+
+        return [entries[code] for code in company_codes if entries.get(code) is not None], status  # type: ignore
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+trial_balance_cache = ReportCache(settings.REPORT_CACHE_SIZE)
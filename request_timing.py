@@ -0,0 +1,130 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger("timing")
+logger.setLevel(logging.INFO)
+
+
+class Phase:
+    """Accumulated time, calls and rows of one named phase"""
+
+    __slots__ = ("seconds", "count", "rows")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.count = 0
+        self.rows: Optional[int] = None
+
+    def add_rows(self, rows: int):
+        self.rows = (self.rows or 0) + rows
+
+
+class RequestTimings:
+    """
+    Per-request phase durations.
+
+    Set on a context variable by the middleware, so everything the request
+    runs - dependencies, the handler, threadpool workers that copy the
+    context - records into the same object.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, Phase] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, rows: Optional[int] = None) -> Phase:
+        # Companies of a trial balance record from several threads at once
+        with self._lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                phase = self.phases[name] = Phase()
+
+            phase.seconds += seconds
+            phase.count += 1
+            if rows is not None:
+                phase.add_rows(rows)
+            return phase
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, one entry per phase plus the total"""
+        entries = []
+        for name, phase in self.phases.items():
+            details = []
+            if phase.count > 1:
+                details.append(f"{phase.count} calls")
+            if phase.rows is not None:
+                details.append(f"{phase.rows} rows")
+
+            entry = f"{name};dur={phase.seconds * 1000:.1f}"
+            if details:
+                entry += f';desc="{", ".join(details)}"'
+            entries.append(entry)
+
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def log(self, method: str, path: str, status_code: int):
+        logger.info(json.dumps({
+            "event": "request_timing",
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "phases": {
+                name: {"ms": round(phase.seconds * 1000, 1), "count": phase.count, "rows": phase.rows}
+                for name, phase in self.phases.items()
+            },
+        }))
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+class _Span:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows: Optional[int] = None
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Time a block as phase name of the current request, if there is one.
+    Set .rows on the yielded span to attach a row count.
+    """
+    span = _Span()
+    started = time.perf_counter()
+    try:
+        yield span
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings.record(name, time.perf_counter() - started, span.rows)
+
+
+def record(name: str, seconds: float, rows: Optional[int] = None):
+    timings = _current.get()
+    if timings is not None:
+        timings.record(name, seconds, rows)
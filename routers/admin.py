@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from procedure_profile import procedure_profile
+from auth_utils import require_admin # type: ignore
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+class ProcedureProfileSettings(BaseModel):
+    enabled: Optional[bool] = Field(None, description="Record every stored procedure call")
+    captureStatus: Optional[bool] = Field(None, description="Compare SHOW SESSION STATUS counters around each call")
+    procedures: Optional[List[str]] = Field(None, description="Limit status capture to these procedures, [] for all")
+    reset: bool = Field(False, description="Drop the calls recorded so far")
+
+
+@router.get("/procedure-profile")
+def get_procedure_profile(current_user: dict = Depends(require_admin)):
+    """
+    Per-procedure call counts and timings, the slowest calls with their
+    arguments and the most recent calls, for this process.
+
+    **Requires an admin token.**
+    """
+    return procedure_profile.snapshot()
+
+
+@router.put("/procedure-profile")
+def update_procedure_profile(
+    request: ProcedureProfileSettings,
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Turn profiling and session status capture on or off, optionally for
+    some procedures only. Fields left out keep their current value.
+
+    **Requires an admin token.**
+    """
+    procedure_profile.configure(
+        enabled=request.enabled,
+        capture_status=request.captureStatus,
+        procedures=request.procedures
+    )
+    if request.reset:
+        procedure_profile.reset()
+
+    return procedure_profile.snapshot()
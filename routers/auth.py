@@ -2,7 +2,7 @@ import datetime
 import logging
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from database import get_db
+from database import get_request_db
 from auth_utils import create_refresh_token, verify_password, create_access_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -19,7 +19,7 @@ class LoginResponse(BaseModel):
     user: dict
 
 @router.post("/login", response_model=LoginResponse)
-def login(request: LoginRequest, conn=Depends(get_db)):
+def login(request: LoginRequest, conn=Depends(get_request_db)):
     cursor = None
 
     try:
@@ -60,5 +60,3 @@ def login(request: LoginRequest, conn=Depends(get_db)):
     finally:
         if cursor:
             cursor.close()
-        if conn:
-            conn.close()
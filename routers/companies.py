@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends
+import json
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel
 from typing import List
-from database import get_db
+from database import get_request_db
+from http_cache import CACHE_CONTROL, make_etag, etag_matches, not_modified_response
+from reference_cache import reference_data
 from auth_utils import verify_token # type: ignore
 
 router = APIRouter(prefix="/api", tags=["companies"])
@@ -14,32 +17,53 @@ class Company(BaseModel):
     SCGRPCOD: str
     SDGRPCOD: str
 
+# (FIRMASN generation, companies, etag) of the last list built
+_company_list = (None, [], None)
+
+
+def _companies():
+    """Company list and its ETag, rebuilt only when the FIRMASN cache reloads"""
+    global _company_list
+
+    generation = reference_data.generation("FIRMASN")
+    if _company_list[0] != generation:
+        companies = [
+            {
+                "SNO_ID": row["SNO_ID"],
+                "FIRCOD_ID": row["FIRCOD_ID"] or "",
+                "FIRCOD": row["FIRCOD"] or "",
+                "FIRNAME": row["FIRNAME"],
+                "SCGRPCOD": row["SCGRPCOD"] or "",
+                "SDGRPCOD": row["SDGRPCOD"] or "",
+            }
+            for row in reference_data.all("FIRMASN")
+            # FIRCOD != '' AND FIRNAME != '' under PAD SPACE, blanks are empty
+            if (row["FIRCOD"] or "").strip() and (row["FIRNAME"] or "").strip()
+        ]
+        etag = make_etag(json.dumps(companies, sort_keys=True, default=str))
+        _company_list = (generation, companies, etag)
+
+    return _company_list[1], _company_list[2]
+
+
 @router.get("/companies", response_model=List[Company])
-def get_companies(current_user: dict = Depends(verify_token)):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        query = """
-            SELECT
-                SNO_ID,
-                COALESCE(FIRCOD_ID, '') as FIRCOD_ID,
-                COALESCE(FIRCOD, '') as FIRCOD,
-                FIRNAME,
-                COALESCE(SCGRPCOD, '') as SCGRPCOD,
-                COALESCE(SDGRPCOD, '') as SDGRPCOD
-            FROM FIRMASN
-            WHERE FIRCOD IS NOT NULL
-            AND FIRCOD != ''
-            AND FIRNAME IS NOT NULL
-            AND FIRNAME != ''
-            ORDER BY SNO_ID
-        """
-
-        cursor.execute(query)
-        companies = cursor.fetchall()
-
-        return companies
-    finally:
-        cursor.close()
-        conn.close()
+def get_companies(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(verify_token),
+    conn=Depends(get_request_db)
+):
+    """
+    Companies from the FIRMASN reference cache, which only goes back to
+    MySQL once every REFERENCE_REFRESH_SECONDS. A matching If-None-Match
+    returns 304.
+    """
+    reference_data.refresh_if_due(conn)
+    companies, etag = _companies()
+
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return companies
@@ -0,0 +1,320 @@
+import asyncio
+import csv
+import io
+import logging
+import tempfile
+from datetime import date
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from config import settings
+from database import get_request_db, get_async_db, async_fetchall, async_fetchone, async_query_stream
+from reference_cache import reference_data, customer_fields, salesman_fields
+from routers import trial_balance, trial_balance_store
+from auth_utils import verify_token, verify_token_async # type: ignore
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # CSV only
+    Workbook = None
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+BILL_COLUMNS = [
+    "DATE", "BILLNO", "SNO", "CUSCOD", "CUSNAM", "SMANCOD", "SALMANNAM",
+    "TQTY", "NET", "TOTAL_PROFIT", "TOTAL_LOSS",
+]
+
+ITEM_COLUMNS = [
+    "DATE", "BILLNO", "SNO", "CUSCOD", "CUSNAM", "SMANCOD", "SALMANNAM",
+    "NAME", "QTY", "RATE", "TPRICE", "PRCOSTRATE", "PROFIT_LOSS",
+]
+
+TRIAL_BALANCE_COLUMNS = [
+    "companyId", "companyName", "periodStart", "periodEnd",
+    "accountName", "accountType", "debit", "credit", "balance",
+]
+
+# One row per bill, profit/loss from one grouped pass over the range's SALDET
+BILLS_QUERY = """
+    SELECT
+        s.DATE, s.BILLNO, s.SNO, s.CUSCOD, s.SMANCOD, s.TQTY, s.NET,
+        COALESCE(pl.TOTAL_PROFIT, 0) AS TOTAL_PROFIT,
+        COALESCE(pl.TOTAL_LOSS, 0) AS TOTAL_LOSS
+    FROM SALTOT s
+    LEFT JOIN (
+        SELECT
+            d.DATE,
+            d.BILLNO,
+            SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) > 0
+                     THEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE)
+                     ELSE 0 END) AS TOTAL_PROFIT,
+            SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) < 0
+                     THEN ABS((d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE))
+                     ELSE 0 END) AS TOTAL_LOSS
+        FROM SALDET d
+        WHERE d.DATE BETWEEN %s AND %s
+        GROUP BY d.DATE, d.BILLNO
+    ) pl
+        ON pl.DATE = s.DATE
+       AND pl.BILLNO = s.BILLNO
+    WHERE s.DATE BETWEEN %s AND %s
+    ORDER BY s.DATE, s.SNO_ID
+"""
+
+# One row per item, in bill order
+ITEMS_QUERY = """
+    SELECT
+        t.DATE, t.BILLNO, t.SNO, t.CUSCOD, t.SMANCOD,
+        d.NAME, d.QTY, d.RATE, d.TPRICE, d.PRCOSTRATE,
+        ((d.RATE - d.PRCOSTRATE) * d.QTY) AS PROFIT_LOSS
+    FROM SALTOT t
+    JOIN SALDET d
+        ON d.DATE = t.DATE
+       AND d.BILLNO = t.BILLNO
+       AND d.CUSCOD = t.CUSCOD
+    WHERE t.DATE BETWEEN %s AND %s
+    ORDER BY t.DATE, t.SNO_ID, d.SNO_ID
+"""
+
+
+# Rows the sales export would write, counted over the DATE indexes
+ROW_COUNT_QUERIES = {
+    "bills": "SELECT COUNT(*) AS row_count FROM SALTOT WHERE DATE BETWEEN %s AND %s",
+    "items": "SELECT COUNT(*) AS row_count FROM SALDET WHERE DATE BETWEEN %s AND %s",
+}
+
+
+def _check_format(format: str):
+    if format == "xlsx" and Workbook is None:
+        raise HTTPException(status_code=400, detail="XLSX export is not available, use format=csv")
+
+
+def _attachment(filename: str, format: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+
+
+async def _csv_stream(header: List[str], row_chunks):
+    """CSV written one chunk of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM so Excel opens the file as UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(header)
+
+    async for rows in row_chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _append_rows(sheet, rows):
+    for row in rows:
+        sheet.append(row)
+
+
+async def _xlsx_stream(sheet_title: str, header: List[str], row_chunks):
+    """
+    XLSX built with openpyxl's write-only sheet, which spools rows to disk.
+
+    A zip can only be sent once it is complete, so the file is written to
+    a temporary file first and then streamed from there.
+    """
+    with tempfile.TemporaryFile() as handle:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_title)
+        sheet.append(header)
+
+        async for rows in row_chunks:
+            # Cells are converted and spooled to disk off the event loop
+            await asyncio.to_thread(_append_rows, sheet, rows)
+
+        await asyncio.to_thread(workbook.save, handle)
+        handle.seek(0)
+
+        while True:
+            chunk = await asyncio.to_thread(handle.read, 64 * 1024)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _export_response(format: str, sheet_title: str, header: List[str], row_chunks, filename: str):
+    if format == "xlsx":
+        body = _xlsx_stream(sheet_title, header, row_chunks)
+    else:
+        body = _csv_stream(header, row_chunks)
+
+    async def guarded():
+        try:
+            async for chunk in body:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent with a 200. Raising aborts the chunked
+            # transfer, so the client sees a failed download rather than a
+            # truncated CSV or an XLSX without its zip directory.
+            logger.error(f"Export {filename} failed: {e}")
+            raise
+
+    return StreamingResponse(
+        guarded(),
+        media_type=MEDIA_TYPES[format],
+        headers=_attachment(filename, format)
+    )
+
+
+async def _sales_rows(start: date, end: date, items: bool):
+    """Sales rows for the range in chunks, read unbuffered on a connection of their own"""
+    query, columns = (ITEMS_QUERY, ITEM_COLUMNS) if items else (BILLS_QUERY, BILL_COLUMNS)
+    params = (start, end) if items else (start, end, start, end)
+
+    async with get_async_db() as connection:
+        # The client sets the pace, keep MySQL from dropping a slow reader.
+        # The connection goes back to the pool, so the session value is put
+        # back once the export is done.
+        previous = await async_fetchone(connection, "SELECT @@SESSION.net_write_timeout AS timeout")
+        await async_fetchall(connection, "SET SESSION net_write_timeout = 600")
+        finished = False
+
+        try:
+            await reference_data.refresh_if_due_async(connection)
+
+            async for rows in async_query_stream(connection, query, params, settings.EXPORT_CHUNK_SIZE):
+                # The connection is busy streaming, new customers and salesmen
+                # are looked up on another one
+                await reference_data.load_missing_async("CUSMAS", [row["CUSCOD"] for row in rows])
+                await reference_data.load_missing_async("SALMANMAS", [row["SMANCOD"] for row in rows])
+                chunk = []
+                for row in rows:
+                    row.update(customer_fields(row["CUSCOD"]))
+                    row.update(salesman_fields(row["SMANCOD"]))
+                    chunk.append([row.get(column) for column in columns])
+                yield chunk
+
+            finished = True
+        finally:
+            if finished:
+                await async_fetchall(
+                    connection, "SET SESSION net_write_timeout = %s", (previous["timeout"],)
+                )
+            else:
+                # Failed or abandoned part way, possibly with unread rows
+                # left on the wire: closed, the pool drops it
+                connection.close()
+
+
+@router.get("/sales")
+async def export_sales(
+    start: date,
+    end: date,
+    detail: str = Query("bills", pattern="^(bills|items)$", description="bills for one row per bill, items for one row per line item"),
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    token: str = Depends(verify_token_async),
+    db=Depends(get_request_db)
+):
+    """
+    SALTOT bills or SALTOT/SALDET line items between start and end as a
+    CSV or XLSX download.
+
+    Rows are read from MySQL and written out in chunks, memory stays flat
+    however long the range is. The range is capped at EXPORT_MAX_DAYS days
+    (400) and EXPORT_MAX_ROWS rows (413).
+
+    **Requires authentication.**
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > settings.EXPORT_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {settings.EXPORT_MAX_DAYS} days"
+        )
+    _check_format(format)
+
+    try:
+        connection = await db.async_connection()
+        row = await async_fetchone(connection, ROW_COUNT_QUERIES[detail], (start, end))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    if row["row_count"] > settings.EXPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Export of {row['row_count']} rows exceeds {settings.EXPORT_MAX_ROWS}, narrow the date range"
+        )
+
+    items = detail == "items"
+    return _export_response(
+        format,
+        "Sales",
+        ITEM_COLUMNS if items else BILL_COLUMNS,
+        _sales_rows(start, end, items),
+        f"sales_{detail}_{start}_{end}"
+    )
+
+
+async def _trial_balance_rows(companies_data):
+    for company in companies_data:
+        period = company.get("period") or {}
+        prefix = [company.get("companyId"), company.get("companyName"), period.get("start"), period.get("end")]
+
+        if "error" in company:
+            yield [prefix + [company["error"], "ERROR", None, None, None]]
+            continue
+
+        yield [
+            prefix + [row["accountName"], row["accountType"], row["debit"], row["credit"], row["balance"]]
+            for row in company["rows"]
+        ]
+
+
+@router.get("/trial-balance")
+async def export_trial_balance(
+    start: date,
+    end: date,
+    companyIds: List[str] = Query(..., description="Company codes, repeat the parameter for several"),
+    report: str = Query("shop", pattern="^(shop|store)$"),
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    # The report runs on the mysql.connector connection, so does auth
+    token: str = Depends(verify_token),
+    db=Depends(get_request_db)
+):
+    """
+    Trial balance rows of every requested company for the period as a CSV
+    or XLSX download, through the same report cache as the JSON endpoints.
+
+    **Requires authentication.**
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    _check_format(format)
+
+    module = trial_balance if report == "shop" else trial_balance_store
+    request = module.TrialBalanceRequest(companyIds=companyIds, startDate=start, endDate=end)
+
+    try:
+        # The report runs on the blocking mysql.connector connection
+        companies_data, _ = await asyncio.to_thread(
+            lambda: module.build_trial_balance(db.connection, request)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return _export_response(
+        format,
+        "Trial Balance",
+        TRIAL_BALANCE_COLUMNS,
+        _trial_balance_rows(companies_data),
+        f"trial_balance_{report}_{start}_{end}"
+    )
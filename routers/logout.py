@@ -1,16 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from auth_utils import verify_token, hash_token
-from database import get_db
-from datetime import datetime
-from jose import jwt
-from config import settings
+from token_cache import revoked_tokens, verified_claims
+from database import get_request_db
+from datetime import datetime, timezone
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/logout")
 def logout(
     token_data=Depends(verify_token),
-    conn=Depends(get_db),
+    conn=Depends(get_request_db),
 ):
     if conn is None:
         raise HTTPException(status_code=500, detail="Database connection failed")
@@ -23,15 +22,11 @@ def logout(
     try:
         cursor = conn.cursor()
 
-        decoded = jwt.decode(
-            auth_header,
-            settings.get_jwt_secret_value(),
-            algorithms=[settings.JWT_ALGORITHM],
-            audience="mobile-app",
-            issuer="trial-balance-api",
-        )
+        # verify_token has already validated and decoded the token
+        decoded = token_data["payload"]
 
-        exp = datetime.fromtimestamp(decoded["exp"])
+        # Stored in UTC, the revocation cache compares it with UTC_TIMESTAMP()
+        exp = datetime.fromtimestamp(decoded["exp"], timezone.utc).replace(tzinfo=None)
         token_hash = hash_token(auth_header)
 
         cursor.execute(
@@ -42,11 +37,11 @@ def logout(
             (token_hash, exp),
         )
         conn.commit()
+        revoked_tokens.add(token_hash, decoded["exp"])
+        verified_claims.discard(token_hash)
 
         return {"message": "Logged out successfully"}
 
     finally:
         if cursor:
             cursor.close()
-        if conn:
-            conn.close()
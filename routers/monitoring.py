@@ -0,0 +1,123 @@
+import secrets
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from config import settings
+from database import ping_database, pool_stats
+from metrics import counter, gauge, render
+from profit_loss_cache import profit_loss_days
+from reference_cache import reference_data
+from report_cache import trial_balance_cache
+from token_cache import revoked_tokens, verified_claims
+
+router = APIRouter(tags=["monitoring"])
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+
+def _saturated(stats: dict) -> bool:
+    return stats["in_use"] >= stats["size"] and stats["waiting"] > 0
+
+
+def _pool_families():
+    pools = pool_stats()
+    return [
+        gauge(f"db_pool_{field}", help, [({"pool": name}, stats[field]) for name, stats in pools.items()])
+        for field, help in (
+            ("size", "Maximum connections in the pool"),
+            ("open", "Connections currently open"),
+            ("in_use", "Connections checked out"),
+            ("waiting", "Checkouts waiting for a free connection"),
+        )
+    ]
+
+
+def _cache_families():
+    caches = {
+        "trial_balance": trial_balance_cache.stats(),
+        "profit_loss_days": profit_loss_days.stats(),
+        "verified_claims": {
+            "hits": verified_claims.hits,
+            "misses": verified_claims.misses,
+            "entries": len(verified_claims),
+        },
+    }
+
+    return [
+        counter(
+            "cache_hits_total", "Lookups served from a cache",
+            [({"cache": name}, stats["hits"]) for name, stats in caches.items()],
+        ),
+        counter(
+            "cache_misses_total", "Lookups a cache could not serve",
+            [({"cache": name}, stats["misses"]) for name, stats in caches.items()],
+        ),
+        gauge(
+            "cache_entries", "Entries held by a cache",
+            [({"cache": name}, stats["entries"]) for name, stats in caches.items()]
+            + [({"cache": "revoked_tokens"}, len(revoked_tokens))],
+        ),
+        counter(
+            "revoked_tokens_refreshes_total", "Reads of revoked_tokens by the revocation cache",
+            [({}, revoked_tokens.refreshes)],
+        ),
+        gauge(
+            "reference_cache_rows", "Rows held per reference table",
+            [({"table": name}, rows) for name, rows in reference_data.stats().items()],
+        ),
+        counter(
+            "reference_cache_reloads_total", "Reloads per reference table",
+            [({"table": name}, reference_data.generation(name)) for name in reference_data.tables],
+        ),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics(request: Request):
+    """
+    Prometheus text exposition of pool, stored procedure, request latency
+    and cache metrics. Values are per process (per warm Lambda container).
+
+    The scraper must send METRICS_TOKEN as a bearer token. Without a
+    METRICS_TOKEN configured the endpoint is off.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Metrics are disabled, set METRICS_TOKEN")
+
+    # compare_digest only takes ASCII str, compare the UTF-8 bytes
+    supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not secrets.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    body = render(_pool_families() + _cache_families())
+    return Response(body, media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+@router.get("/health")
+def health_check(ready: bool = False):
+    """
+    Liveness by default. With ready=true, also a database ping (cached for
+    HEALTH_PING_SECONDS) and pool saturation, and 503 when the ping fails
+    or requests are queueing for a connection.
+    """
+    if not ready:
+        return {"status": "healthy"}
+
+    ping = ping_database(settings.HEALTH_PING_SECONDS)
+    pools = {
+        name: {**stats, "saturated": _saturated(stats)}
+        for name, stats in pool_stats().items()
+    }
+    is_ready = ping["ok"] and not any(stats["saturated"] for stats in pools.values())
+
+    return JSONResponse(
+        {
+            "status": "ready" if is_ready else "unavailable",
+            "database": {
+                "ok": ping["ok"],
+                "error": ping["error"],
+                "latency_ms": ping["latency_ms"],
+            },
+            "pools": pools,
+        },
+        status_code=200 if is_ready else 503,
+    )
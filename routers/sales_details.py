@@ -1,17 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import date
-from database import get_db
-from auth_utils import verify_token
+from datetime import date, timedelta
+from decimal import Decimal
+from config import settings
+from database import get_request_db, get_async_db, async_callproc, async_callproc_stream, async_fetchall, async_fetchone
+from profit_loss_cache import profit_loss_days, date_range
+from columnar import columnar_response, wants_columnar
+from fast_json import dumps, fast_response
+from request_timing import phase
+from http_cache import CACHE_CONTROL, make_etag, etag_matches, not_modified_response
+from reference_cache import reference_data, customer_fields, salesman_fields
+from auth_utils import verify_token_async
 
 router = APIRouter(prefix="/api", tags=["Sales Details"])
+logger = logging.getLogger(__name__)
+
+# Manager shown on every bill (fixed – always ARUL via code)
+MANAGER_CODE = "BHA01"
 
 class DailySalesSummary(BaseModel):
     """Daily sales summary for a bill"""
     billdate: date = Field(..., description="Sales date")
     billno: int = Field(..., description="Bill number")
     sno: Optional[str] = Field(None, description="Serial number")
+    sno_id: Optional[int] = Field(None, description="Bill row id (SALTOT.SNO_ID), usable as a pagination cursor")
     cuscod: str = Field(..., description="Customer code")
     cusnam: Optional[str] = Field(None, description="Customer name")
     adrone: Optional[str] = Field(None, description="Address line 1")
@@ -104,6 +119,55 @@ class SalesDetailRequest(BaseModel):
         }
 
 
+class ContactInfo(BaseModel):
+    """Name and phone of a salesman or manager"""
+    name: Optional[str] = Field(None, description="Name")
+    phone: Optional[str] = Field(None, description="Phone number")
+
+
+class CustomerInfo(BaseModel):
+    """Customer master data"""
+    cuscod: str = Field(..., description="Customer code")
+    cusnam: Optional[str] = Field(None, description="Customer name")
+    adrone: Optional[str] = Field(None, description="Address line 1")
+    adrtwo: Optional[str] = Field(None, description="Address line 2")
+    phone: Optional[str] = Field(None, description="Phone number")
+
+
+class BillItem(BaseModel):
+    """One line item of a bill"""
+    name: str = Field(..., description="Item name")
+    rate: float = Field(..., description="Item rate")
+    qty: float = Field(..., description="Item quantity")
+    tprice: float = Field(..., description="Total item price")
+    prcostrate: float = Field(..., description="Item cost rate")
+    profit_loss: float = Field(..., description="Profit or loss for the item")
+
+
+class BillDetail(BaseModel):
+    """A bill with its customer, salesman and items"""
+    billdate: date = Field(..., description="Sales date")
+    billno: int = Field(..., description="Bill number")
+    sno: Optional[str] = Field(None, description="Serial number")
+    customer: CustomerInfo
+    salesman: ContactInfo
+    tqty: float = Field(..., description="Total quantity")
+    net: float = Field(..., description="Net amount")
+    items: List[BillItem]
+
+
+class BatchSalesDetailRequest(BaseModel):
+    """Request model for fetching many bills at once"""
+    bills: List[SalesDetailRequest] = Field(..., min_length=1, max_length=200)
+
+
+class BatchSalesDetailResponse(BaseModel):
+    """Bills in request order, with the (fixed) manager given once"""
+    manager: ContactInfo
+    bills: List[BillDetail]
+    missing: List[SalesDetailRequest] = Field(default_factory=list, description="Requested bills that were not found")
+
+
 class ProfitLossSummary(BaseModel):
     """Daily profit and loss summary"""
     total_profit: float = Field(..., description="Total profit for the day")
@@ -118,6 +182,19 @@ class ProfitLossSummary(BaseModel):
         }
 
 
+class ProfitLossDay(ProfitLossSummary):
+    """Profit and loss for one day of a range"""
+    day: date = Field(..., description="Sales date")
+
+
+class ProfitLossSeries(BaseModel):
+    """Per-day profit and loss over a date range, with range totals"""
+    days: List[ProfitLossDay]
+    total_profit: float = Field(..., description="Total profit over the range")
+    total_loss: float = Field(..., description="Total loss over the range")
+    cached_days: int = Field(..., description="Days served from the closed-day cache")
+
+
 @router.post(
     "/sales-details",
     response_model=List[CustomerSalesDetail],
@@ -126,7 +203,11 @@ class ProfitLossSummary(BaseModel):
 )
 async def get_sales_details(
     request: SalesDetailRequest,
-    token: str = Depends(verify_token)
+    http_request: Request,
+    response: Response,
+    format: Optional[str] = Query(None, description="columnar for one array per field, repeated strings dictionary encoded"),
+    token: str = Depends(verify_token_async),
+    db=Depends(get_request_db)
 ):
     """
     Get complete sales details for a specific bill.
@@ -136,48 +217,54 @@ async def get_sales_details(
     - All items in the bill with quantities and prices
     - Bill totals
 
+    format=columnar (or Accept: application/vnd.udayam.columnar+json)
+    returns the rows column by column, with the customer, salesman and
+    manager values that repeat on every item sent once.
+
     **Requires authentication.**
     """
-    connection = None
-    cursor = None
-
     try:
-        connection = get_db()
-        cursor = connection.cursor(dictionary=True)
+        connection = await db.async_connection()
+        await reference_data.refresh_if_due_async(connection)
 
         # Call stored procedure
-        cursor.callproc(
+        results = await async_callproc(
+            connection,
             'get_customer_sales_full_details',
             [request.billdate, request.billno, request.cuscod]
         )
 
-        # Fetch results
-        results = []
-        for result in cursor.stored_results():
-            results = result.fetchall()
-
         if not results:
             raise HTTPException(
                 status_code=404,
                 detail=f"No sales details found for the specified bill."
             )
 
-        # Convert column names to lowercase for Pydantic
+        await reference_data.load_missing_async("CUSMAS", [row['CUSCOD'] for row in results], connection)
+        await reference_data.load_missing_async(
+            "SALMANMAS", [MANAGER_CODE, *(row.get('SMANCOD') for row in results)], connection
+        )
+        manager = salesman_fields(MANAGER_CODE)
+
+        # Convert column names to lowercase for Pydantic, with the customer
+        # and salesmen filled in from the reference cache
         formatted_results = []
         for row in results:
+            customer = customer_fields(row['CUSCOD'])
+            salesman = salesman_fields(row.get('SMANCOD'))
             formatted_row = {
                 'billdate': row['DATE'],
                 'billno': row['BILLNO'],
                 'sno': row.get('SNO'),
                 'cuscod': row['CUSCOD'],
-                'cusnam': row.get('CUSNAM'),
-                'adrone': row.get('ADRONE'),
-                'adrtwo': row.get('ADRTWO'),
-                'phone': row.get('PHONE'),
-                'salmannam': row.get('SALMANNAM'),
-                'salmanphon': row.get('SALMANPHON'),
-                'managername': row.get('MANAGERNAME'),
-                'managerphon': row.get('MANAGERPHON'),
+                'cusnam': customer['CUSNAM'],
+                'adrone': customer['ADRONE'],
+                'adrtwo': customer['ADRTWO'],
+                'phone': customer['PHONE'],
+                'salmannam': salesman['SALMANNAM'],
+                'salmanphon': salesman['SALMANPHON'],
+                'managername': manager['SALMANNAM'],
+                'managerphon': manager['SALMANPHON'],
                 'name': row.get('NAME') or '',
                 'rate': float(row['RATE']) if row['RATE'] else 0.0,
                 'qty': float(row['QTY']) if row['QTY'] else 0.0,
@@ -189,7 +276,10 @@ async def get_sales_details(
             }
             formatted_results.append(formatted_row)
 
-        return formatted_results
+        if wants_columnar(http_request, format):
+            return columnar_response(formatted_results, response)
+
+        return fast_response(formatted_results, response)
 
     except HTTPException:
         raise
@@ -198,72 +288,290 @@ async def get_sales_details(
             status_code=500,
             detail=f"Failed to fetch sales details: {str(e)}"
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
+
+
+def _float(value) -> float:
+    return float(value) if value else 0.0
+
+
+@router.post(
+    "/sales-details/batch",
+    response_model=BatchSalesDetailResponse,
+    summary="Get Sales Details For Many Bills",
+    description="Retrieve the details of up to 200 bills in one round trip"
+)
+async def get_sales_details_batch(
+    request: BatchSalesDetailRequest,
+    response: Response,
+    token: str = Depends(verify_token_async),
+    db=Depends(get_request_db)
+):
+    """
+    Batch variant of POST /api/sales-details.
+
+    All header and item rows are read with one set-based query, the
+    customers, salesmen and manager come from the reference cache instead
+    of being joined onto every item row.
+
+    **Requires authentication.**
+    """
+    keys = list(dict.fromkeys((bill.billdate, bill.billno, bill.cuscod) for bill in request.bills))
+
+    try:
+        connection = await db.async_connection()
+
+        key_placeholders = ", ".join(["(%s, %s, %s)"] * len(keys))
+        rows = await async_fetchall(
+            connection,
+            f"""
+            SELECT
+                t.DATE, t.BILLNO, t.SNO, t.CUSCOD, t.SMANCOD, t.TQTY, t.NET,
+                d.NAME, d.RATE, d.QTY, d.TPRICE, d.PRCOSTRATE,
+                ((d.RATE - d.PRCOSTRATE) * d.QTY) AS PROFIT_LOSS
+            FROM SALTOT t
+            JOIN SALDET d
+                ON d.DATE = t.DATE
+               AND d.BILLNO = t.BILLNO
+               AND d.CUSCOD = t.CUSCOD
+            WHERE (t.DATE, t.BILLNO, t.CUSCOD) IN ({key_placeholders})
+            ORDER BY d.SNO_ID ASC
+            """,
+            [value for key in keys for value in key]
+        )
+
+        bills = {}
+        for row in rows:
+            key = (row['DATE'], row['BILLNO'], row['CUSCOD'])
+            bill = bills.setdefault(key, {
+                'billdate': row['DATE'],
+                'billno': row['BILLNO'],
+                'sno': row.get('SNO'),
+                'cuscod': row['CUSCOD'],
+                'smancod': row.get('SMANCOD'),
+                'tqty': _float(row['TQTY']),
+                'net': _float(row['NET']),
+                'items': []
+            })
+            bill['items'].append({
+                'name': row.get('NAME') or '',
+                'rate': _float(row['RATE']),
+                'qty': _float(row['QTY']),
+                'tprice': _float(row['TPRICE']),
+                'prcostrate': _float(row['PRCOSTRATE']),
+                'profit_loss': _float(row['PROFIT_LOSS'])
+            })
+
+        await reference_data.refresh_if_due_async(connection)
+        await reference_data.load_missing_async("CUSMAS", [bill['cuscod'] for bill in bills.values()], connection)
+        await reference_data.load_missing_async(
+            "SALMANMAS", [MANAGER_CODE, *(bill['smancod'] for bill in bills.values())], connection
+        )
+
+        def contact(code):
+            salesman = salesman_fields(code)
+            return {'name': salesman['SALMANNAM'], 'phone': salesman['SALMANPHON']}
+
+        found = []
+        missing = []
+        for key in keys:
+            bill = bills.get(key)
+            if bill is None:
+                missing.append({'billdate': key[0], 'billno': key[1], 'cuscod': key[2]})
+                continue
+
+            customer = customer_fields(bill['cuscod'])
+            found.append({
+                'billdate': bill['billdate'],
+                'billno': bill['billno'],
+                'sno': bill['sno'],
+                'customer': {
+                    'cuscod': bill['cuscod'],
+                    'cusnam': customer['CUSNAM'],
+                    'adrone': customer['ADRONE'],
+                    'adrtwo': customer['ADRTWO'],
+                    'phone': customer['PHONE']
+                },
+                'salesman': contact(bill['smancod']),
+                'tqty': bill['tqty'],
+                'net': bill['net'],
+                'items': bill['items']
+            })
+
+        return fast_response(
+            {'manager': contact(MANAGER_CODE), 'bills': found, 'missing': missing},
+            response
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch sales details: {str(e)}"
+        )
+
+
+def _summary_row(row):
+    # Convert column names to lowercase for Pydantic, the procedures only
+    # return CUSCOD and the customer comes from the reference cache
+    customer = customer_fields(row['CUSCOD'])
+    return {
+        'billdate': row['DATE'],
+        'billno': row['BILLNO'],
+        'sno': row.get('SNO'),
+        'sno_id': row.get('SNO_ID'),
+        'cuscod': row['CUSCOD'],
+        'cusnam': customer['CUSNAM'],
+        'adrone': customer['ADRONE'],
+        'adrtwo': customer['ADRTWO'],
+        'phone': customer['PHONE'],
+        'tqty': float(row['TQTY']) if row['TQTY'] else 0.0,
+        'net': float(row['NET']) if row['NET'] else 0.0,
+        'total_profit': float(row.get('TOTAL_PROFIT', 0)) if row.get('TOTAL_PROFIT') else 0.0,
+        'total_loss': float(row.get('TOTAL_LOSS', 0)) if row.get('TOTAL_LOSS') else 0.0
+    }
+
+
+def _daily_sales_call(
+    date: Optional[str],
+    limit: Optional[int],
+    after: Optional[int],
+    since: Optional[int]
+):
+    """Procedure and arguments for a full day or one keyset page of it"""
+    if limit is None and after is None and since is None:
+        return 'get_customer_sales_details', [date]
+    return 'get_customer_sales_page', [date, after, limit or settings.SALES_PAGE_SIZE, since]
+
+
+async def _sales_etag(connection, date: Optional[str], *variant) -> str:
+    """
+    Strong ETag from the day's SALES_DAY_VERSION row.
+
+    The SALTOT/SALDET triggers bump it on every insert, update and delete
+    of the day, so this is one primary key lookup whatever the report
+    behind it costs. variant holds whatever else shapes the response body.
+    """
+    row = await async_fetchone(
+        connection,
+        """
+        SELECT
+            d.day,
+            COALESCE(v.version, 0) AS version,
+            v.changed_at
+        FROM (SELECT COALESCE(%s, CURDATE()) AS day) d
+        LEFT JOIN SALES_DAY_VERSION v
+            ON v.DATE = d.day
+        """,
+        (date,)
+    )
+
+    watermark = "|".join(str(value) for value in (*row.values(), *variant))
+    return make_etag(watermark)
+
+
+async def _stream_daily_sales(procname: str, args):
+    # The request connection is returned before the body is sent, so the
+    # stream holds its own for as long as it reads
+    try:
+        async with get_async_db() as connection:
+            async for rows in async_callproc_stream(
+                connection, procname, args, settings.SALES_STREAM_CHUNK_SIZE
+            ):
+                # The connection is busy streaming, new customers are
+                # looked up on another one
+                await reference_data.load_missing_async("CUSMAS", [row['CUSCOD'] for row in rows])
+                yield b"".join(dumps(_summary_row(row)) + b"\n" for row in rows)
+    except Exception as e:
+        # Headers are already sent with a 200, end the stream on a record
+        # the client can tell apart from a bill
+        logger.error(f"Daily sales stream failed: {e}")
+        yield dumps({"error": f"Failed to fetch daily sales summary: {str(e)}"}) + b"\n"
 
 
 @router.get("/current-day-customer-sales", response_model=List[DailySalesSummary])
-async def get_daily_sales_summary(date: Optional[str] = None, token: str = Depends(verify_token)):
+async def get_daily_sales_summary(
+    request: Request,
+    response: Response,
+    date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size, enables keyset pagination"),
+    after: Optional[int] = Query(None, description="SNO_ID cursor from the X-Next-Cursor header of the previous page"),
+    since: Optional[int] = Query(None, description="Only bills with SNO_ID above this, oldest first, e.g. the highest sno_id already seen"),
+    format: Optional[str] = Query(None, description="ndjson to stream one JSON object per line, columnar for one array per field"),
+    token: str = Depends(verify_token_async),
+    db=Depends(get_request_db)
+):
     """
     Get all sales orders for a specific date or current date if not provided.
     Returns a summary list without individual item details.
 
     Args:
         date: Optional date in YYYY-MM-DD format. If not provided, uses current date.
+        limit: Optional page size. The next page's cursor is returned in the
+            X-Next-Cursor header while more bills remain.
+        after: Cursor of the page to fetch.
+        since: Only bills added after this SNO_ID, for delta polling.
+            They come oldest first, a page at a time; while more remain
+            the X-Next-Since header holds the since of the next page.
+            Cannot be combined with after.
+        format: ndjson (or Accept: application/x-ndjson) streams the rows
+            as they are read instead of returning one JSON array. columnar
+            (or Accept: application/vnd.udayam.columnar+json) returns one
+            array per field, with repeated strings dictionary encoded.
+            A stream that fails part way ends with an {"error": ...} line.
+
+    Responses carry an ETag of the day's sales; sending it back in
+    If-None-Match returns 304 without running the report.
     """
-    connection = None
-    cursor = None
+    if after is not None and since is not None:
+        raise HTTPException(status_code=400, detail="Use either after or since, not both")
+
+    procname, args = _daily_sales_call(date, limit, after, since)
+    stream = format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+    columnar = not stream and wants_columnar(request, format)
 
     try:
-        # Get database connection
-        connection = get_db()
-        cursor = connection.cursor(dictionary=True)
+        connection = await db.async_connection()
+
+        etag = await _sales_etag(connection, date, procname, *args[1:], stream, columnar)
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+
+        await reference_data.refresh_if_due_async(connection)
+
+        if stream:
+            return StreamingResponse(
+                _stream_daily_sales(procname, args),
+                media_type="application/x-ndjson",
+                headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+            )
 
         # Call stored procedure to get sales
-        cursor.callproc('get_customer_sales_details', [date])
+        results = await async_callproc(connection, procname, args)
 
-        # Fetch results from the stored procedure
-        results = []
-        for result in cursor.stored_results():
-            results = result.fetchall()
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
 
-        if not results:
+        if not results and not columnar:
             return []  # Return empty list if no sales today
 
-        # Convert column names to lowercase for Pydantic
-        formatted_results = []
-        for row in results:
-            formatted_row = {
-                'billdate': row['DATE'],
-                'billno': row['BILLNO'],
-                'sno': row.get('SNO'),
-                'cuscod': row['CUSCOD'],
-                'cusnam': row.get('CUSNAM'),
-                'adrone': row.get('ADRONE'),
-                'adrtwo': row.get('ADRTWO'),
-                'phone': row.get('PHONE'),
-                'tqty': float(row['TQTY']) if row['TQTY'] else 0.0,
-                'net': float(row['NET']) if row['NET'] else 0.0,
-                'total_profit': float(row.get('TOTAL_PROFIT', 0)) if row.get('TOTAL_PROFIT') else 0.0,
-                'total_loss': float(row.get('TOTAL_LOSS', 0)) if row.get('TOTAL_LOSS') else 0.0
-            }
-            formatted_results.append(formatted_row)
+        await reference_data.load_missing_async("CUSMAS", [row['CUSCOD'] for row in results], connection)
+
+        with phase("map"):
+            formatted_results = [_summary_row(row) for row in results]
 
-        return formatted_results
+        if procname == 'get_customer_sales_page' and len(results) == args[2]:
+            next_header = "X-Next-Cursor" if since is None else "X-Next-Since"
+            response.headers[next_header] = str(results[-1]['SNO_ID'])
+
+        if columnar:
+            return columnar_response(formatted_results, response)
+
+        return fast_response(formatted_results, response)
 
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch daily sales summary: {str(e)}"
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
 
 
 @router.get(
@@ -272,7 +580,13 @@ async def get_daily_sales_summary(date: Optional[str] = None, token: str = Depen
     summary="Get Daily Profit and Loss",
     description="Retrieve profit and loss summary for a specific date or today's sales"
 )
-async def get_profit_loss(date: Optional[str] = None, token: str = Depends(verify_token)):
+async def get_profit_loss(
+    request: Request,
+    response: Response,
+    date: Optional[str] = None,
+    token: str = Depends(verify_token_async),
+    db=Depends(get_request_db)
+):
     """
     Get profit and loss summary for a specific date or today's sales.
 
@@ -283,22 +597,22 @@ async def get_profit_loss(date: Optional[str] = None, token: str = Depends(verif
     - Total profit for the day
     - Total loss for the day
 
+    Supports If-None-Match with the returned ETag like the daily sales list.
+
     **Requires authentication.**
     """
-    connection = None
-    cursor = None
-
     try:
-        connection = get_db()
-        cursor = connection.cursor(dictionary=True)
+        connection = await db.async_connection()
+
+        etag = await _sales_etag(connection, date, 'get_profit_loss')
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
 
         # Call stored procedure with date parameter
-        cursor.callproc('get_profit_loss', [date])
+        results = await async_callproc(connection, 'get_profit_loss', [date])
 
-        # Fetch results
-        results = []
-        for result in cursor.stored_results():
-            results = result.fetchall()
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
 
         if not results or len(results) == 0:
             # Return zeros if no data
@@ -320,8 +634,85 @@ async def get_profit_loss(date: Optional[str] = None, token: str = Depends(verif
             status_code=500,
             detail=f"Failed to fetch profit/loss data: {str(e)}"
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
+
+
+@router.get(
+    "/profit-loss/range",
+    response_model=ProfitLossSeries,
+    summary="Get Profit and Loss Series",
+    description="Retrieve per-day profit and loss between two dates"
+)
+async def get_profit_loss_range(
+    start: date,
+    end: date,
+    token: str = Depends(verify_token_async),
+    db=Depends(get_request_db)
+):
+    """
+    Per-day profit and loss between start and end (inclusive).
+
+    Days before today are served from the closed-day cache once they have
+    been computed, only the uncached days and today go to the database, in
+    one grouped query. Days after today are returned as zeros.
+
+    **Requires authentication.**
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > settings.PROFIT_LOSS_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {settings.PROFIT_LOSS_MAX_DAYS} days"
+        )
+
+    try:
+        connection = await db.async_connection()
+
+        # Today by the database clock, the same CURDATE() get_profit_loss uses
+        today = (await async_fetchone(connection, "SELECT CURDATE() AS today"))['today']
+
+        closed_end = min(end, today - timedelta(days=1))
+        closed_days = date_range(start, closed_end) if start <= closed_end else []
+        cached = profit_loss_days.get_range(start, closed_end) if closed_days else {}
+        uncached = [day for day in closed_days if day not in cached]
+
+        # One contiguous range covers the uncached closed days and today
+        query_start = uncached[0] if uncached else today
+        query_end = today if start <= today <= end else (uncached[-1] if uncached else None)
+
+        computed = {}
+        if query_end is not None and query_start <= query_end:
+            for row in await async_callproc(connection, 'get_profit_loss_range', [query_start, query_end]):
+                computed[row['day']] = (
+                    Decimal(row['total_profit'] or 0),
+                    Decimal(row['total_loss'] or 0)
+                )
+
+        # Closed days without sales are cached as zeros too
+        zero = (Decimal(0), Decimal(0))
+        profit_loss_days.put_many({day: computed.get(day, zero) for day in uncached})
+
+        days = []
+        total_profit = total_loss = Decimal(0)
+        for day in date_range(start, end):
+            profit, loss = cached.get(day) or computed.get(day, zero)
+            total_profit += profit
+            total_loss += loss
+            days.append({
+                'day': day,
+                'total_profit': float(profit),
+                'total_loss': float(loss)
+            })
+
+        return {
+            'days': days,
+            'total_profit': float(total_profit),
+            'total_loss': float(total_loss),
+            'cached_days': len(cached)
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch profit/loss data: {str(e)}"
+        )
@@ -0,0 +1,64 @@
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import List
+from database import get_request_db
+from stock_ledger import get_stock_valuation
+from auth_utils import verify_token
+
+router = APIRouter(prefix="/api", tags=["stock"])
+
+
+class StockItem(BaseModel):
+    """Closing stock of one production item"""
+    itec: str = Field(..., description="Item code")
+    opening_qty: float = Field(..., description="Opening quantity (PRSTKMAS)")
+    purchased_qty: float = Field(..., description="Quantity purchased")
+    sold_qty: float = Field(..., description="Quantity sold, expanded through pack structure")
+    closing_qty: float = Field(..., description="Opening + purchased - sold")
+    rate: float = Field(..., description="Item rate")
+    value: float = Field(..., description="Closing quantity at rate")
+
+
+class StockValuation(BaseModel):
+    """Production closing stock valuation"""
+    total_value: float = Field(..., description="PRODUCTION CLOSING STOCK VALUE")
+    items: List[StockItem]
+
+
+@router.get(
+    "/stock-valuation",
+    response_model=StockValuation,
+    summary="Get Production Stock Valuation",
+    description="Production closing stock per item without running the trial balance"
+)
+def stock_valuation(
+    current_user: dict = Depends(verify_token),
+    conn=Depends(get_request_db)
+):
+    try:
+        items = []
+        # Quantities and values come from MySQL as Decimal, the total is
+        # kept exact and only the response is converted to float
+        total_value = Decimal("0")
+
+        for row in get_stock_valuation(conn):
+            total_value += row["STOCK_VALUE"]
+
+            items.append({
+                "itec": row["ITEC"],
+                "opening_qty": float(row["OQTY"]),
+                "purchased_qty": float(row["PUR_QTY"]),
+                "sold_qty": float(row["SALE_QTY"]),
+                "closing_qty": float(row["CLOSING_QTY"]),
+                "rate": float(row["RATE"]),
+                "value": float(row["STOCK_VALUE"])
+            })
+
+        return {"total_value": float(total_value), "items": items}
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch stock valuation: {str(e)}"
+        )
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from database import get_db
+from database import get_request_db
 from auth_utils import create_access_token, create_refresh_token
 from jose import jwt, JWTError
 from config import settings
@@ -11,7 +11,7 @@ class RefreshRequest(BaseModel):
     refresh_token: str
 
 @router.post("/refresh")
-def refresh_token(payload: RefreshRequest, conn=Depends(get_db)):
+def refresh_token(payload: RefreshRequest, conn=Depends(get_request_db)):
     cursor = None
     try:
         decoded = jwt.decode(
@@ -54,5 +54,3 @@ def refresh_token(payload: RefreshRequest, conn=Depends(get_db)):
     finally:
         if cursor:
             cursor.close()
-        if conn:
-            conn.close()
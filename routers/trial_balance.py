@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 from typing import List
 from datetime import date
-from database import get_db
+from config import settings
+from database import get_request_db, map_on_connections, callproc, current_date
+from payroll import get_salary_balance
+from fast_json import fast_response
+from request_timing import phase
+from reference_cache import reference_data
+from report_cache import trial_balance_cache, get_data_watermark, SHOP_TABLES
 from auth_utils import verify_token # type: ignore
 
 router = APIRouter(prefix="/api", tags=["trial-balance"])
+logger = logging.getLogger(__name__)
 
 class TrialBalanceRequest(BaseModel):
     companyIds: List[str]  # Company codes as strings
@@ -26,90 +34,138 @@ class CompanyReport(BaseModel):
     period: dict
     rows: List[TrialBalanceRow]
 
-@router.post("/trial-balance")
-def get_trial_balance(
-    request: TrialBalanceRequest,
-    current_user: dict = Depends(verify_token)
-):
-    conn = get_db()
-    companies_data = []
+def _company_report(conn, company_code: str, request: TrialBalanceRequest, salary_balance):
+    cursor = conn.cursor(dictionary=True)
+    rows = []
 
     try:
-        for company_code in request.companyIds:
-            cursor = conn.cursor(dictionary=True)
-            rows = []
-
-            try:
-                # FIRST: Fetch company-specific SCGRPCOD and SDGRPCOD
-                cursor.execute(
-                    "SELECT FIRNAME, SCGRPCOD, SDGRPCOD FROM FIRMASN WHERE FIRCOD = %s LIMIT 1",
-                    (company_code,)
-                )
-                company_info = cursor.fetchone()
-
-                if not company_info:
-                    continue  # Skip if company not found
-
-                company_name = company_info["FIRNAME"]
-                scgrpcod = company_info["SCGRPCOD"] or ""
-                sdgrpcod = company_info["SDGRPCOD"] or ""
-
-                # Call stored procedure with company-specific codes
-                cursor.callproc(
-                    "get_trial_balance_shop",
-                    [company_code, scgrpcod, sdgrpcod, request.startDate, request.endDate]
-                )
-
-                # Commit the transaction to persist TRUNCATE/INSERT operations
-                conn.commit()
-
-                for result in cursor.stored_results():
-                    for row in result.fetchall():
-                        category = row.get("category")
-                        amount = float(row.get("amount") or 0)
-                        acc_type = row.get("type")
-
-                        debit = credit = balance = 0.0
-
-                        if acc_type == "ASSET":
-                            debit = amount
-                            balance = amount
-                        elif acc_type == "LIABILITY":
-                            credit = amount
-                            if category == "NET TOTAL":
-                                balance = -abs(amount)
-                            else:
-                                balance = amount
-                        elif acc_type == "NET":
-                            if amount >= 0:
-                                balance = amount   # Profit
-                            else:
-                                balance = -abs(amount)  # Loss
-
-                        rows.append({
-                            "accountName": category,
-                            "accountType": acc_type,
-                            "debit": debit,
-                            "credit": credit,
-                            "balance": balance
-                        })
-
-                companies_data.append({
-                    "companyId": company_code,
-                    "companyName": company_name,
-                    "period": {
-                        "start": str(request.startDate),
-                        "end": str(request.endDate)
-                    },
-                    "rows": rows,
+        # FIRST: Company-specific SCGRPCOD and SDGRPCOD from the FIRMASN cache
+        company_info = reference_data.get("FIRMASN", company_code)
+
+        if not company_info:
+            return None  # Skip if company not found
+
+        company_name = company_info["FIRNAME"]
+        scgrpcod = company_info["SCGRPCOD"] or ""
+        sdgrpcod = company_info["SDGRPCOD"] or ""
+
+        # Call stored procedure with company-specific codes
+        results = callproc(
+            cursor,
+            "get_trial_balance_shop",
+            [company_code, scgrpcod, sdgrpcod, request.startDate, request.endDate, salary_balance]
+        )
+
+        with phase("map"):
+            for row in results:
+                category = row.get("category")
+                amount = float(row.get("amount") or 0)
+                acc_type = row.get("type")
+
+                debit = credit = balance = 0.0
+
+                if acc_type == "ASSET":
+                    debit = amount
+                    balance = amount
+                elif acc_type == "LIABILITY":
+                    credit = amount
+                    if category == "NET TOTAL":
+                        balance = -abs(amount)
+                    else:
+                        balance = amount
+                elif acc_type == "NET":
+                    if amount >= 0:
+                        balance = amount   # Profit
+                    else:
+                        balance = -abs(amount)  # Loss
+
+                rows.append({
+                    "accountName": category,
+                    "accountType": acc_type,
+                    "debit": debit,
+                    "credit": credit,
+                    "balance": balance
                 })
 
-            finally:
-                cursor.close()
+        return {
+            "companyId": company_code,
+            "companyName": company_name,
+            "period": {
+                "start": str(request.startDate),
+                "end": str(request.endDate)
+            },
+            "rows": rows,
+        }
+
+    finally:
+        cursor.close()
+
+
+def _compute_reports(conn, request: TrialBalanceRequest, company_codes: List[str], today: date):
+    # Salary balance does not depend on the company, compute it once
+    salary_balance = get_salary_balance(conn, today)
+
+    # Companies run concurrently on their own pooled connections, a
+    # failing company is reported in its own entry
+    reports = map_on_connections(
+        lambda worker_conn, company_code: _company_report(
+            worker_conn, company_code, request, salary_balance
+        ),
+        company_codes,
+        max_workers=settings.TRIAL_BALANCE_CONCURRENCY,
+        conn=conn,
+        return_exceptions=True,
+    )
+
+    companies_data = {}
+    for company_code, report in zip(company_codes, reports):
+        if isinstance(report, Exception):
+            logger.error(f"Trial balance failed for {company_code}: {report}")
+            report = {
+                "companyId": company_code,
+                "period": {
+                    "start": str(request.startDate),
+                    "end": str(request.endDate)
+                },
+                "rows": [],
+                "error": f"Database error: {str(report)}",
+            }
+        companies_data[company_code] = report
+
+    return companies_data
+
+
+def build_trial_balance(conn, request: TrialBalanceRequest):
+    """Company entries in request order and the report cache status"""
+    reference_data.refresh_if_due(conn)
+
+    # Salary balance moves with the calendar day as well, the server's day
+    # like the procedure's CURDATE()
+    today = current_date(conn)
+    watermark = get_data_watermark(conn, SHOP_TABLES)
+    if watermark is not None:
+        watermark += (str(today),)
+
+    return trial_balance_cache.fetch(
+        "shop",
+        request.companyIds,
+        request.startDate,
+        request.endDate,
+        watermark,
+        lambda company_codes: _compute_reports(conn, request, company_codes, today),
+    )
 
-        return {"companies": companies_data}
+
+@router.post("/trial-balance")
+def get_trial_balance(
+    request: TrialBalanceRequest,
+    response: Response,
+    current_user: dict = Depends(verify_token),
+    conn=Depends(get_request_db)
+):
+    try:
+        companies_data, cache_status = build_trial_balance(conn, request)
+        return fast_response({"companies": companies_data, "cache": cache_status}, response)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    finally:
-        conn.close()
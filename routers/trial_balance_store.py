@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 from typing import List
 from datetime import date
-from database import get_db
+from config import settings
+from database import get_request_db, map_on_connections, callproc
+from ledger import store_trial_balance_results
+from fast_json import fast_response
+from request_timing import phase
+from reference_cache import reference_data
+from report_cache import trial_balance_cache, get_data_watermark, STORE_TABLES
 from auth_utils import verify_token # type: ignore
 
 router = APIRouter(prefix="/api", tags=["trial-balance"])
+logger = logging.getLogger(__name__)
 
 
 class TrialBalanceRequest(BaseModel):
@@ -27,81 +35,161 @@ class CompanyReport(BaseModel):
     period: dict
     rows: List[TrialBalanceRow]
 
+def _build_rows(results):
+    rows = []
+
+    for row in results:
+        category = row.get("category")
+        amount = float(row.get("amount") or 0)
+        acc_type = row.get("type")
+
+        debit = credit = balance = 0.0
+
+        if acc_type == "ASSET":
+            debit = amount
+            balance = amount
+        elif acc_type == "LIABILITY":
+            credit = abs(amount)
+            if category == "NET PROFIT":
+                balance = -abs(amount)
+            else:
+                balance = abs(amount)
+
+        rows.append({
+            "accountName": category,
+            "accountType": acc_type,
+            "debit": debit,
+            "credit": credit,
+            "balance": balance
+        })
+
+    return rows
+
+
+def _company_entry(company_code: str, company_name: str, request: TrialBalanceRequest, rows):
+    return {
+        "companyId": company_code,
+        "companyName": company_name,
+        "period": {
+            "start": str(request.startDate),
+            "end": str(request.endDate)
+        },
+        "rows": rows,
+    }
+
+
+def _company_report(conn, company_code: str, request: TrialBalanceRequest):
+    cursor = conn.cursor(dictionary=True)
+    rows = []
+
+    try:
+        company_info = reference_data.get("FIRMASN", company_code)
+
+        if not company_info:
+            return None
+
+        company_name = company_info["FIRNAME"]
+        scgrpcod = company_info["SCGRPCOD"] or ""
+        sdgrpcod = company_info["SDGRPCOD"] or ""
+
+        # Call stored procedure with company-specific codes
+        results = callproc(
+            cursor,
+            "get_trial_balance_shop_store",
+            [company_code, scgrpcod, sdgrpcod, request.startDate, request.endDate]
+        )
+
+        with phase("map"):
+            rows.extend(_build_rows(results))
+
+        return _company_entry(company_code, company_name, request, rows)
+
+    finally:
+        cursor.close()
+
+
+def _batch_reports(conn, request: TrialBalanceRequest, company_codes: List[str]):
+    """All companies from one pass over the ledger instead of one procedure call each"""
+    codes = list(dict.fromkeys(company_codes))
+    if not codes:
+        return {}
+
+    companies = reference_data.get_many("FIRMASN", codes)
+
+    results = store_trial_balance_results(
+        conn, companies, request.startDate, request.endDate
+    )
+
+    with phase("map"):
+        return {
+            company_code: _company_entry(
+                company_code,
+                company_info["FIRNAME"],
+                request,
+                _build_rows(results[company_code]),
+            )
+            for company_code, company_info in companies.items()
+        }
+
+
+def _compute_reports(conn, request: TrialBalanceRequest, company_codes: List[str]):
+    if settings.TRIAL_BALANCE_BATCH:
+        reports = _batch_reports(conn, request, company_codes)
+        return {code: reports.get(code) for code in company_codes}
+
+    # Companies run concurrently on their own pooled connections, a
+    # failing company is reported in its own entry
+    reports = map_on_connections(
+        lambda worker_conn, company_code: _company_report(worker_conn, company_code, request),
+        company_codes,
+        max_workers=settings.TRIAL_BALANCE_CONCURRENCY,
+        conn=conn,
+        return_exceptions=True,
+    )
+
+    companies_data = {}
+    for company_code, report in zip(company_codes, reports):
+        if isinstance(report, Exception):
+            logger.error(f"Trial balance store failed for {company_code}: {report}")
+            report = {
+                "companyId": company_code,
+                "period": {
+                    "start": str(request.startDate),
+                    "end": str(request.endDate)
+                },
+                "rows": [],
+                "error": f"Database error: {str(report)}",
+            }
+        companies_data[company_code] = report
+
+    return companies_data
+
+
+def build_trial_balance(conn, request: TrialBalanceRequest):
+    """Company entries in request order and the report cache status"""
+    reference_data.refresh_if_due(conn)
+    watermark = get_data_watermark(conn, STORE_TABLES)
+
+    return trial_balance_cache.fetch(
+        "store",
+        request.companyIds,
+        request.startDate,
+        request.endDate,
+        watermark,
+        lambda company_codes: _compute_reports(conn, request, company_codes),
+    )
+
+
 @router.post("/trial-balance-store")
 def get_trial_balance(
     request: TrialBalanceRequest,
-    current_user: dict = Depends(verify_token)
+    response: Response,
+    current_user: dict = Depends(verify_token),
+    conn=Depends(get_request_db)
 ):
-    conn = get_db()
-    companies_data = []
-
     try:
-        for company_code in request.companyIds:
-            cursor = conn.cursor(dictionary=True)
-            rows = []
-
-            try:
-                cursor.execute(
-                    "SELECT FIRNAME, SCGRPCOD, SDGRPCOD FROM FIRMASN WHERE FIRCOD = %s LIMIT 1",
-                    (company_code,)
-                )
-                company_info = cursor.fetchone()
-
-                if not company_info:
-                    continue
-
-                company_name = company_info["FIRNAME"]
-                scgrpcod = company_info["SCGRPCOD"] or ""
-                sdgrpcod = company_info["SDGRPCOD"] or ""
-
-                # Call stored procedure with company-specific codes
-                cursor.callproc(
-                    "get_trial_balance_shop_store",
-                    [company_code, scgrpcod, sdgrpcod, request.startDate, request.endDate]
-                )
-
-                for result in cursor.stored_results():
-                    for row in result.fetchall():
-                        category = row.get("category")
-                        amount = float(row.get("amount") or 0)
-                        acc_type = row.get("type")
-
-                        debit = credit = balance = 0.0
-
-                        if acc_type == "ASSET":
-                            debit = amount
-                            balance = amount
-                        elif acc_type == "LIABILITY":
-                            credit = abs(amount)
-                            if category == "NET PROFIT":
-                                balance = -abs(amount)
-                            else:
-                                balance = abs(amount)
-
-                        rows.append({
-                            "accountName": category,
-                            "accountType": acc_type,
-                            "debit": debit,
-                            "credit": credit,
-                            "balance": balance
-                        })
-
-                companies_data.append({
-                    "companyId": company_code,
-                    "companyName": company_name,
-                    "period": {
-                        "start": str(request.startDate),
-                        "end": str(request.endDate)
-                    },
-                    "rows": rows,
-                })
-
-            finally:
-                cursor.close()
-
-        return {"companies": companies_data}
+        companies_data, cache_status = build_trial_balance(conn, request)
+        return fast_response({"companies": companies_data, "cache": cache_status}, response)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    finally:
-        conn.close()
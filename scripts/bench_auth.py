@@ -0,0 +1,84 @@
+"""
+Per-request overhead of verify_token, with and without the revocation cache.
+
+The database is replaced by a connection whose queries sleep for
+--db-latency-ms, roughly one RDS round trip from Lambda. The "before" run
+refreshes the revocation set on every call, which is one query per request
+just like the old inline SELECT; the "after" run uses the configured
+refresh interval.
+
+Usage:
+    JWT_SECRET=... python scripts/bench_auth.py --iterations 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from auth_utils import create_access_token, verify_token  # noqa: E402
+from token_cache import revoked_tokens  # noqa: E402
+
+
+class _LatencyCursor:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def execute(self, query, params=None):
+        time.sleep(self.latency)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class _LatencyConnection:
+    def __init__(self, latency):
+        self.latency = latency
+        self.queries = 0
+
+    def cursor(self, *args, **kwargs):
+        self.queries += 1
+        return _LatencyCursor(self.latency)
+
+
+def bench(label, refresh_seconds, iterations, latency):
+    revoked_tokens.refresh_seconds = refresh_seconds
+    revoked_tokens._refreshed_at = None
+
+    conn = _LatencyConnection(latency)
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer",
+        credentials=create_access_token({"user_id": 1, "role": "user"}),
+    )
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(credentials, conn)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<7} {elapsed / iterations * 1e6:9.1f} us/request"
+        f"  ({conn.queries} queries for {iterations} requests)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    latency = args.db_latency_ms / 1000
+    refresh_seconds = revoked_tokens.refresh_seconds
+
+    bench("before", 0, args.iterations, latency)
+    bench("after", refresh_seconds, args.iterations, latency)
+
+
+if __name__ == "__main__":
+    main()
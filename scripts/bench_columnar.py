@@ -0,0 +1,84 @@
+"""
+Payload size and client parse time, row JSON vs format=columnar.
+
+Encodes synthetic daily sales rows and a large bill's detail rows both
+ways, then reports raw and gzip sizes and the time to json.loads the body
+and, for columnar, to rebuild the row dicts a client would use. No
+database is needed.
+
+Usage:
+    python scripts/bench_columnar.py --bills 5000 --items 40
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from columnar import to_columnar  # noqa: E402
+from fast_json import dumps  # noqa: E402
+from bench_serialization import sales_rows  # noqa: E402
+from bench_compression import bill_detail_rows  # noqa: E402
+
+
+def from_columnar(body: dict):
+    columns = []
+    for name, column in body["columns"].items():
+        if isinstance(column, dict):
+            dictionary = column["dictionary"]
+            column = [None if index is None else dictionary[index] for index in column["indices"]]
+        columns.append((name, column))
+
+    return [
+        {name: column[n] for name, column in columns}
+        for n in range(body["length"])
+    ]
+
+
+def best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bills", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=40, help="items on the detailed bill")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = [
+        (f"daily sales ({args.bills} bills)", json.loads(dumps(sales_rows(args.bills)))),
+        (f"bill details ({args.items} items)", bill_detail_rows(random.Random(42), args.items)),
+    ]
+
+    print(f"best of {args.repeat}")
+    for name, rows in payloads:
+        row_body = dumps(rows)
+        columnar_body = dumps(to_columnar(rows))
+
+        row_parse, _ = best_of(lambda: json.loads(row_body), args.repeat)
+        columnar_parse, decoded = best_of(lambda: json.loads(columnar_body), args.repeat)
+        rebuild, rebuilt = best_of(lambda: from_columnar(decoded), args.repeat)
+
+        print(f"\n{name}")
+        print(f"  {'':10} {'bytes':>10} {'gzip':>9} {'parse ms':>9}")
+        print(f"  {'rows':10} {len(row_body):>10} {len(gzip.compress(row_body)):>9} {row_parse * 1000:>9.2f}")
+        print(f"  {'columnar':10} {len(columnar_body):>10} {len(gzip.compress(columnar_body)):>9} "
+              f"{columnar_parse * 1000:>9.2f}  (+{rebuild * 1000:.2f} ms to rebuild rows)")
+        print(f"  round trip identical: {rebuilt == json.loads(row_body)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Wire size and CPU cost of response compression per endpoint.
+
+Encodes a synthetic payload shaped like each endpoint's response the way
+the API does (fast_json) and compresses it with the middleware's gzip and
+brotli settings (GZIP_LEVEL, BROTLI_QUALITY from the environment/.env).
+The NDJSON row is compressed chunk by chunk like the streamed response.
+No database is needed.
+
+Usage:
+    python scripts/bench_compression.py --bills 300
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from compression import Compressor, brotli, compress  # noqa: E402
+from config import settings  # noqa: E402
+from fast_json import dumps  # noqa: E402
+from bench_serialization import sales_rows, trial_balance_payload  # noqa: E402
+
+
+def bill_items(rng, count):
+    return [
+        {
+            "name": f"ITEM {rng.randrange(2000)} 500G PKT",
+            "rate": float(rng.randint(10, 900)),
+            "qty": float(rng.randint(1, 12)),
+            "tprice": float(rng.randint(10, 9000)),
+            "prcostrate": float(rng.randint(8, 850)),
+            "profit_loss": round(rng.uniform(-20, 200), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+def bill_detail_rows(rng, items):
+    # POST /api/sales-details repeats the header on every item row
+    header = {
+        "billdate": "2026-01-15", "billno": 26207, "sno": "1", "cuscod": "B0020",
+        "cusnam": "John Doe", "adrone": "123 Gandhi Road, Near Bus Stand", "adrtwo": "Tiruchirappalli",
+        "phone": "9876543210", "salmannam": "Ravi", "salmanphon": "9876500000",
+        "managername": "Arul", "managerphon": "9876511111", "tqty": 24.0, "net": 5230.5,
+    }
+    return [{**header, **item} for item in bill_items(rng, items)]
+
+
+def batch_payload(rng, bills, items):
+    return {
+        "manager": {"name": "Arul", "phone": "9876511111"},
+        "bills": [
+            {
+                "billdate": "2026-01-15", "billno": 26000 + n, "sno": "1",
+                "customer": {
+                    "cuscod": f"B{n:04d}", "cusnam": f"Customer {n}",
+                    "adrone": "123 Gandhi Road, Near Bus Stand", "adrtwo": "Tiruchirappalli", "phone": "9876543210",
+                },
+                "salesman": {"name": "Ravi", "phone": "9876500000"},
+                "tqty": 24.0, "net": 5230.5,
+                "items": bill_items(rng, items),
+            }
+            for n in range(bills)
+        ],
+        "missing": [],
+    }
+
+
+def profit_loss_range(rng, days):
+    start = date(2026, 1, 1)
+    series = [
+        {"day": (start + timedelta(days=n)).isoformat(), "total_profit": round(rng.uniform(0, 90000), 2),
+         "total_loss": round(rng.uniform(0, 900), 2)}
+        for n in range(days)
+    ]
+    return {"days": series, "total_profit": 0.0, "total_loss": 0.0, "cached_days": days - 1}
+
+
+def companies(count):
+    return [
+        {"SNO_ID": n, "FIRCOD_ID": f"{n}", "FIRCOD": f"F{n:03d}", "FIRNAME": f"Udayam Stores Branch {n}",
+         "SCGRPCOD": "SC01", "SDGRPCOD": "SD01"}
+        for n in range(count)
+    ]
+
+
+def best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def streamed(chunks, encoding):
+    compressor = Compressor(encoding)
+    return b"".join(compressor.compress(chunk) for chunk in chunks) + compressor.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bills", type=int, default=300, help="bills in a day")
+    parser.add_argument("--items", type=int, default=8, help="items per bill")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    daily = sales_rows(args.bills)
+    chunk = settings.SALES_STREAM_CHUNK_SIZE
+    ndjson_chunks = [
+        b"".join(dumps(row) + b"\n" for row in daily[n:n + chunk])
+        for n in range(0, len(daily), chunk)
+    ]
+
+    endpoints = [
+        ("GET /api/current-day-customer-sales", [dumps(daily)]),
+        ("  ... format=ndjson (streamed)", ndjson_chunks),
+        ("POST /api/sales-details", [dumps(bill_detail_rows(rng, args.items))]),
+        ("POST /api/sales-details/batch (50)", [dumps(batch_payload(rng, 50, args.items))]),
+        ("POST /api/trial-balance (10 firms)", [dumps(trial_balance_payload(90))]),
+        ("GET /api/profit-loss/range (30d)", [dumps(profit_loss_range(rng, 30))]),
+        ("GET /api/companies", [dumps(companies(12))]),
+    ]
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+
+    print(f"gzip level {settings.GZIP_LEVEL}, brotli quality {settings.BROTLI_QUALITY}, "
+          f"min size {settings.COMPRESSION_MIN_SIZE} bytes, best of {args.repeat}\n")
+    print(f"{'endpoint':38} {'raw':>9}" + "".join(f" {e + ' bytes':>11} {e + ' ms':>8}" for e in encodings))
+
+    for name, chunks in endpoints:
+        raw = sum(len(c) for c in chunks)
+        line = f"{name:38} {raw:>9}"
+
+        for encoding in encodings:
+            if len(chunks) > 1:
+                elapsed, body = best_of(lambda: streamed(chunks, encoding), args.repeat)
+            elif raw < settings.COMPRESSION_MIN_SIZE:
+                elapsed, body = 0.0, chunks[0]
+            else:
+                elapsed, body = best_of(lambda: compress(chunks[0], encoding), args.repeat)
+            line += f" {len(body):>11} {elapsed * 1000:>8.2f}"
+
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
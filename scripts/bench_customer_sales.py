@@ -0,0 +1,184 @@
+"""
+Benchmark of the daily customer sales summary query, old vs grouped.
+
+Builds a scratch schema with one synthetic day of SALTOT/SALDET/CUSMAS rows
+and times the former correlated-subquery SELECT of
+get_customer_sales_details against the single grouped pass it now uses.
+Both must return the same rows.
+
+Uses the DB_HOST/DB_USER/DB_PASSWORD credentials from .env; the user needs
+CREATE/DROP rights on the scratch schema.
+
+Usage:
+    python scripts/bench_customer_sales.py --bills 5000 --items 6
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mysql.connector  # noqa: E402
+from database import get_db_credentials  # noqa: E402
+
+OLD_QUERY = """
+    SELECT
+        s.DATE, s.BILLNO, s.SNO, s.CUSCOD, s.TQTY,
+        c.CUSNAM, c.ADRONE, c.ADRTWO, c.PHONE, s.NET,
+        COALESCE(
+            (SELECT SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) > 0
+                         THEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE)
+                         ELSE 0 END)
+             FROM SALDET d
+             WHERE d.BILLNO = s.BILLNO AND d.DATE = s.DATE), 0
+        ) AS TOTAL_PROFIT,
+        COALESCE(
+            (SELECT SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) < 0
+                         THEN ABS((d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE))
+                         ELSE 0 END)
+             FROM SALDET d
+             WHERE d.BILLNO = s.BILLNO AND d.DATE = s.DATE), 0
+        ) AS TOTAL_LOSS
+    FROM SALTOT s
+    LEFT JOIN CUSMAS c ON c.CUSCOD = s.CUSCOD
+    WHERE s.DATE = %s
+    ORDER BY s.SNO_ID DESC
+"""
+
+NEW_QUERY = """
+    SELECT
+        s.DATE, s.BILLNO, s.SNO, s.CUSCOD, s.TQTY,
+        c.CUSNAM, c.ADRONE, c.ADRTWO, c.PHONE, s.NET,
+        COALESCE(pl.TOTAL_PROFIT, 0) AS TOTAL_PROFIT,
+        COALESCE(pl.TOTAL_LOSS, 0) AS TOTAL_LOSS
+    FROM SALTOT s
+    LEFT JOIN CUSMAS c ON c.CUSCOD = s.CUSCOD
+    LEFT JOIN (
+        SELECT
+            d.BILLNO,
+            SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) > 0
+                     THEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE)
+                     ELSE 0 END) AS TOTAL_PROFIT,
+            SUM(CASE WHEN (d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE) < 0
+                     THEN ABS((d.QTY * d.RATE) - (d.QTY * d.PRCOSTRATE))
+                     ELSE 0 END) AS TOTAL_LOSS
+        FROM SALDET d
+        WHERE d.DATE = %s
+        GROUP BY d.BILLNO
+    ) pl ON pl.BILLNO = s.BILLNO
+    WHERE s.DATE = %s
+    ORDER BY s.SNO_ID DESC
+"""
+
+SCHEMA = [
+    """
+    CREATE TABLE CUSMAS (
+        CUSCOD VARCHAR(5) PRIMARY KEY,
+        CUSNAM VARCHAR(100), ADRONE VARCHAR(100), ADRTWO VARCHAR(100), PHONE VARCHAR(20)
+    )
+    """,
+    """
+    CREATE TABLE SALTOT (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        DATE DATE, BILLNO INT, SNO VARCHAR(10), CUSCOD VARCHAR(5),
+        SMANCOD VARCHAR(5), TQTY DECIMAL(12,3), NET DECIMAL(12,2),
+        INDEX idx_saltot_bill (DATE, BILLNO, CUSCOD)
+    )
+    """,
+    """
+    CREATE TABLE SALDET (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        DATE DATE, BILLNO INT, CUSCOD VARCHAR(5), NAME VARCHAR(100),
+        RATE DECIMAL(12,2), QTY DECIMAL(12,3), TPRICE DECIMAL(12,2), PRCOSTRATE DECIMAL(12,2),
+        INDEX idx_saldet_bill (DATE, BILLNO, CUSCOD)
+    )
+    """,
+]
+
+
+def populate(cursor, day: date, bills: int, items: int, customers: int):
+    rng = random.Random(42)
+
+    cursor.executemany(
+        "INSERT INTO CUSMAS VALUES (%s, %s, %s, %s, %s)",
+        [
+            (f"B{n:04d}", f"Customer {n}", f"{n} Main Street", "Town", f"98{n:08d}")
+            for n in range(customers)
+        ],
+    )
+
+    for billno in range(1, bills + 1):
+        cuscod = f"B{rng.randrange(customers):04d}"
+        lines = []
+        for _ in range(rng.randint(1, items * 2 - 1)):
+            rate = rng.randint(50, 500)
+            cost = rate * rng.uniform(0.8, 1.1)
+            qty = rng.randint(1, 20)
+            lines.append((day, billno, cuscod, "Item", rate, qty, rate * qty, round(cost, 2)))
+
+        cursor.executemany(
+            "INSERT INTO SALDET (DATE, BILLNO, CUSCOD, NAME, RATE, QTY, TPRICE, PRCOSTRATE) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            lines,
+        )
+        cursor.execute(
+            "INSERT INTO SALTOT (DATE, BILLNO, SNO, CUSCOD, TQTY, NET) VALUES (%s, %s, %s, %s, %s, %s)",
+            (day, billno, "1", cuscod, sum(l[5] for l in lines), sum(l[6] for l in lines)),
+        )
+
+
+def timed(cursor, query, params, repeat):
+    best = None
+    rows = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--schema", default="udayam_bench_sales")
+    parser.add_argument("--bills", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=6, help="average lines per bill")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    creds = get_db_credentials()
+    conn = mysql.connector.connect(host=creds["host"], user=creds["user"], password=creds["password"])
+    cursor = conn.cursor()
+    day = date(2026, 1, 15)
+
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS {args.schema}")
+        cursor.execute(f"CREATE DATABASE {args.schema}")
+        cursor.execute(f"USE {args.schema}")
+        for statement in SCHEMA:
+            cursor.execute(statement)
+
+        populate(cursor, day, args.bills, args.items, args.customers)
+        conn.commit()
+
+        old_time, old_rows = timed(cursor, OLD_QUERY, (day,), args.repeat)
+        new_time, new_rows = timed(cursor, NEW_QUERY, (day, day), args.repeat)
+
+        print(f"bills: {args.bills}, rows returned: {len(new_rows)}")
+        print(f"correlated subqueries: {old_time * 1000:9.1f} ms")
+        print(f"grouped pass:          {new_time * 1000:9.1f} ms")
+        print(f"speedup:               {old_time / new_time:9.1f}x")
+        print(f"identical results:     {old_rows == new_rows}")
+    finally:
+        cursor.execute(f"DROP DATABASE IF EXISTS {args.schema}")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+"""
+Build a benchmark database: legacy tables, synthetic data, then database_setup.sql.
+
+database_setup.sql only adds indexes, rollups and procedures on top of the
+existing accounting tables, so this script first creates those tables
+(DAYBUK, SALTOT/SALDET, PRPURDET/PRSALDET, PAYATTEND, FIRMASN and the
+masters the reports join) with the columns the procedures and routers
+read. It then fills them from a seeded generator and runs
+database_setup.sql against the result, which builds the indexes and
+backfills DAYBUK_DAILY and PRSTOCK_TOTALS. The same arguments always
+produce the same data, so runs on different commits are comparable.
+
+The ledger and sales history run for --years up to today, so the
+current-day endpoints have data. The users from database_setup.sql
+(admin@example.com / user@example.com, password 'password') can log in.
+
+Connects with DB_HOST/DB_USER/DB_PASSWORD from .env unless --host/--user/
+--password are given. --docker starts a throwaway mysql:8.0 container
+first. The API itself always connects on port 3306.
+
+Usage:
+    python scripts/bench_fixture.py --docker --schema udayam_bench \\
+        --companies 5 --years 2 --bills-per-day 200
+    DB_NAME=udayam_bench uvicorn main:app --workers 1
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mysql.connector  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+
+SETUP_SQL = os.path.join(os.path.dirname(__file__), "..", "database_setup.sql")
+
+# 1091: the setup drops indexes before creating them, they do not exist yet
+# 1318: its example CALL get_customer_sales_details() passes no date
+IGNORED_SETUP_ERRORS = {1091, 1318}
+
+DOCKER_CONTAINER = "udayam-bench-mysql"
+
+LEGACY_SCHEMA = [
+    """
+    CREATE TABLE FIRMASN (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        FIRCOD_ID VARCHAR(10), FIRCOD VARCHAR(5), FIRNAME VARCHAR(100),
+        SCGRPCOD VARCHAR(5), SDGRPCOD VARCHAR(5)
+    )
+    """,
+    """
+    CREATE TABLE DAYBUK (
+        SNO_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+        TRNDAT DATE, comp VARCHAR(5), GRPCOD VARCHAR(5), CUSCOD VARCHAR(5),
+        ABC3 VARCHAR(5), JRT3 VARCHAR(2), JRT VARCHAR(2), TRNTYP VARCHAR(2),
+        DBCR CHAR(1), TRNDET VARCHAR(100), TRNAMT DECIMAL(15,2)
+    )
+    """,
+    """
+    CREATE TABLE CUSMAS (
+        CUSCOD VARCHAR(5) PRIMARY KEY,
+        CUSNAM VARCHAR(100), ADRONE VARCHAR(100), ADRTWO VARCHAR(100), PHONE VARCHAR(20)
+    )
+    """,
+    """
+    CREATE TABLE SALMANMAS (
+        SALMANCOD VARCHAR(5) PRIMARY KEY,
+        SALMANNAM VARCHAR(100), SALMANPHON VARCHAR(20)
+    )
+    """,
+    """
+    CREATE TABLE SALTOT (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        DATE DATE, BILLNO INT, SNO VARCHAR(10), CUSCOD VARCHAR(5),
+        SMANCOD VARCHAR(5), TQTY DECIMAL(12,3), NET DECIMAL(12,2)
+    )
+    """,
+    """
+    CREATE TABLE SALDET (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        DATE DATE, BILLNO INT, CUSCOD VARCHAR(5), NAME VARCHAR(100),
+        RATE DECIMAL(12,2), QTY DECIMAL(12,3), TPRICE DECIMAL(12,2), PRCOSTRATE DECIMAL(12,2)
+    )
+    """,
+    """
+    CREATE TABLE PRCUSMAS (
+        CUSCOD VARCHAR(5) PRIMARY KEY,
+        CUSNAM VARCHAR(100), GRPCOD VARCHAR(5), TPLCOD CHAR(1)
+    )
+    """,
+    """
+    CREATE TABLE STKMAS (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        ROOT VARCHAR(10), QTY DECIMAL(12,3), PRCOSTRATE DECIMAL(12,2), BOXPRODRATE DECIMAL(12,2)
+    )
+    """,
+    """
+    CREATE TABLE PRITEMAS (
+        ITEC VARCHAR(20) PRIMARY KEY,
+        NAME VARCHAR(100), RATE DECIMAL(12,2)
+    )
+    """,
+    """
+    CREATE TABLE PRSTKMAS (
+        ITEC VARCHAR(20) PRIMARY KEY,
+        OQTY DECIMAL(12,3)
+    )
+    """,
+    """
+    CREATE TABLE PRPACKSTRU (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        PITEC VARCHAR(20), ITEC VARCHAR(20), QTY DECIMAL(12,3)
+    )
+    """,
+    """
+    CREATE TABLE PRPURDET (
+        SNO_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+        DATE DATE, ITEC VARCHAR(20), QTY DECIMAL(12,3)
+    )
+    """,
+    """
+    CREATE TABLE PRSALDET (
+        SNO_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+        DATE DATE, ITEC VARCHAR(20), QTY DECIMAL(12,3)
+    )
+    """,
+    """
+    CREATE TABLE SHOPSTKGODOWN (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        FIRCOD VARCHAR(5), ITEC VARCHAR(20), QTY DECIMAL(12,3),
+        PURRATE DECIMAL(12,2), TAX DECIMAL(5,2)
+    )
+    """,
+    """
+    CREATE TABLE SHOPINVESTMENT (
+        SNO_ID INT AUTO_INCREMENT PRIMARY KEY,
+        FIRCOD VARCHAR(5), DATE DATE, AMT DECIMAL(15,2)
+    )
+    """,
+    """
+    CREATE TABLE PAYSTAFFMAS (
+        CUSCOD VARCHAR(5) PRIMARY KEY,
+        CUSNAM VARCHAR(100), CUSTYP CHAR(1), DOR DATE, SALARY DECIMAL(12,2)
+    )
+    """,
+    """
+    CREATE TABLE PAYATTEND (
+        SNO_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+        CUSCOD VARCHAR(5), DATE DATE, LDAYS CHAR(1)
+    )
+    """,
+    # Created here with the username column routers/auth.py reads, the
+    # setup's CREATE TABLE IF NOT EXISTS then leaves it alone
+    """
+    CREATE TABLE USERS_APP (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        email VARCHAR(255) UNIQUE NOT NULL,
+        username VARCHAR(100),
+        password_hash VARCHAR(255) NOT NULL,
+        role VARCHAR(50) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+# Petty cash is keyed by company in ABC3, these are the fixed cash holders
+CASH_HOLDERS = ("GHE01", "PRO01", "ACC01")
+BANKS = [("BNK01", "L"), ("BNK02", "L"), ("BNK03", "A"), ("BNK04", "A"), ("BNK05", "A")]
+
+
+def money(value: float) -> Decimal:
+    return Decimal(str(round(value, 2)))
+
+
+def days_back(years: int, today: date):
+    start = today - timedelta(days=365 * years)
+    return [start + timedelta(days=n) for n in range((today - start).days + 1)]
+
+
+class Loader:
+    """Buffers rows per table and inserts them in executemany batches"""
+
+    def __init__(self, cursor, batch: int = 5000):
+        self.cursor = cursor
+        self.batch = batch
+        self.pending = {}
+        self.counts = {}
+
+    def add(self, table: str, columns: tuple, row: tuple):
+        rows = self.pending.setdefault((table, columns), [])
+        rows.append(row)
+        if len(rows) >= self.batch:
+            self.flush_table(table, columns)
+
+    def flush_table(self, table: str, columns: tuple):
+        rows = self.pending.get((table, columns))
+        if not rows:
+            return
+        placeholders = ", ".join(["%s"] * len(columns))
+        self.cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+        self.pending[(table, columns)] = []
+
+    def flush(self):
+        for table, columns in list(self.pending):
+            self.flush_table(table, columns)
+
+
+def generate(loader: Loader, args, today: date):
+    rng = random.Random(args.seed)
+    days = days_back(args.years, today)
+
+    # Companies, one supplier and one customer group each
+    companies = []
+    for n in range(1, args.companies + 1):
+        code = f"S{n:02d}"
+        companies.append((code, f"C{n:03d}", f"D{n:03d}"))
+        loader.add(
+            "FIRMASN", ("FIRCOD_ID", "FIRCOD", "FIRNAME", "SCGRPCOD", "SDGRPCOD"),
+            (f"F{n:03d}", code, f"Shop {n}", f"C{n:03d}", f"D{n:03d}"),
+        )
+
+    customers = [f"B{n:04d}" for n in range(1, args.customers + 1)]
+    for n, cuscod in enumerate(customers, 1):
+        loader.add(
+            "CUSMAS", ("CUSCOD", "CUSNAM", "ADRONE", "ADRTWO", "PHONE"),
+            (cuscod, f"Customer {n}", f"{n} Main Street", "Town", f"98{n:08d}"),
+        )
+
+    salesmen = [f"SM{n:03d}" for n in range(1, 21)]
+    for n, code in enumerate(salesmen + ["BHA01"], 1):
+        loader.add(
+            "SALMANMAS", ("SALMANCOD", "SALMANNAM", "SALMANPHON"),
+            (code, "Manager" if code == "BHA01" else f"Salesman {n}", f"97{n:08d}"),
+        )
+
+    for code, tplcod in BANKS:
+        loader.add("PRCUSMAS", ("CUSCOD", "CUSNAM", "GRPCOD", "TPLCOD"), (code, f"Bank {code}", "CAS02", tplcod))
+
+    # Ledger: --ledger-rows entries per company per day across every
+    # category the two trial balance procedures read
+    daybuk = ("TRNDAT", "comp", "GRPCOD", "CUSCOD", "ABC3", "JRT3", "JRT", "TRNTYP", "DBCR", "TRNDET", "TRNAMT")
+    for day in days:
+        for code, scgrpcod, sdgrpcod in companies:
+            for _ in range(args.ledger_rows):
+                dbcr = rng.choice("DC")
+                trntyp = rng.choice("12345")
+                jrt = rng.choice("123")
+                kind = rng.random()
+                grpcod, cuscod, abc3, jrt3, trndet = "", rng.choice(customers), code, "", "Sale"
+
+                if kind < 0.25:
+                    grpcod = sdgrpcod
+                elif kind < 0.40:
+                    grpcod = scgrpcod
+                elif kind < 0.55:
+                    cuscod, abc3 = "CAS01", rng.choice(CASH_HOLDERS + (code,))
+                elif kind < 0.65:
+                    grpcod = "SUN09"
+                elif kind < 0.75:
+                    cuscod = rng.choice(BANKS)[0]
+                elif kind < 0.85:
+                    abc3 = "ACC01"
+                else:
+                    jrt3 = rng.choice("1234")
+                    if rng.random() < 0.2:
+                        trndet = "MAIN ADVANCE DUE CREDIT"
+
+                loader.add(
+                    "DAYBUK", daybuk,
+                    (day, code, grpcod, cuscod, abc3, jrt3, jrt, trntyp, dbcr, trndet,
+                     money(rng.uniform(10, 50000))),
+                )
+
+    # Sales: --bills-per-day bills with 1..2*--items-per-bill lines each
+    billno = 0
+    for day in days:
+        for sno in range(1, args.bills_per_day + 1):
+            billno += 1
+            cuscod = rng.choice(customers)
+            tqty, net = Decimal(0), Decimal(0)
+            for _ in range(rng.randint(1, args.items_per_bill * 2 - 1)):
+                rate = money(rng.uniform(20, 500))
+                qty = Decimal(rng.randint(1, 20))
+                cost = money(float(rate) * rng.uniform(0.8, 1.1))
+                tqty += qty
+                net += rate * qty
+                loader.add(
+                    "SALDET", ("DATE", "BILLNO", "CUSCOD", "NAME", "RATE", "QTY", "TPRICE", "PRCOSTRATE"),
+                    (day, billno, cuscod, f"Item {rng.randint(1, args.items)}", rate, qty, rate * qty, cost),
+                )
+            loader.add(
+                "SALTOT", ("DATE", "BILLNO", "SNO", "CUSCOD", "SMANCOD", "TQTY", "NET"),
+                (day, billno, str(sno), cuscod, rng.choice(salesmen), tqty, net),
+            )
+
+    # Production items, packs made of 2-4 items, purchases and pack sales
+    items = [f"IT{n:04d}" for n in range(1, args.items + 1)]
+    packs = [f"PK{n:04d}" for n in range(1, args.items // 4 + 2)]
+    for itec in items:
+        loader.add("PRITEMAS", ("ITEC", "NAME", "RATE"), (itec, f"Item {itec}", money(rng.uniform(5, 200))))
+        loader.add("PRSTKMAS", ("ITEC", "OQTY"), (itec, Decimal(rng.randint(0, 500))))
+    for pitec in packs:
+        for itec in rng.sample(items, min(len(items), rng.randint(2, 4))):
+            loader.add("PRPACKSTRU", ("PITEC", "ITEC", "QTY"), (pitec, itec, Decimal(rng.randint(1, 5))))
+    for day in days:
+        for _ in range(args.stock_moves):
+            loader.add("PRPURDET", ("DATE", "ITEC", "QTY"), (day, rng.choice(items), Decimal(rng.randint(10, 100))))
+            loader.add("PRSALDET", ("DATE", "ITEC", "QTY"), (day, rng.choice(packs), Decimal(rng.randint(1, 10))))
+
+    for _ in range(args.items):
+        loader.add(
+            "STKMAS", ("ROOT", "QTY", "PRCOSTRATE", "BOXPRODRATE"),
+            (rng.choice(["GHEE", "OIL", "RICE"]), Decimal(rng.randint(0, 300)),
+             money(rng.uniform(50, 600)), money(rng.uniform(50, 600))),
+        )
+
+    for code, _, _ in companies:
+        for itec in rng.sample(items, min(len(items), 100)):
+            loader.add(
+                "SHOPSTKGODOWN", ("FIRCOD", "ITEC", "QTY", "PURRATE", "TAX"),
+                (code, itec, Decimal(rng.randint(0, 200)), money(rng.uniform(10, 400)), rng.choice([0, 5, 12, 18])),
+            )
+        for day in days[::30]:
+            loader.add("SHOPINVESTMENT", ("FIRCOD", "DATE", "AMT"), (code, day, money(rng.uniform(1000, 100000))))
+
+    # Staff and their attendance, Sundays off
+    staff = [f"E{n:04d}" for n in range(1, args.staff + 1)]
+    for n, cuscod in enumerate(staff, 1):
+        left = days[0] + timedelta(days=rng.randrange(len(days))) if rng.random() < 0.1 else None
+        loader.add(
+            "PAYSTAFFMAS", ("CUSCOD", "CUSNAM", "CUSTYP", "DOR", "SALARY"),
+            (cuscod, f"Staff {n}", "S", left, money(rng.uniform(8000, 40000))),
+        )
+    for day in days:
+        if day.weekday() == 6:
+            continue
+        for cuscod in staff:
+            loader.add("PAYATTEND", ("CUSCOD", "DATE", "LDAYS"), (cuscod, day, rng.choice("FFFFFFPAL")))
+
+    loader.flush()
+
+
+def setup_statements(path: str):
+    """database_setup.sql split into statements, honouring DELIMITER"""
+    delimiter = ";"
+    statement = []
+
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            stripped = line.strip()
+            if stripped.upper().startswith("DELIMITER"):
+                delimiter = stripped.split()[1]
+                continue
+            if not stripped or stripped.startswith("--"):
+                continue
+
+            if stripped.endswith(delimiter):
+                statement.append(line.rstrip()[: -len(delimiter)])
+                text = "\n".join(statement).strip()
+                if text:
+                    yield text
+                statement = []
+            else:
+                statement.append(line.rstrip())
+
+
+def run_setup(cursor):
+    for statement in setup_statements(SETUP_SQL):
+        try:
+            for result in cursor.execute(statement, multi=True):
+                if result.with_rows:
+                    result.fetchall()
+        except mysql.connector.Error as e:
+            if e.errno not in IGNORED_SETUP_ERRORS:
+                raise
+
+
+def start_docker(port: int, password: str):
+    subprocess.run(["docker", "rm", "-f", DOCKER_CONTAINER], capture_output=True)
+    subprocess.run(
+        [
+            "docker", "run", "-d", "--name", DOCKER_CONTAINER,
+            "-e", f"MYSQL_ROOT_PASSWORD={password}",
+            "-p", f"{port}:3306",
+            "mysql:8.0",
+        ],
+        check=True,
+    )
+
+
+def connect(args, timeout: float):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return mysql.connector.connect(
+                host=args.host, port=args.port, user=args.user, password=args.password,
+                autocommit=False,
+            )
+        except mysql.connector.Error:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(2)
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--schema", default="udayam_bench")
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", "bench"))
+    parser.add_argument("--docker", action="store_true", help="start a mysql:8.0 container first (root user)")
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--bills-per-day", type=int, default=100)
+    parser.add_argument("--items-per-bill", type=int, default=5, help="average lines per bill")
+    parser.add_argument("--ledger-rows", type=int, default=20, help="DAYBUK rows per company per day")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--items", type=int, default=200, help="production and stock items")
+    parser.add_argument("--stock-moves", type=int, default=10, help="PRPURDET and PRSALDET rows per day")
+    parser.add_argument("--staff", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(), help="last day of generated data")
+    args = parser.parse_args()
+
+    if args.docker:
+        args.host, args.user = "127.0.0.1", "root"
+        start_docker(args.port, args.password)
+
+    conn = connect(args, timeout=120 if args.docker else 0)
+    cursor = conn.cursor()
+    started = time.perf_counter()
+
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS {args.schema}")
+        cursor.execute(f"CREATE DATABASE {args.schema}")
+        cursor.execute(f"USE {args.schema}")
+        for statement in LEGACY_SCHEMA:
+            cursor.execute(statement)
+
+        loader = Loader(cursor)
+        generate(loader, args, args.today)
+        conn.commit()
+        loaded = time.perf_counter()
+
+        run_setup(cursor)
+        conn.commit()
+
+        print(json.dumps({
+            "schema": args.schema,
+            "parameters": {
+                name: getattr(args, name)
+                for name in ("companies", "years", "bills_per_day", "items_per_bill", "ledger_rows",
+                             "customers", "items", "stock_moves", "staff", "seed")
+            },
+            "today": args.today.isoformat(),
+            "rows": loader.counts,
+            "load_s": round(loaded - started, 1),
+            "setup_s": round(time.perf_counter() - loaded, 1),
+        }, indent=2))
+
+        if args.port != 3306:
+            print(f"note: the API connects on port 3306, not {args.port}", file=sys.stderr)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Drive every API endpoint at fixed concurrency and write a JSON baseline.
+
+Meant for an API running against the bench_fixture.py database, so two
+runs on different commits see the same data. Every scenario gets
+--requests requests at each --concurrency level after a few warm-up
+calls. The output records latency percentiles (p50/p95/p99), throughput,
+errors and bytes per scenario. With --compare, the run is also printed
+against an earlier baseline file.
+
+Report caches (trial balance, closed-day profit/loss, ETags) make
+repeated identical requests cheap. --cold gives every request its own
+date range so the caches miss and the database work is measured instead.
+
+Logout and the admin endpoints are not driven: logout revokes the token
+the run uses, and the admin endpoints only report on the others. /metrics
+is only driven with --metrics-token (default $METRICS_TOKEN).
+
+Usage:
+    python scripts/bench_load.py --base-url http://localhost:8000 \\
+        --concurrency 1,8,32 --requests 200 --output baseline.json
+    python scripts/bench_load.py --output after.json --compare baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import count
+
+from load_test_sales import login
+
+
+def request(url, method="GET", body=None, token=None, headers=None):
+    """(status, bytes received, seconds) of one request, HTTP errors included"""
+    all_headers = {"Content-Type": "application/json", **(headers or {})}
+    if token:
+        all_headers["Authorization"] = f"Bearer {token}"
+
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers=all_headers, method=method)
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req) as resp:
+            payload = resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        status = e.code
+    return status, len(payload), time.perf_counter() - start
+
+
+def get_json(base_url, path, token):
+    req = urllib.request.Request(f"{base_url}{path}", headers={"Authorization": f"Bearer {token}"})
+    with urllib.request.urlopen(req) as resp:
+        return json.loads(resp.read())
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def scenarios(args, companies, bills):
+    """
+    name -> function(n) returning (method, path, body) for the n-th request.
+
+    With --cold every n moves the period back a day, so no two requests of
+    a scenario share a cache key.
+    """
+    today = args.today
+    shift = (lambda n: timedelta(days=n)) if args.cold else (lambda n: timedelta(0))
+
+    def period(n, days):
+        end = today - shift(n)
+        return end - timedelta(days=days), end
+
+    def trial_balance(path):
+        def build(n):
+            start, end = period(n, 365)
+            return "POST", path, {"companyIds": companies, "startDate": str(start), "endDate": str(end)}
+        return build
+
+    def bill(n):
+        return bills[n % len(bills)]
+
+    def bill_detail(n):
+        return "POST", "/api/sales-details", bill(n)
+
+    def bill_batch(n):
+        return "POST", "/api/sales-details/batch", {
+            "bills": [bill(n + k) for k in range(min(50, len(bills)))]
+        }
+
+    def day(n):
+        return str(today - shift(n))
+
+    def profit_loss_range(n):
+        start, end = period(n, 30)
+        return "GET", f"/api/profit-loss/range?start={start}&end={end}", None
+
+    def export_sales(n):
+        start, end = period(n, 7)
+        return "GET", f"/api/export/sales?start={start}&end={end}&detail=items", None
+
+    def export_trial_balance(n):
+        start, end = period(n, 365)
+        ids = "&".join(f"companyIds={code}" for code in companies)
+        return "GET", f"/api/export/trial-balance?{ids}&start={start}&end={end}", None
+
+    all_scenarios = {
+        "health": lambda n: ("GET", "/health", None),
+        "health_ready": lambda n: ("GET", "/health?ready=true", None),
+        "login": lambda n: ("POST", "/auth/login", {"email": args.email, "password": args.password}),
+        "companies": lambda n: ("GET", "/api/companies", None),
+        "trial_balance": trial_balance("/api/trial-balance"),
+        "trial_balance_store": trial_balance("/api/trial-balance-store"),
+        "daily_sales": lambda n: ("GET", f"/api/current-day-customer-sales?date={day(n)}", None),
+        "daily_sales_page": lambda n: ("GET", f"/api/current-day-customer-sales?date={day(n)}&limit=100", None),
+        "daily_sales_columnar": lambda n: ("GET", f"/api/current-day-customer-sales?date={day(n)}&format=columnar", None),
+        "daily_sales_ndjson": lambda n: ("GET", f"/api/current-day-customer-sales?date={day(n)}&format=ndjson", None),
+        "sales_details": bill_detail,
+        "sales_details_batch": bill_batch,
+        "profit_loss": lambda n: ("GET", f"/api/profit-loss?date={day(n)}", None),
+        "profit_loss_range": profit_loss_range,
+        "stock_valuation": lambda n: ("GET", "/api/stock-valuation", None),
+        "export_sales": export_sales,
+        "export_trial_balance": export_trial_balance,
+    }
+    if args.metrics_token:
+        all_scenarios["metrics"] = lambda n: ("GET", "/metrics", None)
+
+    if args.scenarios:
+        return {name: all_scenarios[name] for name in args.scenarios.split(",")}
+    return all_scenarios
+
+
+def run_scenario(args, token, build, concurrency):
+    headers = {"Accept-Encoding": args.accept_encoding} if args.accept_encoding else None
+    sequence = count()
+
+    def one(_):
+        method, path, body = build(next(sequence))
+        return request(f"{args.base_url}{path}", method, body, token, headers)
+
+    for _ in range(args.warmup):
+        one(None)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(seconds * 1000 for _, _, seconds in results)
+    errors = [status for status, _, _ in results if status >= 400]
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "max_ms": round(latencies[-1], 2),
+        "throughput_rps": round(len(results) / wall, 2) if wall else None,
+        "bytes_per_request": round(sum(size for _, size, _ in results) / len(results)),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+
+    previous = {
+        (name, run["concurrency"]): run
+        for name, runs in baseline["results"].items()
+        for run in runs
+    }
+
+    print(f"\nagainst {baseline_path} ({baseline['meta'].get('commit')})")
+    print(f"{'scenario':24} {'conc':>4} {'p95 ms':>10} {'change':>8} {'rps':>9} {'change':>8}")
+    for name, runs in results.items():
+        for run in runs:
+            old = previous.get((name, run["concurrency"]))
+            if old is None:
+                continue
+            p95_change = (run["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0
+            rps_change = (run["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0
+            print(
+                f"{name:24} {run['concurrency']:>4} {run['p95_ms']:>10.1f} {p95_change:>+7.0f}% "
+                f"{run['throughput_rps']:>9.1f} {rps_change:>+7.0f}%"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated levels")
+    parser.add_argument("--requests", type=int, default=200, help="per scenario and level")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--scenarios", default=None, help="comma separated subset, default all")
+    parser.add_argument("--cold", action="store_true", help="a different date range per request")
+    parser.add_argument("--metrics-token", default=os.environ.get("METRICS_TOKEN"), help="bearer token for /metrics")
+    parser.add_argument("--accept-encoding", default=None, help="e.g. 'br, gzip'")
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(), help="--today given to bench_fixture.py")
+    parser.add_argument("--label", default=None, help="free text kept in the output, e.g. the fixture size")
+    parser.add_argument("--output", default=None, help="write the JSON baseline here")
+    parser.add_argument("--compare", default=None, help="earlier baseline to compare against")
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.email, args.password)
+    companies = [company["FIRCOD"] for company in get_json(args.base_url, "/api/companies", token)]
+    bills = [
+        {"billdate": row["billdate"], "billno": row["billno"], "cuscod": row["cuscod"]}
+        for row in get_json(args.base_url, f"/api/current-day-customer-sales?date={args.today}&limit=200", token)
+    ]
+    if not companies or not bills:
+        raise SystemExit("No companies or no bills on --today, is the API on the bench_fixture.py schema?")
+
+    results = {}
+    for name, build in scenarios(args, companies, bills).items():
+        results[name] = []
+        for concurrency in [int(level) for level in args.concurrency.split(",")]:
+            run = run_scenario(args, args.metrics_token if name == "metrics" else token, build, concurrency)
+            results[name].append(run)
+            print(
+                f"{name:24} c={concurrency:<3} p50 {run['p50_ms']:8.1f}  p95 {run['p95_ms']:8.1f}  "
+                f"p99 {run['p99_ms']:8.1f} ms  {run['throughput_rps']:8.1f} req/s  errors {run['errors']}"
+            )
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "base_url": args.base_url,
+            "label": args.label,
+            "companies": len(companies),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "cold": args.cold,
+            "accept_encoding": args.accept_encoding,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nwrote {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Microbenchmark of response serialization, FastAPI's default path vs fast_json.
+
+Builds synthetic daily sales rows (as _summary_row returns them) and times
+what FastAPI does with a response_model - validate every row, run
+jsonable_encoder, encode with json - against FastJSONResponse, which encodes
+the rows as they are with orjson. A trial balance style nested payload,
+which has no response_model and only goes through jsonable_encoder, is
+timed the same way. No database is needed.
+
+Usage:
+    python scripts/bench_serialization.py --rows 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import date
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from fast_json import FastJSONResponse  # noqa: E402
+from routers.sales_details import DailySalesSummary  # noqa: E402
+
+
+def sales_rows(count: int):
+    rng = random.Random(42)
+    return [
+        {
+            "billdate": date(2026, 1, 15),
+            "billno": 20000 + n,
+            "sno": "1",
+            "sno_id": 500000 + n,
+            "cuscod": f"B{rng.randrange(500):04d}",
+            "cusnam": f"Customer {rng.randrange(500)}",
+            "adrone": f"{rng.randrange(999)} Gandhi Road, Near Bus Stand",
+            "adrtwo": "Tiruchirappalli",
+            "phone": f"98{rng.randrange(10**8):08d}",
+            "tqty": float(rng.randint(1, 40)),
+            "net": round(rng.uniform(50, 25000), 2),
+            "total_profit": round(rng.uniform(0, 800), 2),
+            "total_loss": round(rng.uniform(0, 50), 2),
+        }
+        for n in range(count)
+    ]
+
+
+def trial_balance_payload(count: int):
+    companies = []
+    for n in range(max(count // 9, 1)):
+        companies.append({
+            "companyId": f"F{n:03d}",
+            "companyName": f"Company {n}",
+            "period": {"start": "2025-04-01", "end": "2026-03-31"},
+            "rows": [
+                {
+                    "accountName": f"CATEGORY {k}",
+                    "accountType": "ASSET" if k % 2 else "LIABILITY",
+                    "debit": 1234.5 * k,
+                    "credit": 0.0,
+                    "balance": 1234.5 * k,
+                }
+                for k in range(9)
+            ],
+        })
+    return {"companies": companies, "cache": "miss"}
+
+
+def timed(fn, repeat: int):
+    best = None
+    body = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = sales_rows(args.rows)
+    field = create_response_field(name="Response", type_=List[DailySalesSummary])
+    loop = asyncio.new_event_loop()
+
+    def default_sales():
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=rows)
+        )
+        return JSONResponse(content).body
+
+    payload = trial_balance_payload(args.rows)
+
+    cases = [
+        ("daily sales (response_model)", default_sales, lambda: FastJSONResponse(rows).body),
+        (
+            "trial balance (jsonable_encoder)",
+            lambda: JSONResponse(jsonable_encoder(payload)).body,
+            lambda: FastJSONResponse(payload).body,
+        ),
+    ]
+
+    print(f"rows: {args.rows}, best of {args.repeat}")
+    for name, default, fast in cases:
+        default_time, default_body = timed(default, args.repeat)
+        fast_time, fast_body = timed(fast, args.repeat)
+
+        print(f"\n{name}")
+        print(f"  default:   {default_time * 1000:8.2f} ms  {len(default_body):>9} bytes")
+        print(f"  fast_json: {fast_time * 1000:8.2f} ms  {len(fast_body):>9} bytes")
+        print(f"  speedup:   {default_time / fast_time:8.1f}x")
+        print(f"  same JSON: {json.loads(default_body) == json.loads(fast_body)}")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Concurrent load test for the sales endpoints.
+
+Fires the same request from many threads at once against a running API and
+compares the wall-clock time with the sum of the individual latencies. When
+the event loop is blocked, requests queue up behind each other and the wall
+time approaches the serial sum; with the async pool it should stay close to
+the slowest single request.
+
+Usage:
+    python scripts/load_test_sales.py --base-url http://localhost:8000 \
+        --email admin@example.com --password '...' --concurrency 20
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _request(url, method="GET", body=None, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+
+    start = time.perf_counter()
+    with urllib.request.urlopen(req) as resp:
+        payload = resp.read()
+    return time.perf_counter() - start, payload
+
+
+def login(base_url, email, password):
+    _, payload = _request(
+        f"{base_url}/auth/login",
+        method="POST",
+        body={"email": email, "password": password},
+    )
+    return json.loads(payload)["access_token"]
+
+
+def run(base_url, token, path, concurrency, total):
+    url = f"{base_url}{path}"
+
+    def one(_):
+        elapsed, _ = _request(url, token=token)
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    serial = sum(latencies)
+    return {
+        "path": path,
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "serial_sum_s": round(serial, 3),
+        # ~1.0 means requests were served one after another, ~concurrency
+        # means they genuinely overlapped
+        "overlap": round(serial / wall if wall else 0, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--date", default=None, help="YYYY-MM-DD, defaults to today")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.email, args.password)
+    query = f"?date={args.date}" if args.date else ""
+
+    for path in ("/api/current-day-customer-sales", "/api/profit-loss"):
+        result = run(args.base_url, token, path + query, args.concurrency, args.requests)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
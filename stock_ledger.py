@@ -0,0 +1,22 @@
+def get_stock_valuation(conn):
+    """Per-item production closing stock, the PRODUCTION CLOSING STOCK VALUE lines"""
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(
+            """
+            SELECT
+                ITEC,
+                OQTY,
+                PUR_QTY,
+                SALE_QTY,
+                CLOSING_QTY,
+                COALESCE(RATE, 0) AS RATE,
+                COALESCE(STOCK_VALUE, 0) AS STOCK_VALUE
+            FROM PRSTOCK_CLOSING
+            ORDER BY ITEC
+            """
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
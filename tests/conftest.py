@@ -0,0 +1,95 @@
+import os
+import sys
+from argparse import Namespace
+from datetime import date, timedelta
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+# Last day of the generated data
+FIXTURE_TODAY = date(2026, 3, 16)
+
+# Dropped and rebuilt on every run
+TEST_SCHEMA = "udayam_test"
+
+
+def _add_mixed_case_rows(cursor, today: date):
+    """
+    Rows whose codes only match under MySQL's case-insensitive comparison,
+    so the parity tests see the API read them the way the SQL does.
+    """
+    day = today - timedelta(days=3)
+
+    cursor.executemany(
+        """
+        INSERT INTO DAYBUK (TRNDAT, comp, GRPCOD, CUSCOD, ABC3, JRT3, JRT, TRNTYP, DBCR, TRNDET, TRNAMT)
+        VALUES (%s, %s, %s, %s, %s, '', %s, %s, %s, 'Mixed case', %s)
+        """,
+        [
+            (day, "s01", "d001", "B0001", "s01", "1", "1", "D", "125.50"),
+            (day, "S01", "c001", "B0002", "S01", "1", "2", "c", "40.25"),
+            (day, "S02", "sun09", "B0003", "S02", "1", "1", "d", "310.00"),
+            (day, "S02", "", "cas01", "s02", "1", "5", "D", "77.70"),
+            (day, "s03", "", "B0004", "acc01", "2", "3", "C", "18.10"),
+        ],
+    )
+
+    # Lower-case staff code and pay codes, and a second row for the same day
+    cursor.executemany(
+        "INSERT INTO PAYATTEND (CUSCOD, DATE, LDAYS) VALUES (%s, %s, %s)",
+        [("e0001", day, "f"), ("E0002", day, "p"), ("e0002", day, "F")],
+    )
+
+
+@pytest.fixture(scope="session")
+def mysql_conn():
+    """
+    mysql.connector connection to a small bench_fixture.py schema.
+
+    Only runs against the server named by TEST_MYSQL_HOST (TEST_MYSQL_PORT,
+    TEST_MYSQL_USER, TEST_MYSQL_PASSWORD), where the udayam_test schema is
+    dropped and rebuilt. Tests using it are skipped without one.
+    """
+    host = os.getenv("TEST_MYSQL_HOST")
+    if not host:
+        pytest.skip("TEST_MYSQL_HOST is not set, no MySQL to compare against")
+
+    import mysql.connector
+    import bench_fixture
+
+    args = Namespace(
+        host=host,
+        port=int(os.getenv("TEST_MYSQL_PORT", "3306")),
+        user=os.getenv("TEST_MYSQL_USER", "root"),
+        password=os.getenv("TEST_MYSQL_PASSWORD", "bench"),
+        companies=3, years=1, bills_per_day=2, items_per_bill=2, ledger_rows=10,
+        customers=20, items=20, stock_moves=2, staff=8, seed=7,
+    )
+
+    try:
+        conn = bench_fixture.connect(args, timeout=0)
+    except mysql.connector.Error as e:
+        pytest.skip(f"MySQL at {host} is not available: {e}")
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS {TEST_SCHEMA}")
+        cursor.execute(f"CREATE DATABASE {TEST_SCHEMA}")
+        cursor.execute(f"USE {TEST_SCHEMA}")
+        for statement in bench_fixture.LEGACY_SCHEMA:
+            cursor.execute(statement)
+
+        bench_fixture.generate(bench_fixture.Loader(cursor), args, FIXTURE_TODAY)
+        _add_mixed_case_rows(cursor, FIXTURE_TODAY)
+        conn.commit()
+
+        bench_fixture.run_setup(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+
+    yield conn
+    conn.close()
@@ -0,0 +1,59 @@
+from datetime import date
+
+from columnar import to_columnar
+
+
+def decode(body: dict) -> list:
+    """Rows back from a columnar body, as a client would rebuild them"""
+    rows = [{} for _ in range(body["length"])]
+
+    for name, column in body["columns"].items():
+        if isinstance(column, dict):
+            dictionary = column["dictionary"]
+            values = [None if index is None else dictionary[index] for index in column["indices"]]
+        else:
+            values = column
+
+        for row, value in zip(rows, values):
+            row[name] = value
+
+    return rows
+
+
+def test_round_trip():
+    rows = [
+        {"billdate": date(2026, 1, 1), "billno": n, "cuscod": f"B{n % 3}", "cusnam": None if n == 4 else f"Customer {n % 3}", "net": n * 1.5}
+        for n in range(10)
+    ]
+
+    assert decode(to_columnar(rows)) == rows
+
+
+def test_repeated_strings_and_dates_are_dictionary_encoded():
+    rows = [{"billdate": date(2026, 1, 1), "cuscod": "B1" if n % 2 else "B2", "billno": n} for n in range(6)]
+
+    columns = to_columnar(rows)["columns"]
+
+    assert columns["billdate"] == {"dictionary": [date(2026, 1, 1)], "indices": [0] * 6}
+    assert columns["cuscod"] == {"dictionary": ["B2", "B1"], "indices": [0, 1, 0, 1, 0, 1]}
+    # Numbers are never dictionary encoded
+    assert columns["billno"] == list(range(6))
+
+
+def test_mostly_distinct_strings_stay_plain():
+    rows = [{"cuscod": f"B{n}"} for n in range(5)] + [{"cuscod": "B0"}]
+
+    assert to_columnar(rows)["columns"]["cuscod"] == ["B0", "B1", "B2", "B3", "B4", "B0"]
+
+
+def test_nulls_keep_their_place():
+    rows = [{"cusnam": "A"}, {"cusnam": None}, {"cusnam": "A"}, {"cusnam": "A"}]
+
+    column = to_columnar(rows)["columns"]["cusnam"]
+
+    assert column == {"dictionary": ["A"], "indices": [0, None, 0, 0]}
+
+
+def test_empty():
+    assert to_columnar([]) == {"format": "columnar", "length": 0, "columns": {}}
+    assert decode(to_columnar([])) == []
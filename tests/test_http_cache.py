@@ -0,0 +1,37 @@
+from starlette.requests import Request
+
+from http_cache import etag_matches, make_etag, not_modified_response
+
+
+def request(if_none_match=None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_etags_are_weak():
+    etag = make_etag("DAYBUK|2026-03-16 10:00:00")
+
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert make_etag("DAYBUK|2026-03-16 10:00:00") == etag
+    assert make_etag("DAYBUK|2026-03-16 10:00:01") != etag
+
+
+def test_not_modified_repeats_the_weak_etag():
+    etag = make_etag("x")
+
+    response = not_modified_response(etag)
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_if_none_match_compares_weakly():
+    etag = make_etag("x")
+    opaque = etag.removeprefix("W/")
+
+    assert etag_matches(request(etag), etag)
+    assert etag_matches(request(opaque), etag)
+    assert etag_matches(request(f'"other", {etag}'), etag)
+    assert etag_matches(request("*"), etag)
+    assert not etag_matches(request('"other"'), etag)
+    assert not etag_matches(request(), etag)
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+from database import callproc
+from ledger import _case, store_trial_balance_results
+from conftest import FIXTURE_TODAY
+
+CATEGORIES = [
+    "CUSTOMER BALANCE", "PETTY CASH AT SHOP", "VIJAY CASH BALANCE",
+    "VIJAY SHOP CASH IN HAND", "CURRENT STOCK VALUE", "SUPPLIER BALANCE",
+    "GROSS TOTAL", "INVESTMENT", "NET TOTAL",
+]
+
+
+class FakeCursor:
+    """Answers the ledger, stock and investment queries with canned rows"""
+
+    def __init__(self, ledger_rows, stock_rows, investment_rows, executed):
+        self.answers = {"DAYBUK_DAILY": ledger_rows, "SHOPSTKGODOWN": stock_rows, "SHOPINVESTMENT": investment_rows}
+        self.executed = executed
+        self.rows = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        self.rows = next(rows for table, rows in self.answers.items() if table in query)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, ledger_rows, stock_rows=(), investment_rows=()):
+        self.executed = []
+        self.cursor_args = (list(ledger_rows), list(stock_rows), list(investment_rows))
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(*self.cursor_args, self.executed)
+
+
+def ledger_row(code, customer=0, petty_cash=0, vijay_cash=0, vijay_shop_cash=0, supplier=0):
+    return {
+        "FIRCOD": code,
+        "customer": Decimal(customer),
+        "petty_cash": Decimal(petty_cash),
+        "vijay_cash": Decimal(vijay_cash),
+        "vijay_shop_cash": Decimal(vijay_shop_cash),
+        "supplier": Decimal(supplier),
+        "row_count": 1,
+    }
+
+
+def amounts(result):
+    return {row["category"]: row["amount"] for row in result}
+
+
+def test_case_maps_each_code():
+    sql, params = _case("d.comp", {"S01": "D001", "S02": ""})
+
+    assert sql == "CASE d.comp WHEN %s THEN %s WHEN %s THEN %s END"
+    assert params == ["S01", "D001", "S02", ""]
+
+
+def test_buckets_are_summed_per_company_with_totals():
+    conn = FakeConnection(
+        [
+            ledger_row("S01", customer="100.10", vijay_cash="20", vijay_shop_cash="5", supplier="-40"),
+            # Petty cash comes from its own branch of the query
+            ledger_row("S01", petty_cash="7.005"),
+            ledger_row("S02", supplier="12"),
+        ],
+        stock_rows=[{"FIRCOD": "S01", "amount": Decimal("1000.004")}],
+        investment_rows=[{"FIRCOD": "S01", "amount": Decimal("500")}],
+    )
+    companies = {
+        "S01": {"SCGRPCOD": "C001", "SDGRPCOD": "D001"},
+        "S02": {"SCGRPCOD": "C002", "SDGRPCOD": "D002"},
+        "S03": {"SCGRPCOD": None, "SDGRPCOD": None},
+    }
+
+    results = store_trial_balance_results(conn, companies, FIXTURE_TODAY - timedelta(days=30), FIXTURE_TODAY)
+
+    assert [row["category"] for row in results["S01"]] == CATEGORIES
+    assert amounts(results["S01"]) == {
+        "CUSTOMER BALANCE": Decimal("100.10"),
+        "PETTY CASH AT SHOP": Decimal("7.01"),
+        "VIJAY CASH BALANCE": Decimal("20.00"),
+        "VIJAY SHOP CASH IN HAND": Decimal("5.00"),
+        "CURRENT STOCK VALUE": Decimal("1000.00"),
+        "SUPPLIER BALANCE": Decimal("-40.00"),
+        "GROSS TOTAL": Decimal("1092.11"),
+        "INVESTMENT": Decimal("500.00"),
+        "NET TOTAL": Decimal("592.11"),
+    }
+    assert amounts(results["S02"])["NET TOTAL"] == Decimal("12.00")
+    # A company without ledger rows still gets its zero result set
+    assert set(amounts(results["S03"]).values()) == {Decimal("0.00")}
+
+
+def test_missing_group_codes_are_passed_as_empty_strings():
+    conn = FakeConnection([])
+
+    store_trial_balance_results(conn, {"S03": {"SCGRPCOD": None, "SDGRPCOD": None}}, FIXTURE_TODAY, FIXTURE_TODAY)
+
+    _, params = conn.executed[0]
+    assert None not in params
+    assert params.count("") == 2
+
+
+def test_no_companies_runs_no_query():
+    conn = FakeConnection([])
+
+    assert store_trial_balance_results(conn, {}, FIXTURE_TODAY, FIXTURE_TODAY) == {}
+    assert conn.executed == []
+
+
+@pytest.mark.parametrize("days", [(365, 0), (30, 10), (3, 3)])
+def test_store_trial_balance_matches_procedure(mysql_conn, days):
+    start, end = FIXTURE_TODAY - timedelta(days=days[0]), FIXTURE_TODAY - timedelta(days=days[1])
+
+    cursor = mysql_conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT FIRCOD, SCGRPCOD, SDGRPCOD FROM FIRMASN ORDER BY FIRCOD")
+        companies = {row["FIRCOD"]: row for row in cursor.fetchall()}
+
+        expected = {}
+        for code, company in companies.items():
+            rows = callproc(
+                cursor,
+                "get_trial_balance_shop_store",
+                [code, company["SCGRPCOD"] or "", company["SDGRPCOD"] or "", start, end],
+            )
+            expected[code] = [(row["category"], row["amount"], row["type"]) for row in rows]
+    finally:
+        cursor.close()
+
+    results = store_trial_balance_results(mysql_conn, companies, start, end)
+
+    for code in companies:
+        assert [(row["category"], row["amount"], row["type"]) for row in results[code]] == expected[code]
@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from payroll import (
+    compute_salary_balance,
+    get_salary_balance,
+    pay_cycle_days,
+    pay_cycle_end,
+    pay_cycle_start,
+    _daily_rate,
+)
+from conftest import FIXTURE_TODAY
+
+# The SALARY BALANCE (SUN01) query get_trial_balance_shop ran before
+# payroll.py, with its PAYDATMAS calendar built by a recursive CTE
+SQL_SALARY_BALANCE = """
+    WITH RECURSIVE cycle (day) AS (
+        SELECT IF(
+            MONTH(@today) = 1,
+            STR_TO_DATE(CONCAT('26-12-', YEAR(@today) - 1), '%d-%m-%Y'),
+            STR_TO_DATE(CONCAT('26-', LPAD(MONTH(@today) - 1, 2, '0'), '-', YEAR(@today)), '%d-%m-%Y')
+        )
+        UNION ALL
+        SELECT day + INTERVAL 1 DAY FROM cycle WHERE day < @today
+    )
+    SELECT
+    COALESCE(
+        SUM(
+            CEILING((ps.salary / 26) * DATEDIFF(@today, (SELECT MIN(day) FROM cycle)))
+          - CEILING((ps.salary / 26) * COALESCE(att.total_days, 0))
+        ),
+        0
+    ) AS balance
+    FROM PAYSTAFFMAS ps
+    LEFT JOIN (
+        SELECT
+            cuscod,
+            SUM(day_value) AS total_days
+        FROM (
+            SELECT
+                pa.cuscod,
+                pa.date,
+                MAX(
+                    CASE
+                        WHEN pa.ldays = 'F' THEN 1
+                        WHEN pa.ldays IN ('P','A') THEN 0.5
+                        ELSE 0
+                    END
+                ) AS day_value
+            FROM PAYATTEND pa
+            JOIN cycle pd
+                ON pa.date = pd.day
+            WHERE DAYNAME(pd.day) <> 'Sunday'
+            GROUP BY pa.cuscod, pa.date
+        ) x
+        GROUP BY cuscod
+    ) att ON att.cuscod = ps.cuscod
+    WHERE ps.custyp = 'S'
+    AND (ps.dor = '0000-00-00' OR ps.dor IS NULL)
+"""
+
+
+def test_pay_cycle_starts_on_the_26th_of_the_previous_month():
+    assert pay_cycle_start(date(2026, 3, 16)) == date(2026, 2, 26)
+    assert pay_cycle_start(date(2026, 3, 26)) == date(2026, 2, 26)
+    assert pay_cycle_start(date(2026, 1, 10)) == date(2025, 12, 26)
+
+
+def test_pay_cycle_ends_on_the_25th_of_the_next_month():
+    assert pay_cycle_end(date(2026, 2, 26)) == date(2026, 3, 25)
+    assert pay_cycle_end(date(2025, 12, 26)) == date(2026, 1, 25)
+
+
+def test_pay_cycle_days_skip_sundays():
+    days = pay_cycle_days(date(2026, 3, 16))
+
+    assert days[0] == date(2026, 2, 26)
+    assert days[-1] == date(2026, 3, 16)
+    assert date(2026, 3, 1) not in days
+    assert date(2026, 3, 8) not in days
+    assert date(2026, 3, 15) not in days
+    assert len(days) == 19 - 3
+
+
+def test_daily_rate_keeps_four_more_digits_like_mysql():
+    assert _daily_rate(Decimal("10000.00")) == Decimal("384.615385")
+    assert _daily_rate(2600) == Decimal("100.0000")
+
+
+def test_salary_balance():
+    today = date(2026, 3, 16)
+    staff = [
+        {"cuscod": "E0001", "salary": Decimal("2600.00")},
+        {"cuscod": "E0002", "salary": Decimal("2600.00")},
+        {"cuscod": "E0003", "salary": None},
+    ]
+    attendance = [
+        {"cuscod": "E0001", "date": date(2026, 3, 2), "ldays": "F"},
+        # Highest value of the day counts, once
+        {"cuscod": "E0001", "date": date(2026, 3, 3), "ldays": "P"},
+        {"cuscod": "E0001", "date": date(2026, 3, 3), "ldays": "F"},
+        # Half days
+        {"cuscod": "E0002", "date": date(2026, 3, 2), "ldays": "A"},
+        {"cuscod": "E0002", "date": date(2026, 3, 4), "ldays": "L"},
+        # A Sunday does not count
+        {"cuscod": "E0002", "date": date(2026, 3, 8), "ldays": "F"},
+    ]
+
+    # 18 days since 26 Feb at 100 a day, less the attended days
+    assert compute_salary_balance(staff, attendance, today) == (1800 - 200) + (1800 - 50)
+
+
+def test_salary_balance_matches_codes_like_mysql():
+    today = date(2026, 3, 16)
+    staff = [{"cuscod": "E0001", "salary": Decimal("2600.00")}]
+    attendance = [
+        {"cuscod": "e0001", "date": date(2026, 3, 2), "ldays": "f"},
+        {"cuscod": "E0001 ", "date": date(2026, 3, 3), "ldays": "p"},
+    ]
+
+    assert compute_salary_balance(staff, attendance, today) == 1800 - 150
+
+
+@pytest.mark.parametrize("today", [FIXTURE_TODAY, date(2026, 1, 10), date(2025, 12, 26)])
+def test_salary_balance_matches_sql(mysql_conn, today):
+    cursor = mysql_conn.cursor()
+    try:
+        cursor.execute("SET @today = %s", (today,))
+        cursor.execute(SQL_SALARY_BALANCE)
+        (expected,) = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    assert get_salary_balance(mysql_conn, today) == expected
@@ -0,0 +1,67 @@
+import asyncio
+
+import reference_cache
+from reference_cache import ReferenceCache
+
+TABLES = {"CUSMAS": ("SELECT CUSCOD, CUSNAM FROM CUSMAS", "CUSCOD")}
+
+
+class Lookup:
+    """async_fetchall stand-in answering the IN (...) lookup like MySQL"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def __call__(self, conn, query, params=None):
+        self.calls.append((query, list(params)))
+        wanted = {code.rstrip().upper() for code in params}
+        return [row for row in self.rows if row["CUSCOD"].rstrip().upper() in wanted]
+
+
+def loaded_cache(rows):
+    cache = ReferenceCache(TABLES, 300)
+    cache._store("CUSMAS", "2026-03-16 10:00:00", rows)
+    return cache
+
+
+def test_codes_match_ignoring_case_and_trailing_spaces():
+    cache = loaded_cache([{"CUSCOD": "b001 ", "CUSNAM": "Customer 1"}])
+
+    assert cache.get("CUSMAS", "B001")["CUSNAM"] == "Customer 1"
+    assert cache.get("CUSMAS", "b001")["CUSNAM"] == "Customer 1"
+    assert cache.get("CUSMAS", "B001   ")["CUSNAM"] == "Customer 1"
+    # Leading spaces are significant to MySQL too
+    assert cache.get("CUSMAS", " B001") is None
+    assert cache.get("CUSMAS", None) is None
+
+
+def test_get_many_is_keyed_by_the_requested_codes():
+    cache = loaded_cache([{"CUSCOD": "B001", "CUSNAM": "Customer 1"}])
+
+    assert cache.get_many("CUSMAS", ["b001 ", "B002", None]) == {"b001 ": {"CUSCOD": "B001", "CUSNAM": "Customer 1"}}
+
+
+def test_first_row_per_normalized_code_wins():
+    cache = loaded_cache([
+        {"CUSCOD": "B001", "CUSNAM": "First"},
+        {"CUSCOD": "b001 ", "CUSNAM": "Second"},
+    ])
+
+    assert cache.get("CUSMAS", "B001")["CUSNAM"] == "First"
+    assert len(cache.all("CUSMAS")) == 2
+
+
+def test_load_missing_looks_each_code_up_once(monkeypatch):
+    cache = loaded_cache([{"CUSCOD": "B001", "CUSNAM": "Customer 1"}])
+    lookup = Lookup([{"CUSCOD": "b002 ", "CUSNAM": "Customer 2"}])
+    monkeypatch.setattr(reference_cache, "async_fetchall", lookup)
+
+    asyncio.run(cache.load_missing_async("CUSMAS", ["b001", "B002", "b002  ", "x9", "X9 "], conn=object()))
+
+    assert [params for _, params in lookup.calls] == [["B002", "X9"]]
+    assert cache.get("CUSMAS", "B002")["CUSNAM"] == "Customer 2"
+
+    # Found and absent codes are not read again, whatever their case
+    asyncio.run(cache.load_missing_async("CUSMAS", ["B002 ", "x9", "b001"], conn=object()))
+    assert len(lookup.calls) == 1
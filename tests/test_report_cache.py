@@ -0,0 +1,106 @@
+from datetime import date
+
+from report_cache import ReportCache
+
+START, END = date(2025, 4, 1), date(2026, 3, 31)
+WATERMARK = (("DAYBUK", "2026-03-16 10:00:00"), ("ROLLUP_VERSION", "42"))
+
+
+class Compute:
+    """compute callback recording which codes it was asked for"""
+
+    def __init__(self, unknown=(), failing=()):
+        self.calls = []
+        self.unknown = unknown
+        self.failing = failing
+
+    def __call__(self, codes):
+        self.calls.append(list(codes))
+        entries = {}
+        for code in codes:
+            if code in self.unknown:
+                entries[code] = None
+            elif code in self.failing:
+                entries[code] = {"companyId": code, "rows": [], "error": "Database error"}
+            else:
+                entries[code] = {"companyId": code, "rows": [len(self.calls)]}
+        return entries
+
+
+def fetch(cache, codes, watermark, compute):
+    return cache.fetch("shop", codes, START, END, watermark, compute)
+
+
+def test_miss_then_hit():
+    cache, compute = ReportCache(16), Compute()
+
+    entries, status = fetch(cache, ["S01", "S02"], WATERMARK, compute)
+    assert status == "miss"
+    assert [entry["companyId"] for entry in entries] == ["S01", "S02"]
+
+    entries, status = fetch(cache, ["S02", "S01"], WATERMARK, compute)
+    assert status == "hit"
+    assert [entry["companyId"] for entry in entries] == ["S02", "S01"]
+    assert compute.calls == [["S01", "S02"]]
+    assert cache.stats() == {"hits": 2, "misses": 2, "entries": 2}
+
+
+def test_partial_computes_only_the_missing_companies():
+    cache, compute = ReportCache(16), Compute()
+    fetch(cache, ["S01"], WATERMARK, compute)
+
+    entries, status = fetch(cache, ["S01", "S02"], WATERMARK, compute)
+
+    assert status == "partial"
+    assert compute.calls == [["S01"], ["S02"]]
+    assert [entry["rows"] for entry in entries] == [[1], [2]]
+
+
+def test_changed_watermark_misses():
+    cache, compute = ReportCache(16), Compute()
+    fetch(cache, ["S01"], WATERMARK, compute)
+
+    _, status = fetch(cache, ["S01"], WATERMARK + (("2026-03-17",),), compute)
+
+    assert status == "miss"
+    assert len(compute.calls) == 2
+
+
+def test_none_watermark_neither_reads_nor_stores():
+    cache, compute = ReportCache(16), Compute()
+    fetch(cache, ["S01"], WATERMARK, compute)
+
+    entries, status = fetch(cache, ["S01", "S02"], None, compute)
+
+    assert status == "miss"
+    assert compute.calls[-1] == ["S01", "S02"]
+    assert [entry["rows"] for entry in entries] == [[2], [2]]
+    assert cache.stats() == {"hits": 0, "misses": 3, "entries": 1}
+
+    # The entry cached before the data started moving is still served
+    # once the watermark settles back to the same value
+    entries, status = fetch(cache, ["S01"], WATERMARK, compute)
+    assert status == "hit"
+    assert entries[0]["rows"] == [1]
+
+
+def test_errors_are_not_cached_and_unknown_companies_are_dropped():
+    cache, compute = ReportCache(16), Compute(unknown={"X"}, failing={"S02"})
+
+    entries, _ = fetch(cache, ["S01", "X", "S02"], WATERMARK, compute)
+    assert [entry["companyId"] for entry in entries] == ["S01", "S02"]
+
+    fetch(cache, ["S01", "S02"], WATERMARK, compute)
+    assert compute.calls[-1] == ["S02"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, compute = ReportCache(2), Compute()
+    fetch(cache, ["S01", "S02"], WATERMARK, compute)
+    fetch(cache, ["S01"], WATERMARK, compute)
+    fetch(cache, ["S03"], WATERMARK, compute)
+
+    _, status = fetch(cache, ["S02"], WATERMARK, compute)
+
+    assert status == "miss"
+    assert cache.stats()["entries"] == 2
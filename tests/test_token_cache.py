@@ -0,0 +1,165 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import token_cache
+from token_cache import ClaimsCache, RevokedTokenCache
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.queries.append((query, params))
+
+    def fetchone(self):
+        return {"now": self.conn.now}
+
+    def fetchall(self):
+        return self.conn.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """revoked_tokens rows on a fixed database clock"""
+
+    def __init__(self, rows, now=datetime(2026, 3, 16, 10, 0, 0)):
+        self.rows = rows
+        self.now = now
+        self.queries = []
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+
+def utc(seconds_from_now: float) -> datetime:
+    """Naive UTC DATETIME as revoked_tokens stores it"""
+    moment = datetime.fromtimestamp(time.time() + seconds_from_now, timezone.utc)
+    return moment.replace(tzinfo=None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.time() of token_cache, moved forward by assigning .now"""
+    class Clock:
+        now = time.time()
+
+    monkeypatch.setattr(token_cache.time, "time", lambda: Clock.now)
+    return Clock
+
+
+def test_first_refresh_loads_unexpired_rows():
+    cache = RevokedTokenCache(30)
+    conn = FakeConnection([{"token_hash": "a", "expires_at": utc(600)}])
+
+    cache.refresh_if_due(conn)
+
+    assert cache.is_revoked("a")
+    assert not cache.is_revoked("b")
+    assert "created_at" not in conn.queries[-1][0]
+
+
+def test_later_refreshes_read_rows_created_since_with_overlap():
+    cache = RevokedTokenCache(0)
+    conn = FakeConnection([{"token_hash": "a", "expires_at": utc(600)}])
+    cache.refresh_if_due(conn)
+
+    conn.rows = [{"token_hash": "b", "expires_at": utc(600)}]
+    cache.refresh_if_due(conn)
+
+    query, params = conn.queries[-1]
+    assert "created_at >= %s - INTERVAL %s SECOND" in query
+    assert params == (conn.now, RevokedTokenCache.OVERLAP_SECONDS)
+    assert cache.is_revoked("a") and cache.is_revoked("b")
+    assert len(cache) == 2
+
+
+def test_refresh_waits_for_refresh_seconds():
+    cache = RevokedTokenCache(30)
+    conn = FakeConnection([])
+    cache.refresh_if_due(conn)
+    cache.refresh_if_due(conn)
+
+    assert cache.refreshes == 1
+
+
+def test_expired_revocations_are_evicted(clock):
+    cache = RevokedTokenCache(0)
+    conn = FakeConnection([
+        {"token_hash": "short", "expires_at": utc(60)},
+        {"token_hash": "long", "expires_at": utc(3600)},
+    ])
+    cache.refresh_if_due(conn)
+    assert len(cache) == 2
+
+    clock.now += 120
+    # Past expires_at the token is no longer reported, the JWT is expired too
+    assert not cache.is_revoked("short")
+
+    conn.rows = []
+    cache.refresh_if_due(conn)
+    assert len(cache) == 1
+    assert cache.is_revoked("long")
+
+
+def test_add_records_a_local_revocation():
+    cache = RevokedTokenCache(30)
+
+    cache.add("a", time.time() + 60)
+
+    assert cache.is_revoked("a")
+
+
+def test_claims_are_served_until_exp(clock):
+    cache = ClaimsCache(8, RevokedTokenCache(30))
+    payload = {"sub": "user@example.com", "exp": clock.now + 60}
+    cache.put("a", payload)
+
+    assert cache.get("a") is payload
+
+    clock.now += 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_revoked_claims_are_dropped():
+    revoked = RevokedTokenCache(30)
+    cache = ClaimsCache(8, revoked)
+    cache.put("a", {"exp": time.time() + 60})
+
+    revoked.add("a", time.time() + 60)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_claims_without_exp_are_not_cached():
+    cache = ClaimsCache(8, RevokedTokenCache(30))
+    cache.put("a", {"sub": "user@example.com"})
+
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_claims_are_evicted():
+    cache = ClaimsCache(2, RevokedTokenCache(30))
+    exp = time.time() + 60
+    cache.put("a", {"exp": exp})
+    cache.put("b", {"exp": exp})
+    cache.get("a")
+    cache.put("c", {"exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_stored_expiry_is_utc():
+    expires_at = datetime(2026, 3, 16, 10, 0, 0)
+
+    assert token_cache._utc_epoch(expires_at) == datetime(2026, 3, 16, 10, 0, 0, tzinfo=timezone.utc).timestamp()
+    assert token_cache._utc_epoch(expires_at + timedelta(hours=1)) - token_cache._utc_epoch(expires_at) == 3600
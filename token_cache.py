@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from config import settings
+from database import async_fetchall, async_fetchone
+
+
+class RevokedTokenCache:
+    """
+    Process-local copy of revoked_tokens.
+
+    The first use loads every unexpired row in bulk. After that, at most
+    once every REVOCATION_REFRESH_SECONDS, rows created since the previous
+    refresh are read again with OVERLAP_SECONDS to spare, so a revocation
+    that committed late is still picked up and the set dedupes the rest.
+    Entries are dropped once they pass expires_at, the JWT itself is
+    rejected from then on anyway.
+
+    expires_at is stored in UTC and kept here as epoch seconds, compared
+    with time.time() like the JWT exp claim.
+    """
+
+    # Longest a revocation may take between INSERT and COMMIT
+    OVERLAP_SECONDS = 60
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._expires: Dict[str, float] = {}
+        self._read_until: Optional[datetime] = None
+        self._refreshed_at = None
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._async_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def is_due(self) -> bool:
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+        )
+
+    def refresh_if_due(self, conn):
+        if not self.is_due():
+            return
+
+        # Only one thread refreshes, the others keep serving the current set
+        # unless nothing has been loaded yet
+        blocking = self._refreshed_at is None
+        if not self._lock.acquire(blocking=blocking):
+            return
+
+        try:
+            if self.is_due():
+                self._refresh(conn)
+        finally:
+            self._lock.release()
+
+    async def refresh_if_due_async(self, conn):
+        """Same as refresh_if_due over an aiomysql connection"""
+        if not self.is_due():
+            return
+
+        # Concurrent requests wait for the running refresh on the loop
+        async with self._refresh_lock_async():
+            if not self.is_due():
+                return
+
+            read_until = (await async_fetchone(conn, "SELECT NOW() AS now"))["now"]
+            rows = await async_fetchall(conn, *self._rows_query())
+            self._apply(read_until, rows)
+
+    def _refresh_lock_async(self) -> asyncio.Lock:
+        # An asyncio.Lock belongs to the loop it was first used on
+        loop = asyncio.get_running_loop()
+        if self._async_lock is None or self._async_lock_loop is not loop:
+            self._async_lock = asyncio.Lock()
+            self._async_lock_loop = loop
+        return self._async_lock
+
+    def _rows_query(self) -> tuple:
+        if self._read_until is None:
+            return (
+                """
+                SELECT token_hash, expires_at FROM revoked_tokens
+                WHERE expires_at > UTC_TIMESTAMP()
+                """,
+                None,
+            )
+
+        return (
+            """
+            SELECT token_hash, expires_at FROM revoked_tokens
+            WHERE created_at >= %s - INTERVAL %s SECOND
+              AND expires_at > UTC_TIMESTAMP()
+            """,
+            (self._read_until, self.OVERLAP_SECONDS),
+        )
+
+    def _refresh(self, conn):
+        cursor = conn.cursor(dictionary=True)
+
+        try:
+            # created_at is on the database clock, so is the cut-off
+            cursor.execute("SELECT NOW() AS now")
+            read_until = cursor.fetchone()["now"]
+
+            cursor.execute(*self._rows_query())
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        self._apply(read_until, rows)
+
+    def _apply(self, read_until: datetime, rows):
+        expires = dict(self._expires)
+        for row in rows:
+            expires[row["token_hash"]] = _utc_epoch(row["expires_at"])
+
+        now = time.time()
+        self._expires = {
+            token_hash: expires_at
+            for token_hash, expires_at in expires.items()
+            if expires_at > now
+        }
+        self._read_until = read_until
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    def add(self, token_hash: str, expires_at: float):
+        """Record a revocation made by this process without waiting for a refresh"""
+        with self._lock:
+            expires = dict(self._expires)
+            expires[token_hash] = expires_at
+            self._expires = expires
+
+    def is_revoked(self, token_hash: str) -> bool:
+        expires_at = self._expires.get(token_hash)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._expires)
+
+
+def _utc_epoch(value: datetime) -> float:
+    """Epoch seconds of a naive UTC DATETIME from revoked_tokens"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class ClaimsCache:
+    """
+    Bounded LRU of already verified JWT payloads keyed by token hash.
+
+    Entries expire at the token's own exp claim, and a hit is only served
+    while the token is not in the revocation set.
+    """
+
+    def __init__(self, maxsize: int, revoked: RevokedTokenCache):
+        self.maxsize = maxsize
+        self.revoked = revoked
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash: str) -> Optional[dict]:
+        with self._lock:
+            payload = self._entries.get(token_hash)
+            if payload is None:
+                self.misses += 1
+                return None
+
+            if payload["exp"] <= time.time() or self.revoked.is_revoked(token_hash):
+                del self._entries[token_hash]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return payload
+
+    def put(self, token_hash: str, payload: dict):
+        if self.maxsize <= 0 or "exp" not in payload:
+            return
+
+        with self._lock:
+            self._entries[token_hash] = payload
+            self._entries.move_to_end(token_hash)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, token_hash: str):
+        with self._lock:
+            self._entries.pop(token_hash, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+revoked_tokens = RevokedTokenCache(settings.REVOCATION_REFRESH_SECONDS)
+verified_claims = ClaimsCache(settings.CLAIMS_CACHE_SIZE, revoked_tokens)